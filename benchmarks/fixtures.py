@@ -0,0 +1,120 @@
+"""Dữ liệu WeWork giả lập cho các benchmark"""
+import random
+from typing import Any, Dict, List, Sequence
+
+ASSIGNEES = ['an.nguyen', 'binh.tran', 'chi.le', 'dung.pham', 'giang.vo', 'hoa.dang']
+TASKLISTS = ['Thiết kế', 'Phát triển', 'Kiểm thử', 'Triển khai', 'Vận hành']
+WORDS = [
+    'cập nhật', 'giao diện', 'trang quản trị', 'báo cáo', 'khách hàng', 'hợp đồng', 'đơn hàng',
+    'kiểm thử', 'tích hợp', 'thanh toán', 'tài liệu', 'quy trình', 'phê duyệt', 'dữ liệu', 'máy chủ',
+    'triển khai', 'sprint', 'API', 'màn hình', 'thông báo', 'phân quyền', 'đối soát', 'kho', 'vận đơn',
+]
+STYLES = ['color:#333', 'font-size:14px', 'margin:0', 'text-align:left', 'background-color:#fff']
+
+
+def _sentence(rng: random.Random, min_words: int = 4, max_words: int = 12) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return words[0].capitalize() + ' ' + ' '.join(words[1:])
+
+
+def _inline(rng: random.Random, text: str) -> str:
+    """Chèn thẻ inline/entity như nội dung soạn từ editor của WeWork"""
+    roll = rng.random()
+    if roll < 0.2:
+        return f'<strong>{text}</strong>'
+    if roll < 0.3:
+        return f'<span style="{rng.choice(STYLES)}">{text}</span>'
+    if roll < 0.4:
+        return f'<em>{text}</em>'
+    if roll < 0.45:
+        return f'<a href="https://wework.base.vn/task/{rng.randint(1, 99999)}">{text}</a>'
+    if roll < 0.55:
+        return text.replace(' ', '&nbsp;', 1) + ' &amp; ' + rng.choice(WORDS)
+    return text
+
+
+def make_description(rng: random.Random, index: int) -> str:
+    """
+    Mô tả task dạng HTML: đoạn văn, danh sách, xuống dòng, style inline và entity
+
+    Nội dung khác nhau giữa các task (như dữ liệu thật) để benchmark không chỉ
+    đo cache của bộ làm sạch HTML. Khoảng 15% task không có mô tả và 10% là
+    text thuần.
+    """
+    roll = rng.random()
+    if roll < 0.15:
+        return ''
+    if roll < 0.25:
+        return _sentence(rng)
+    blocks = []
+    for _ in range(rng.randint(1, 4)):
+        kind = rng.random()
+        if kind < 0.5:
+            style = f' style="{rng.choice(STYLES)}"' if rng.random() < 0.3 else ''
+            blocks.append(f'<p{style}>{_inline(rng, _sentence(rng))}</p>')
+        elif kind < 0.8:
+            tag = 'ul' if rng.random() < 0.6 else 'ol'
+            items = ''.join(f'<li>{_inline(rng, _sentence(rng, 2, 6))}</li>' for _ in range(rng.randint(2, 5)))
+            blocks.append(f'<{tag}>{items}</{tag}>')
+        else:
+            blocks.append(f'{_sentence(rng)}<br>{_inline(rng, _sentence(rng))}<br/>')
+    blocks.append(f'<p>Ghi chú #{index}</p>')
+    return ''.join(blocks)
+
+
+def make_task(rng: random.Random, index: int, base_time: int = 1_700_000_000) -> Dict[str, Any]:
+    """Một task theo đúng cấu trúc response project/get.full"""
+    completed = rng.random() < 0.4
+    failed = not completed and rng.random() < 0.1
+    start_time = base_time + rng.randint(0, 180) * 86400
+    description = make_description(rng, index)
+    return {
+        'id': str(100000 + index),
+        'name': f'Task {index:05d} - {rng.choice(TASKLISTS)}',
+        'username': rng.choice(ASSIGNEES),
+        'content': description,
+        'tasklist': {'name': rng.choice(TASKLISTS)},
+        'followers': [{'username': name} for name in rng.sample(ASSIGNEES, rng.randint(0, 3))],
+        'complete': '100.00' if completed else f'{rng.randint(0, 90)}.00',
+        'has_deadline': '1' if rng.random() < 0.7 else '0',
+        'deadline': str(start_time + rng.randint(1, 30) * 86400),
+        'completed_time': str(start_time + rng.randint(1, 40) * 86400) if completed else '0',
+        'start_time': str(start_time),
+        'metatype': 'task',
+        'data': {'failed_reason': {'reason': 'Thiếu tài nguyên'} if failed else ''},
+        'result': {'content': 'Đã bàn giao' if completed else ''},
+    }
+
+
+def make_project_payload(num_tasks: int = 10000, num_subtasks: int = 0, seed: int = 0) -> Dict[str, Any]:
+    """Response project/get.full với num_tasks tasks và num_subtasks subtasks"""
+    rng = random.Random(seed)
+    tasks = [make_task(rng, i) for i in range(num_tasks)]
+    subtasks: List[Dict[str, Any]] = []
+    for i in range(num_subtasks):
+        subtask = make_task(rng, num_tasks + i)
+        subtask['origin_export'] = {'name': tasks[rng.randrange(num_tasks)]['name'] if tasks else ''}
+        subtasks.append(subtask)
+    return {'project': {'id': str(seed)}, 'tasks': tasks, 'subtasks': subtasks}
+
+
+def make_project_list(num_projects: int = 200, seed: int = 0) -> List[Dict[str, Any]]:
+    """Response project/list"""
+    rng = random.Random(seed)
+    words = ['Marketing', 'Website', 'Mobile App', 'CRM', 'Kho vận', 'Tuyển dụng', 'Đào tạo', 'Báo cáo']
+    return [
+        {'id': str(i), 'name': f'{rng.choice(words)} {rng.choice(words)} {i}'}
+        for i in range(num_projects)
+    ]
+
+
+# Số tasks của các project trong stub server, từ project nhỏ tới rất lớn
+DEFAULT_TASK_SIZES = (10, 100, 1000, 5000, 10000, 50000)
+
+
+def task_count_for(project_id: str, task_sizes: Sequence[int] = DEFAULT_TASK_SIZES) -> int:
+    """Số tasks của project trong bộ fixture (xoay vòng theo id)"""
+    try:
+        return task_sizes[int(project_id) % len(task_sizes)]
+    except ValueError:
+        return task_sizes[0]
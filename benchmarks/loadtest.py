@@ -0,0 +1,383 @@
+"""
+Load test cho wework_http_server với stub WeWork API local
+
+Mỗi scenario chạy một tiến trình server riêng (biến môi trường của
+scenario được áp dụng cho server đó) và tải theo từng mức concurrency:
+các worker gửi request liên tục (closed loop, keep-alive) theo tỉ lệ
+--mix trong --duration giây. Kết quả gồm RPS đạt được, latency
+p50/p95/p99, tỉ lệ lỗi, CPU và bộ nhớ của tiến trình server.
+
+    python benchmarks/loadtest.py --concurrency 1,8,32 --duration 15 \\
+        --mix projects=2,details=1,analyze=3 \\
+        --scenario threaded:HTTP_SERVER_MODE=threaded \\
+        --scenario single:HTTP_SERVER_MODE=single \\
+        --scenario no-cache:WEWORK_PROJECT_CACHE_TTL=0,WEWORK_TASK_MEMO_SIZE=0
+
+Chạy với server có sẵn (không đo được CPU/bộ nhớ nếu thiếu --server-pid):
+
+    python benchmarks/loadtest.py --target http://127.0.0.1:8000 --server-pid 1234
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote_plus, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_project_list
+from benchmarks.measure import percentile
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEARCH_TERMS = ['website', 'mobile', 'crm', 'kho vận', 'báo cáo', 'tuyen dung', 'marketing 12', 'đào tạo']
+REQUEST_KINDS = ('projects', 'details', 'analyze')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host: str, port: int, path: str, timeout: float = 60) -> bool:
+    """Chờ tới khi GET path trả về 200"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', path)
+            if conn.getresponse().status == 200:
+                conn.close()
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.2)
+    return False
+
+
+class ProcessMonitor:
+    """CPU và RSS của một tiến trình (psutil nếu có, ngược lại đọc /proc trên Linux)"""
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self._process = psutil.Process(pid) if PSUTIL_AVAILABLE and pid else None
+        self._clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+    @property
+    def available(self) -> bool:
+        return self._process is not None or (self.pid is not None and os.path.exists(f'/proc/{self.pid}/stat'))
+
+    def cpu_seconds(self) -> Optional[float]:
+        if self._process is not None:
+            times = self._process.cpu_times()
+            return times.user + times.system
+        try:
+            with open(f'/proc/{self.pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / self._clock_ticks
+        except (OSError, IndexError, ValueError, TypeError):
+            return None
+
+    def rss_mb(self) -> Optional[float]:
+        if self._process is not None:
+            return self._process.memory_info().rss / (1024 * 1024)
+        try:
+            with open(f'/proc/{self.pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) / 1024
+        except (OSError, ValueError, TypeError):
+            pass
+        return None
+
+
+class ServerUnderTest:
+    """Tiến trình stub WeWork API và tiến trình wework_http_server của một scenario"""
+
+    def __init__(self, env: Dict[str, str], stub_latency: float, task_sizes: str, log_path: Optional[str] = None):
+        self.env = env
+        self.stub_latency = stub_latency
+        self.task_sizes = task_sizes
+        self.log_path = log_path
+        self.port = free_port()
+        self.stub_port = free_port()
+        self._processes: List[subprocess.Popen] = []
+        self.server: Optional[subprocess.Popen] = None
+        self._log = None
+
+    def start(self) -> None:
+        self._log = open(self.log_path, 'ab') if self.log_path else None
+        log = self._log or subprocess.DEVNULL
+        stub = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'benchmarks', 'stub_server.py'),
+             '--port', str(self.stub_port), '--latency', str(self.stub_latency), '--task-sizes', self.task_sizes],
+            stdout=subprocess.DEVNULL, stderr=log,
+        )
+        self._processes.append(stub)
+        env = {
+            **os.environ,
+            'WEWORK_BASE_URL': f'http://127.0.0.1:{self.stub_port}/extapi/v3',
+            'PORT': str(self.port),
+            'HOST': '127.0.0.1',
+            'WEWORK_UPSTREAM_RATE': '0',
+            'PYTHONUNBUFFERED': '1',
+        }
+        # Snapshot trên đĩa của lần chạy trước sẽ làm sai kết quả, chỉ bật khi scenario yêu cầu
+        env.pop('WEWORK_SNAPSHOT_DIR', None)
+        env.update(self.env)
+        self.server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'wework_http_server.py')],
+            env=env, cwd=ROOT, stdout=log, stderr=log,
+        )
+        self._processes.append(self.server)
+        if not wait_for_port('127.0.0.1', self.port, '/health'):
+            self.stop()
+            raise RuntimeError("wework_http_server did not become healthy")
+
+    def stop(self) -> None:
+        for process in reversed(self._processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._processes.clear()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class LoadGenerator:
+    """Các worker closed-loop gửi request theo tỉ lệ mix tới server"""
+
+    def __init__(self, host: str, port: int, mix: Dict[str, float], project_ids: List[str],
+                 compress: bool = True, seed: int = 0):
+        self.host = host
+        self.port = port
+        self.kinds = [kind for kind in REQUEST_KINDS if mix.get(kind, 0) > 0]
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.project_ids = project_ids
+        self.headers = {'Content-Type': 'application/json'}
+        if compress:
+            self.headers['Accept-Encoding'] = 'gzip'
+        self.seed = seed
+
+    def build_request(self, rng: random.Random, kind: str) -> Tuple[str, str, Optional[bytes]]:
+        if kind == 'projects':
+            return 'GET', f'/api/projects?search={quote_plus(rng.choice(SEARCH_TERMS))}', None
+        body = {'project_id': rng.choice(self.project_ids)}
+        path = '/api/project/details' if kind == 'details' else '/api/project/analyze'
+        return 'POST', path, json.dumps(body).encode('utf-8')
+
+    def run(self, concurrency: int, duration: float) -> Dict[str, List[Tuple[float, bool]]]:
+        """Chạy concurrency worker trong duration giây; trả về (latency, ok) theo loại request"""
+        samples: Dict[str, List[Tuple[float, bool]]] = {kind: [] for kind in self.kinds}
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def worker(index: int):
+            rng = random.Random(self.seed * 1000 + index)
+            conn = None
+            local: Dict[str, List[Tuple[float, bool]]] = {kind: [] for kind in self.kinds}
+            while time.monotonic() < deadline:
+                kind = rng.choices(self.kinds, self.weights)[0]
+                method, path, body = self.build_request(rng, kind)
+                start = time.perf_counter()
+                ok = False
+                try:
+                    if conn is None:
+                        conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+                    conn.request(method, path, body, self.headers)
+                    response = conn.getresponse()
+                    response.read()
+                    ok = response.status < 400
+                    if response.getheader('Connection', '').lower() == 'close':
+                        conn.close()
+                        conn = None
+                except (OSError, http.client.HTTPException):
+                    if conn is not None:
+                        conn.close()
+                    conn = None
+                local[kind].append((time.perf_counter() - start, ok))
+            if conn is not None:
+                conn.close()
+            with lock:
+                for kind, values in local.items():
+                    samples[kind].extend(values)
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples
+
+
+def latency_stats(values: List[Tuple[float, bool]], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latency for latency, _ in values)
+    errors = sum(1 for _, ok in values if not ok)
+    return {
+        'requests': len(values),
+        'rps': round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+        'error_rate': round(errors / len(values), 4) if values else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_level(generator: LoadGenerator, monitor: ProcessMonitor, concurrency: int,
+              duration: float, warmup: float) -> Dict[str, Any]:
+    """Một mức concurrency: warm-up rồi đo, lấy mẫu CPU/RSS của server trong lúc đo"""
+    if warmup > 0:
+        generator.run(concurrency, warmup)
+
+    rss_samples: List[float] = []
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.is_set():
+            rss = monitor.rss_mb()
+            if rss is not None:
+                rss_samples.append(rss)
+            stop.wait(0.25)
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    cpu_start = monitor.cpu_seconds()
+    start = time.perf_counter()
+    sampler.start()
+    samples = generator.run(concurrency, duration)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+    cpu_end = monitor.cpu_seconds()
+
+    all_samples = [value for values in samples.values() for value in values]
+    result = {
+        'concurrency': concurrency,
+        'duration': round(elapsed, 2),
+        **latency_stats(all_samples, elapsed),
+        'server_cpu_pct': round((cpu_end - cpu_start) / elapsed * 100, 1)
+        if cpu_start is not None and cpu_end is not None else None,
+        'server_rss_mb': round(max(rss_samples), 1) if rss_samples else None,
+        'endpoints': {kind: latency_stats(values, elapsed) for kind, values in samples.items()},
+    }
+    return result
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise argparse.ArgumentTypeError(f"Unknown request kind '{kind}' (expected {', '.join(REQUEST_KINDS)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def parse_scenario(text: str) -> Tuple[str, Dict[str, str]]:
+    """'tên:KEY=VALUE,KEY=VALUE' -> (tên, env)"""
+    name, _, assignments = text.partition(':')
+    env = {}
+    for assignment in filter(None, assignments.split(',')):
+        key, _, value = assignment.partition('=')
+        env[key.strip()] = value.strip()
+    return name.strip() or 'default', env
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    header = (f"{'scenario':<18}{'conc':>5}{'rps':>9}{'err %':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+              f"{'cpu %':>8}{'rss MB':>8}")
+    lines = [header, '-' * len(header)]
+    for result in results:
+        cpu = result['server_cpu_pct']
+        rss = result['server_rss_mb']
+        lines.append(
+            f"{result['scenario']:<18}{result['concurrency']:>5}{result['rps']:>9.1f}"
+            f"{result['error_rate'] * 100:>7.2f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+            f"{result['p99_ms']:>9.1f}{cpu if cpu is not None else '-':>8}{rss if rss is not None else '-':>8}"
+        )
+        for kind, stats in result['endpoints'].items():
+            lines.append(
+                f"{'  ' + kind:<18}{'':>5}{stats['rps']:>9.1f}{stats['error_rate'] * 100:>7.2f}"
+                f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+            )
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', default='1,8,32', help='Các mức concurrency, vd 1,8,32')
+    parser.add_argument('--duration', type=float, default=10, help='Số giây đo ở mỗi mức')
+    parser.add_argument('--warmup', type=float, default=2, help='Số giây chạy trước khi đo ở mỗi mức')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('projects=2,details=1,analyze=3'),
+                        help='Tỉ lệ loại request: projects, details, analyze')
+    parser.add_argument('--scenario', action='append', type=parse_scenario,
+                        help="'tên:KEY=VALUE,...' biến môi trường cho server (lặp lại để so sánh)")
+    parser.add_argument('--stub-latency', type=float, default=0.05, help='Độ trễ (giây) của stub WeWork API')
+    parser.add_argument('--task-sizes', default='10,100,1000', help='Số tasks của các project trong stub')
+    parser.add_argument('--projects', type=int, default=20, help='Số project được dùng trong request')
+    parser.add_argument('--no-compress', action='store_true', help='Không gửi Accept-Encoding: gzip')
+    parser.add_argument('--target', help='URL của server có sẵn thay vì tự khởi động')
+    parser.add_argument('--server-pid', type=int, help='PID của server có sẵn (để đo CPU/bộ nhớ)')
+    parser.add_argument('--server-log', help='Ghi log của server/stub vào file này')
+    parser.add_argument('--json', dest='json_path', help='Lưu kết quả ra file JSON')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    # Số tasks xoay vòng theo id nên N project đầu tiên có đủ các kích thước trong --task-sizes
+    project_ids = [p['id'] for p in make_project_list(max(1, args.projects))]
+
+    results = []
+    scenarios = [('target', {})] if args.target else (args.scenario or [('default', {})])
+    for name, env in scenarios:
+        server = None
+        if args.target:
+            parsed = urlparse(args.target)
+            host, port = parsed.hostname, parsed.port or 80
+            monitor = ProcessMonitor(args.server_pid)
+        else:
+            server = ServerUnderTest(env, args.stub_latency, args.task_sizes, args.server_log)
+            server.start()
+            host, port = '127.0.0.1', server.port
+            monitor = ProcessMonitor(server.server.pid)
+        try:
+            generator = LoadGenerator(host, port, args.mix, project_ids, compress=not args.no_compress)
+            for level in levels:
+                result = run_level(generator, monitor, level, args.duration, args.warmup)
+                result.update({'scenario': name, 'env': env})
+                results.append(result)
+                print(f"{name} c={level}: {result['rps']:.1f} rps, p95 {result['p95_ms']:.1f} ms, "
+                      f"errors {result['error_rate'] * 100:.2f}%", file=sys.stderr)
+        finally:
+            if server is not None:
+                server.stop()
+
+    print(format_results(results))
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'args': {key: value for key, value in vars(args).items() if key not in ('mix', 'scenario')},
+                'mix': args.mix,
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Saved {len(results)} results to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Đo latency/throughput và bộ nhớ cho các benchmark"""
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Percentile q (0-100) của dãy đã sắp xếp, nội suy tuyến tính"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak RSS của tiến trình (MB), None nếu nền tảng không hỗ trợ"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize(name: str, latencies: List[float], elapsed: float, errors: int = 0,
+              **extra: Any) -> Dict[str, Any]:
+    """Tóm tắt một lượt chạy: throughput, p50/p95/p99 (ms) và peak RSS"""
+    ordered = sorted(latencies)
+    return {
+        'name': name,
+        'iterations': len(ordered),
+        'errors': errors,
+        'throughput': round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        **extra,
+    }
+
+
+def run(name: str, func: Callable[[int], Any], iterations: int = 20, warmup: int = 2,
+        concurrency: int = 1, **extra: Any) -> Dict[str, Any]:
+    """
+    Chạy func(i) iterations lần và đo latency từng lần
+
+    Args:
+        func: Hàm được đo, nhận số thứ tự lần chạy; exception được đếm là lỗi
+        warmup: Số lần chạy trước khi đo (không tính vào kết quả)
+        concurrency: Số thread gọi func đồng thời
+    """
+    for i in range(warmup):
+        func(i)
+
+    def timed(i: int):
+        start = time.perf_counter()
+        try:
+            func(i)
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        results = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [value for value in results if value is not None]
+    return summarize(name, latencies, elapsed, errors=len(results) - len(latencies),
+                     concurrency=concurrency, **extra)
+
+
+def format_table(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Bảng kết quả; có baseline thì thêm cột so sánh p50"""
+    header = f"{'benchmark':<44}{'ops/s':>10}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'RSS MB':>9}{'err':>5}"
+    if baseline:
+        header += f"{'vs base':>10}"
+    lines = [header, '-' * len(header)]
+    for result in results:
+        line = (
+            f"{result['name']:<44}{result['throughput']:>10.1f}{result['p50_ms']:>11.2f}"
+            f"{result['p95_ms']:>11.2f}{result['p99_ms']:>11.2f}"
+            f"{result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-':>9}{result['errors']:>5}"
+        )
+        if baseline:
+            previous = baseline.get(result['name'])
+            if previous and previous.get('p50_ms'):
+                line += f"{result['p50_ms'] / previous['p50_ms']:>9.2f}x"
+            else:
+                line += f"{'-':>10}"
+        lines.append(line)
+    return '\n'.join(lines)
@@ -0,0 +1,58 @@
+"""
+Benchmark serialize kết quả phân tích tasks
+
+So sánh cách cũ (df.to_dict(orient='records') + json.dumps) với
+JSONSerializer trên từng backend có sẵn.
+
+    python benchmarks/serialization_benchmark.py --tasks 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_project_payload
+from data.serialization import ORJSON_AVAILABLE, DataFrameRecords, JSONSerializer
+from data.wework_client import TaskAnalyzer
+
+
+def best_of(func, repeat: int) -> float:
+    """Thời gian nhỏ nhất (ms) trong repeat lần chạy"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    df = TaskAnalyzer().analyze_tasks(make_project_payload(args.tasks))
+    print(f"{len(df)} tasks x {len(df.columns)} columns")
+
+    def baseline():
+        payload = {'success': True, 'tasks': df.to_dict(orient='records')}
+        return json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+
+    expected = json.loads(baseline())
+    baseline_ms = best_of(baseline, args.repeat)
+    print(f"{'to_dict + json.dumps':<28}{baseline_ms:>9.1f} ms")
+
+    for backend in ['json', 'orjson'] if ORJSON_AVAILABLE else ['json']:
+        serializer = JSONSerializer(backend)
+        encode = lambda: serializer.dumps({'success': True, 'tasks': DataFrameRecords(df)})
+        assert json.loads(encode()) == expected
+        elapsed = best_of(encode, args.repeat)
+        print(f"{'JSONSerializer(' + backend + ')':<28}{elapsed:>9.1f} ms  ({baseline_ms / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Đo thời gian khởi động của MCP server qua stdio (giống Claude Desktop)
+
+Mỗi lượt chạy khởi động một tiến trình wework_mcp_server.py mới và đo:
+  - initialize: từ lúc spawn tới khi có response của initialize
+  - tools/list: response của tools/list ngay sau đó
+  - first tool: lần gọi tool đầu tiên (search_projects với stub WeWork API,
+    bao gồm cả thời gian import các thư viện nặng ở lần dùng đầu)
+
+Thoát với mã 1 nếu p50 của initialize vượt --target-ms.
+
+    python benchmarks/startup.py --runs 5 --target-ms 1000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.measure import percentile
+from benchmarks.stub_server import StubWeWorkAPI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROTOCOL_VERSION = '2024-11-05'
+
+
+class StdioSession:
+    """Một tiến trình MCP server, trao đổi JSON-RPC theo từng dòng qua stdin/stdout"""
+
+    def __init__(self, env: Dict[str, str]):
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'wework_mcp_server.py')],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=ROOT, env=env,
+        )
+        self._next_id = 0
+
+    def send(self, method: str, params: Optional[Dict[str, Any]] = None, notify: bool = False) -> Optional[int]:
+        message: Dict[str, Any] = {'jsonrpc': '2.0', 'method': method}
+        if params is not None:
+            message['params'] = params
+        if not notify:
+            self._next_id += 1
+            message['id'] = self._next_id
+        self.process.stdin.write(json.dumps(message).encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+        return message.get('id')
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Gửi request và đọc tới khi có response cùng id"""
+        request_id = self.send(method, params)
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"MCP server exited before answering {method}")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get('id') == request_id:
+                if 'error' in message:
+                    raise RuntimeError(f"{method} failed: {message['error']}")
+                return message['result']
+
+    def close(self) -> None:
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def measure_once(env: Dict[str, str], first_tool: bool) -> Dict[str, float]:
+    session = StdioSession(env)
+    try:
+        session.call('initialize', {
+            'protocolVersion': PROTOCOL_VERSION,
+            'capabilities': {},
+            'clientInfo': {'name': 'startup-benchmark', 'version': '1.0'},
+        })
+        timings = {'initialize': time.perf_counter() - session.started}
+        session.send('notifications/initialized', notify=True)
+        session.call('tools/list', {})
+        timings['tools/list'] = time.perf_counter() - session.started
+        if first_tool:
+            start = time.perf_counter()
+            session.call('tools/call', {'name': 'search_projects', 'arguments': {'search_text': 'website'}})
+            timings['first tool'] = time.perf_counter() - start
+        return timings
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--target-ms', type=float, default=1000,
+                        help='Mục tiêu cho p50 thời gian tới response initialize (ms)')
+    parser.add_argument('--no-tool', action='store_true', help='Không đo lần gọi tool đầu tiên')
+    parser.add_argument('--json', dest='json_path', help='Lưu kết quả ra file JSON')
+    args = parser.parse_args()
+
+    stub = StubWeWorkAPI(num_projects=200, latency=0.01)
+    env = {
+        **os.environ,
+        'WEWORK_BASE_URL': stub.start(),
+        'WEWORK_UPSTREAM_RATE': '0',
+        'PYTHONUNBUFFERED': '1',
+    }
+    env.pop('WEWORK_SNAPSHOT_DIR', None)
+
+    runs: List[Dict[str, float]] = []
+    try:
+        for _ in range(args.runs):
+            runs.append(measure_once(env, not args.no_tool))
+    finally:
+        stub.stop()
+
+    summary: Dict[str, Dict[str, float]] = {}
+    print(f"{'phase':<14}{'p50 ms':>10}{'min ms':>10}{'max ms':>10}")
+    for phase in runs[0]:
+        values = sorted(run[phase] for run in runs)
+        summary[phase] = {
+            'p50_ms': round(percentile(values, 50) * 1000, 1),
+            'min_ms': round(values[0] * 1000, 1),
+            'max_ms': round(values[-1] * 1000, 1),
+        }
+        print(f"{phase:<14}{summary[phase]['p50_ms']:>10.1f}{summary[phase]['min_ms']:>10.1f}"
+              f"{summary[phase]['max_ms']:>10.1f}")
+
+    passed = summary['initialize']['p50_ms'] <= args.target_ms
+    print(f"initialize p50 {summary['initialize']['p50_ms']:.0f} ms, target {args.target_ms:.0f} ms: "
+          f"{'OK' if passed else 'FAIL'}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': sys.version.split()[0],
+                'target_ms': args.target_ms,
+                'summary': summary,
+                'runs': runs,
+            }, f, ensure_ascii=False, indent=2)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
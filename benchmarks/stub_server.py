@@ -0,0 +1,175 @@
+"""
+Stub WeWork API chạy local cho benchmark
+
+Mô phỏng hai endpoint mà client dùng (POST form-urlencoded, có
+access_token): project/list và project/get.full. Dữ liệu lấy từ
+benchmarks.fixtures, được sinh một lần cho mỗi project rồi giữ lại dạng
+bytes; độ trễ và tỉ lệ lỗi cấu hình được.
+
+    python benchmarks/stub_server.py --port 8765 --latency 0.05
+
+rồi chạy server với WEWORK_BASE_URL=http://127.0.0.1:8765/extapi/v3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import DEFAULT_TASK_SIZES, make_project_list, make_project_payload, task_count_for
+
+API_PREFIX = '/extapi/v3'
+
+
+class StubWeWorkAPI:
+    """Stub server của WeWork API, chạy trên một thread nền"""
+
+    def __init__(self, num_projects: int = 200, task_sizes: Sequence[int] = DEFAULT_TASK_SIZES,
+                 latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            num_projects (int): Số projects trong project/list
+            task_sizes: Số tasks của các project, xoay vòng theo id (project 0 có task_sizes[0] tasks, ...)
+            latency (float): Độ trễ (giây) thêm vào mỗi response
+            jitter (float): Độ trễ ngẫu nhiên thêm vào, trong [0, jitter] giây
+            error_rate (float): Tỉ lệ request trả về 503 (kiểm thử retry/circuit breaker)
+            seed (int): Seed của dữ liệu giả lập
+        """
+        self.projects = make_project_list(num_projects, seed)
+        self.task_sizes = tuple(task_sizes)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._payloads: Dict[str, bytes] = {}
+        self._project_ids = {project['id'] for project in self.projects}
+        self._list_body = json.dumps({'projects': self.projects}, ensure_ascii=False).encode('utf-8')
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.requests: Dict[str, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def project_body(self, project_id: str) -> Optional[bytes]:
+        """Response project/get.full đã encode của project (sinh lần đầu rồi giữ lại)"""
+        if project_id not in self._project_ids:
+            return None
+        with self._lock:
+            body = self._payloads.get(project_id)
+        if body is None:
+            payload = make_project_payload(task_count_for(project_id, self.task_sizes), seed=int(project_id))
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            with self._lock:
+                self._payloads[project_id] = body
+        return body
+
+    def project_ids_with_tasks(self, num_tasks: int) -> List[str]:
+        """ID các project có đúng num_tasks tasks"""
+        return [p['id'] for p in self.projects if task_count_for(p['id'], self.task_sizes) == num_tasks]
+
+    def _delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+
+    def _should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def _count(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                form = parse_qs(self.rfile.read(length).decode('utf-8'))
+                endpoint = self.path[len(API_PREFIX):].lstrip('/') if self.path.startswith(API_PREFIX) else ''
+                stub._count(endpoint or self.path)
+                time.sleep(stub._delay())
+
+                if not form.get('access_token'):
+                    self.send_body(401, b'{"code":0,"message":"Missing access_token"}')
+                elif stub._should_fail():
+                    self.send_body(503, b'{"code":0,"message":"Service unavailable"}', {'Retry-After': '1'})
+                elif endpoint == 'project/list':
+                    self.send_body(200, stub._list_body)
+                elif endpoint == 'project/get.full':
+                    body = stub.project_body(form.get('id', [''])[0])
+                    if body is None:
+                        self.send_body(404, b'{"code":0,"message":"Project not found"}')
+                    else:
+                        self.send_body(200, body)
+                else:
+                    self.send_body(404, b'{"code":0,"message":"Unknown endpoint"}')
+
+            def send_body(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Chạy stub server (port 0 để chọn port trống), trả về base URL"""
+        server = ThreadingHTTPServer((host, port), self._handler())
+        server.daemon_threads = True
+        self._server = server
+        threading.Thread(target=server.serve_forever, name='wework-stub', daemon=True).start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--projects', type=int, default=200)
+    parser.add_argument('--task-sizes', default=','.join(map(str, DEFAULT_TASK_SIZES)),
+                        help='Số tasks của các project, xoay vòng theo id')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubWeWorkAPI(
+        args.projects, [int(size) for size in args.task_sizes.split(',')],
+        args.latency, args.jitter, args.error_rate,
+    )
+    print(f"Stub WeWork API: {stub.start(args.host, args.port)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Bộ benchmark: micro (parse tasks, làm sạch HTML, tìm project, serialize) và
+end-to-end (MCP tools và HTTP endpoints chạy với stub WeWork API local)
+
+Mỗi benchmark in throughput, latency p50/p95/p99 và peak RSS. Lưu kết quả
+bằng --json rồi so sánh lần chạy sau với --compare.
+
+    python benchmarks/suite.py --suite micro --sizes 10,1000,10000,50000
+    python benchmarks/suite.py --suite e2e --latency 0.05 --concurrency 8 --json before.json
+    python benchmarks/suite.py --compare before.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_description, make_project_list, make_project_payload
+from benchmarks.measure import format_table, run
+from benchmarks.stub_server import StubWeWorkAPI
+
+SEARCH_TERMS = ['website', 'mobile', 'crm', 'kho vận', 'báo cáo', 'tuyen dung', 'marketing 12', 'đào tạo']
+
+
+def iterations_for(num_tasks: int, iterations: int) -> int:
+    """Giảm số lần chạy với dữ liệu lớn để mỗi benchmark chạy trong vài giây"""
+    return max(3, min(iterations, 200000 // max(num_tasks, 1)))
+
+
+def micro_benchmarks(sizes: List[int], iterations: int) -> List[Dict[str, Any]]:
+    from data.serialization import DataFrameRecords, JSONSerializer
+    from data.wework_client import TaskAnalyzer, WeWorkClient
+
+    results = []
+    serializer = JSONSerializer()
+    for size in sizes:
+        payload = make_project_payload(size, seed=size)
+        count = iterations_for(size, iterations)
+
+        analyzer = TaskAnalyzer()
+        results.append(run(f"parse_tasks[{size}]", lambda i: analyzer.analyze_tasks(payload),
+                           count, warmup=1, tasks=size))
+
+        memo_analyzer = TaskAnalyzer(memo_size=size * 2, memo_min_rows=0)
+        results.append(run(f"parse_tasks_memo_warm[{size}]", lambda i: memo_analyzer.analyze_tasks(payload),
+                           count, warmup=1, tasks=size))
+
+        # Mỗi lần chạy dùng một bộ mô tả mới để đo đúng chi phí parse HTML (không trúng cache)
+        rng = random.Random(size)
+        batches = [[make_description(rng, j) for j in range(size)] for _ in range(count + 1)]
+        results.append(run(f"clean_html_content[{size}]",
+                           lambda i: [TaskAnalyzer.clean_html_content(text) for text in batches[i % len(batches)]],
+                           count, warmup=1, tasks=size))
+
+        df = analyzer.analyze_tasks(payload)
+        results.append(run(f"serialize[{size}]",
+                           lambda i: serializer.dumps({'success': True, 'tasks': DataFrameRecords(df)}),
+                           count, warmup=1, tasks=size))
+
+    for num_projects in (200, 2000):
+        client = WeWorkClient('benchmark')
+        projects = make_project_list(num_projects)
+        client.project_cache.set(projects)
+        results.append(run(
+            f"search_projects[{num_projects} projects]",
+            lambda i: client.rank_projects(projects, SEARCH_TERMS[i % len(SEARCH_TERMS)], 10),
+            iterations * 10, warmup=len(SEARCH_TERMS),
+        ))
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class HTTPBenchClient:
+    """Client HTTP keep-alive, mỗi thread một kết nối"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: Any = None, headers: Dict[str, str] = None) -> bytes:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json', **(headers or {})}
+        try:
+            conn.request(method, path, data, headers)
+            response = conn.getresponse()
+            payload = response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            raise
+        if response.status >= 400:
+            raise RuntimeError(f"{method} {path} -> {response.status}")
+        return payload
+
+
+def e2e_benchmarks(latency: float, iterations: int, concurrency: int) -> List[Dict[str, Any]]:
+    stub = StubWeWorkAPI(num_projects=200, latency=latency)
+    base_url = stub.start()
+    port = free_port()
+
+    # Cấu hình server trước khi import: trỏ tới stub, không giới hạn tốc độ upstream
+    os.environ['WEWORK_BASE_URL'] = base_url
+    os.environ['PORT'] = str(port)
+    os.environ['HOST'] = '127.0.0.1'
+    os.environ.setdefault('WEWORK_UPSTREAM_RATE', '0')
+    os.environ.pop('WEWORK_SNAPSHOT_DIR', None)
+    import wework_http_server as server
+    import wework_mcp_server as tools
+
+    server.MCPHTTPHandler.log_message = lambda *args: None
+    threading.Thread(target=server.run_http_server, daemon=True).start()
+    time.sleep(0.2)
+
+    # Mỗi worker phân tích một project riêng; sinh trước payload để không tính vào latency
+    medium = stub.project_ids_with_tasks(1000)[:max(1, concurrency)]
+    large = stub.project_ids_with_tasks(10000)[:2]
+    for project_id in medium + large:
+        stub.project_body(project_id)
+
+    def tool(name: str, make_coro: Callable[[int], Any], count: int = iterations) -> Dict[str, Any]:
+        return run(f"tool {name}", lambda i: server.run_tool(make_coro(i)), count,
+                   warmup=2, concurrency=concurrency, latency_ms=latency * 1000)
+
+    results = [
+        tool('search_projects', lambda i: tools.search_projects(SEARCH_TERMS[i % len(SEARCH_TERMS)])),
+        tool('get_project_statistics[1000]', lambda i: tools.get_project_statistics(medium[i % len(medium)])),
+        tool('analyze_project_tasks[1000]', lambda i: tools.analyze_project_tasks(medium[i % len(medium)])),
+        tool('analyze_project_tasks[10000]',
+             lambda i: tools.analyze_project_tasks(large[i % len(large)]), max(3, iterations // 5)),
+    ]
+
+    client = HTTPBenchClient(port)
+
+    def endpoint(name: str, method: str, path: str, make_body: Callable[[int], Any] = None,
+                 headers: Dict[str, str] = None, count: int = iterations) -> Dict[str, Any]:
+        return run(
+            f"http {name}",
+            lambda i: client.request(method, path, make_body(i) if make_body else None, headers),
+            count, warmup=2, concurrency=concurrency, latency_ms=latency * 1000,
+        )
+
+    gzip = {'Accept-Encoding': 'gzip'}
+    results += [
+        endpoint('GET /api/projects', 'GET', '/api/projects?search=website'),
+        endpoint('POST /api/project/analyze[1000]', 'POST', '/api/project/analyze',
+                 lambda i: {'project_id': medium[i % len(medium)]}, gzip),
+        endpoint('POST /api/project/analyze[1000] summary', 'POST', '/api/project/analyze',
+                 lambda i: {'project_id': medium[i % len(medium)], 'summary_only': True}, gzip),
+        endpoint('POST /api/project/analyze[10000] stream', 'POST', '/api/project/analyze',
+                 lambda i: {'project_id': large[i % len(large)], 'stream': True}, gzip, max(3, iterations // 5)),
+    ]
+    stub.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suite', choices=['micro', 'e2e', 'all'], default='all')
+    parser.add_argument('--sizes', default='10,1000,10000,50000', help='Số tasks cho micro benchmark')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.05, help='Độ trễ (giây) của stub WeWork API')
+    parser.add_argument('--concurrency', type=int, default=4, help='Số request đồng thời của benchmark e2e')
+    parser.add_argument('--json', dest='json_path', help='Lưu kết quả ra file JSON')
+    parser.add_argument('--compare', help='File JSON của lần chạy trước để so sánh p50')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('wework_mcp_server').setLevel(logging.WARNING)
+    logging.getLogger('wework_http_server').setLevel(logging.WARNING)
+
+    results: List[Dict[str, Any]] = []
+    if args.suite in ('micro', 'all'):
+        results += micro_benchmarks([int(size) for size in args.sizes.split(',')], args.iterations)
+    if args.suite in ('e2e', 'all'):
+        results += e2e_benchmarks(args.latency, args.iterations, args.concurrency)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = {result['name']: result for result in json.load(f)['results']}
+    print(format_table(results, baseline))
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': sys.version.split()[0],
+                'args': vars(args),
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Saved {len(results)} results to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
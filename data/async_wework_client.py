@@ -0,0 +1,321 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+from data.wework_client import WeWorkClientBase
+from data.snapshot_store import ProjectSnapshotStore
+from data.single_flight import AsyncSingleFlight
+from data.resilience import READ_UPSTREAM, CircuitBreaker, RetryPolicy
+from data.upstream_scheduler import PRIORITY_BACKGROUND, PRIORITY_BULK, UpstreamScheduler, upstream_priority
+from data.lazy_imports import pd
+
+
+class AsyncWeWorkClient(WeWorkClientBase):
+    """
+    Client asyncio để tương tác với WeWork API
+
+    Cùng API với WeWorkClient nhưng các hàm gọi mạng là coroutine, chạy trên
+    một httpx.AsyncClient dùng chung. Phần xử lý nặng CPU (phân tích tasks,
+    dựng search index) được đẩy sang thread để không chặn event loop.
+    """
+
+    def __init__(self, access_token: str, project_cache_ttl: float = 300,
+                 pool_maxsize: int = 10, connect_timeout: float = 5, read_timeout: float = 30,
+                 analysis_workers: int = 4, snapshot_store: Optional[ProjectSnapshotStore] = None,
+                 offline: bool = False, task_memo_size: int = 0, task_memo_min_rows: int = 5000,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 scheduler: Optional[UpstreamScheduler] = None, base_url: Optional[str] = None):
+        """
+        Khởi tạo async WeWork client
+
+        Args:
+            access_token (str): Access token để truy cập WeWork API
+            project_cache_ttl (float): TTL (giây) của cache danh sách projects, <= 0 để tắt
+            pool_maxsize (int): Số kết nối tối đa tới mỗi host
+            connect_timeout (float): Timeout (giây) khi mở kết nối
+            read_timeout (float): Timeout (giây) khi chờ response
+            analysis_workers (int): Số worker thread phân tích tasks cho các job nhiều project
+            snapshot_store (ProjectSnapshotStore): Nơi lưu snapshot dữ liệu xuống đĩa (None để tắt)
+            offline (bool): Chỉ đọc từ snapshot store, không gọi WeWork API
+            task_memo_size (int): Số dòng task đã parse được nhớ lại giữa các lần phân tích, 0 để tắt
+            task_memo_min_rows (int): Số task tối thiểu của một lần parse để dùng memo
+            retry_policy (RetryPolicy): Backoff/deadline khi thử lại request (mặc định RetryPolicy())
+            circuit_breaker (CircuitBreaker): Breaker cho upstream (mặc định CircuitBreaker())
+            scheduler (UpstreamScheduler): Giới hạn tốc độ/số request upstream đồng thời, có thể
+                dùng chung giữa nhiều client (mặc định chỉ giới hạn theo pool_maxsize)
+            base_url (str): URL gốc của WeWork API (mặc định BASE_URL), vd stub server khi benchmark
+        """
+        super().__init__(
+            access_token, project_cache_ttl, pool_maxsize, connect_timeout, read_timeout,
+            snapshot_store, offline, task_memo_size, task_memo_min_rows,
+            retry_policy, circuit_breaker, scheduler, base_url,
+        )
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._background_tasks: Set[asyncio.Task] = set()
+        self.single_flight = AsyncSingleFlight()
+        self._analysis_executor = ThreadPoolExecutor(
+            max_workers=max(1, analysis_workers), thread_name_prefix="wework-analysis"
+        )
+
+    def _get_http(self) -> httpx.AsyncClient:
+        """
+        Lấy httpx.AsyncClient dùng chung
+
+        Client được tạo lazy trong event loop đang chạy. Kết nối của httpx gắn
+        với loop đó và chỉ đóng được (aclose) trên chính loop đó, nên client
+        chỉ dùng trong một loop; loop khác cần tạo client riêng.
+        """
+        loop = asyncio.get_running_loop()
+        if self._http is not None and self._http_loop is not loop:
+            raise RuntimeError(
+                "AsyncWeWorkClient is bound to the event loop it was first used on"
+            )
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(
+                    max_connections=self.pool_maxsize,
+                    max_keepalive_connections=self.pool_maxsize,
+                ),
+                headers={
+                    'Content-Type': 'application/x-www-form-urlencoded',
+                    'Accept-Encoding': 'gzip, deflate',
+                },
+            )
+            self._http_loop = loop
+        return self._http
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Thống kê connection pool của httpx client"""
+        connections = []
+        if self._http is not None:
+            pool = getattr(self._http._transport, '_pool', None)
+            connections = list(getattr(pool, 'connections', []))
+        return {
+            'pool_maxsize': self.pool_maxsize,
+            'connect_timeout': self.timeout[0],
+            'read_timeout': self.timeout[1],
+            'connections': len(connections),
+            'idle_connections': sum(1 for conn in connections if conn.is_idle()),
+            'single_flight': self.single_flight.stats(),
+        }
+
+    async def aclose(self) -> None:
+        """Đóng httpx client và giải phóng các kết nối"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        self._analysis_executor.shutdown(wait=False)
+
+    async def _fetch_data_with_retry(self, url: str, payload: Dict) -> Optional[Dict]:
+        """
+        Gửi request với retry logic
+
+        Các coroutine cùng gửi một request (cùng URL, payload và lane ưu
+        tiên) trong lúc request đó đang chạy sẽ await chung một lần gọi.
+        """
+        return await self.single_flight.do(
+            self._flight_key(url, payload), lambda: self._post_with_retry(url, payload)
+        )
+
+    async def _post_with_retry(self, url: str, payload: Dict) -> Optional[Dict]:
+        """Gửi request tới WeWork theo retry_policy (xem WeWorkClient._post_with_retry)"""
+        call = self._upstream_call(url)
+        for attempt in call.attempts():
+            if not call.allowed():
+                return None
+            if not await self.scheduler.acquire_async(timeout=call.remaining()):
+                call.no_slot()
+                return None
+            try:
+                connect_timeout, read_timeout = call.begin(*self.timeout)
+                try:
+                    response = await self._get_http().post(
+                        url, data=payload, timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+                    )
+                except httpx.HTTPError as e:
+                    call.request_failed(str(e) or type(e).__name__)
+                else:
+                    if call.response_received(response.status_code, response.reason_phrase,
+                                              response.headers.get('Retry-After')):
+                        try:
+                            response.raise_for_status()
+                            return response.json()
+                        except (httpx.HTTPError, ValueError) as e:
+                            print(f"Error fetching data: {str(e)}")
+                            return None
+            finally:
+                self.scheduler.release()
+
+            delay = call.retry_delay(attempt)
+            if delay is None:
+                return None
+            await asyncio.sleep(delay)
+        return None
+
+    async def _download_projects(self) -> Optional[List[Dict]]:
+        """
+        Tải danh sách projects từ WeWork, None nếu request lỗi
+
+        Khi có snapshot store: lưu danh sách vừa tải, và dùng danh sách đã lưu
+        nếu đang offline hoặc WeWork không phản hồi.
+        """
+        store = self.snapshot_store
+        if self.offline:
+            return await asyncio.to_thread(store.get_project_list) if store else None
+        data = await self._fetch_data_with_retry(*self._projects_request())
+        if not data:
+            return await asyncio.to_thread(store.get_project_list) if store else None
+        projects = data.get('projects', [])
+        if store:
+            await asyncio.to_thread(store.put_project_list, projects)
+        return projects
+
+    async def _refresh_projects(self) -> None:
+        """Refresh cache danh sách projects (chạy như background task)"""
+        try:
+            with upstream_priority(PRIORITY_BACKGROUND):
+                projects = await self._download_projects()
+        except Exception as e:
+            print(f"Error refreshing projects: {str(e)}")
+            projects = None
+        self._projects_refreshed(projects)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        """Chạy coroutine ở background và giữ tham chiếu tới task"""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def fetch_projects(self, force_refresh: bool = False) -> List[Dict]:
+        """
+        Lấy danh sách tất cả projects (có cache TTL)
+
+        Args:
+            force_refresh (bool): Bỏ qua cache và tải lại từ WeWork
+        """
+        projects, needs_refresh = self._cached_projects(force_refresh)
+        if projects is not None:
+            if needs_refresh:
+                self._spawn(self._refresh_projects())
+            return projects
+        return self._projects_downloaded(await self._download_projects())
+
+    async def _download_project_details(self, project_id: str) -> Optional[Dict]:
+        """Tải chi tiết project từ WeWork"""
+        return await self._fetch_data_with_retry(*self._project_details_request(project_id))
+
+    async def _refresh_project_snapshot(self, project_id: str) -> None:
+        """Tải lại snapshot của project (chạy như background task)"""
+        try:
+            with upstream_priority(PRIORITY_BACKGROUND):
+                data = await self._download_project_details(project_id)
+            if data is not None:
+                await asyncio.to_thread(self.snapshot_store.put, project_id, data)
+        except Exception as e:
+            print(f"Error refreshing project {project_id}: {str(e)}")
+        finally:
+            self.snapshot_store.end_refresh(project_id)
+
+    async def _load_project_details(self, project_id: str) -> Tuple[Optional[Dict], Optional[float]]:
+        """Như _read_project_details, ghi nhận project được dùng nếu lấy được dữ liệu"""
+        payload, fetched_at = await self._read_project_details(project_id)
+        self._project_loaded(project_id, payload)
+        return payload, fetched_at
+
+    async def _read_project_details(self, project_id: str) -> Tuple[Optional[Dict], Optional[float]]:
+        """
+        Lấy chi tiết project, ưu tiên snapshot store (xem WeWorkClient._read_project_details)
+
+        Returns:
+            (payload, fetched_at): fetched_at là phiên bản snapshot, None nếu không dùng store
+        """
+        store = self.snapshot_store
+        if store is None:
+            return await self._download_project_details(project_id), None
+
+        snapshot, state = await asyncio.to_thread(store.lookup, project_id)
+        plan, refresh = self._plan_project_read(project_id, state)
+        if refresh:
+            self._spawn(self._refresh_project_snapshot(project_id))
+        if plan != READ_UPSTREAM:
+            return self._snapshot_details(snapshot)
+
+        data = await self._download_project_details(project_id)
+        if data is None:
+            return self._snapshot_details(snapshot)
+        return data, await asyncio.to_thread(store.put, project_id, data)
+
+    async def fetch_project_details(self, project_id: str) -> Optional[Dict]:
+        """Lấy chi tiết của một project"""
+        return (await self._load_project_details(project_id))[0]
+
+    async def search_projects(self, search_text: str, limit: int = 10) -> List[Dict]:
+        """
+        Tìm kiếm projects theo tên
+        """
+        projects = await self.fetch_projects()
+        if not projects:
+            return []
+        return await asyncio.to_thread(self.rank_projects, projects, search_text, limit)
+
+    async def get_project_analysis(self, project_id: str, fields: Optional[List[str]] = None) -> 'pd.DataFrame':
+        """
+        Lấy và phân tích dữ liệu project
+        """
+        project_data, fetched_at = await self._load_project_details(project_id)
+
+        if not project_data:
+            return self._analysis_error(project_id)
+        if fetched_at is not None:
+            return await asyncio.to_thread(
+                self.snapshot_store.analyze_tasks,
+                self.task_analyzer, project_id, project_data, fetched_at, fields
+            )
+        return await asyncio.to_thread(self.task_analyzer.analyze_tasks, project_data, fields)
+
+    async def get_project_statistics(self, project_id: str) -> Dict[str, Any]:
+        """
+        Lấy thống kê tasks của project (không dựng DataFrame)
+        """
+        project_data = await self.fetch_project_details(project_id)
+        return await asyncio.to_thread(self.task_analyzer.compute_statistics, project_data or {})
+
+    async def analyze_projects(self, project_ids: List[str], max_concurrency: int = 8) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Phân tích đồng thời nhiều projects
+
+        Tối đa max_concurrency request get.full chạy cùng lúc; phần phân tích
+        tasks chạy trên worker pool riêng của client.
+
+        Args:
+            project_ids (List[str]): Danh sách ID dự án
+            max_concurrency (int): Số request get.full được gửi đồng thời
+
+        Returns:
+            Dict project_id -> tóm tắt tasks (None nếu không tải được project)
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        loop = asyncio.get_running_loop()
+
+        async def analyze_one(project_id: str) -> Optional[Dict[str, Any]]:
+            # Job nhiều project nhường upstream cho các lời gọi tương tác
+            async with semaphore:
+                with upstream_priority(PRIORITY_BULK):
+                    project_data = await self.fetch_project_details(project_id)
+            if not project_data:
+                return None
+            return await loop.run_in_executor(
+                self._analysis_executor, self.task_analyzer.analyze_and_summarize, project_data
+            )
+
+        summaries = await asyncio.gather(*(analyze_one(project_id) for project_id in project_ids))
+        return dict(zip(project_ids, summaries))
+
+    async def get_project_info(self, project_id: str) -> Optional[Dict]:
+        """Lấy thông tin cơ bản của project"""
+        return self._find_project(await self.fetch_projects(), project_id)
@@ -0,0 +1,305 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from data.lazy_imports import module_available, pd
+from data.upstream_scheduler import PRIORITY_BULK, upstream_priority
+
+# pyarrow chỉ được import khi có job parquet/arrow
+PYARROW_AVAILABLE = module_available('pyarrow')
+
+EXPORT_FORMATS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+
+def available_formats() -> List[str]:
+    """Các định dạng export dùng được (parquet/arrow cần pyarrow)"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt == 'csv' or PYARROW_AVAILABLE]
+
+
+def sanitize_filename(name: str, max_length: int = 80) -> str:
+    """
+    Tên file an toàn từ tên project
+
+    Giữ chữ (kể cả tiếng Việt có dấu), số, '-', '.', '_'; bỏ dấu phân cách
+    đường dẫn và ký tự điều khiển, gộp khoảng trắng thành '_'.
+    """
+    name = unicodedata.normalize('NFC', str(name or ''))
+    name = re.sub(r'[^\w\-. ]+', '_', name)
+    name = re.sub(r'[\s_]+', '_', name).strip('._- ')
+    return name[:max_length].rstrip('._- ') or 'project'
+
+
+class ExportJob:
+    """Một job export: tiến độ, file kết quả và lỗi (nếu có)"""
+
+    def __init__(self, job_id: str, key: Tuple, project_id: str, project_name: str,
+                 fmt: str, fields: Optional[List[str]]):
+        self.id = job_id
+        self.key = key
+        self.project_id = project_id
+        self.project_name = project_name
+        self.format = fmt
+        self.fields = fields
+        self.state = JOB_QUEUED
+        self.total_rows: Optional[int] = None
+        self.rows_written = 0
+        self.path: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.size_bytes: Optional[int] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.duplicates = 0
+
+    @property
+    def progress(self) -> float:
+        if self.state == JOB_COMPLETED:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return round(self.rows_written / self.total_rows, 4)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'project_id': self.project_id,
+            'project_name': self.project_name,
+            'format': self.format,
+            'fields': self.fields,
+            'state': self.state,
+            'progress': self.progress,
+            'rows_written': self.rows_written,
+            'total_rows': self.total_rows,
+            'filename': self.filename,
+            'size_bytes': self.size_bytes,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'duplicates': self.duplicates,
+        }
+
+
+class ExportJobManager:
+    """
+    Chạy các job export tasks của project ở background
+
+    submit() trả về job ngay; job tải và phân tích project (lane bulk của
+    upstream scheduler) rồi ghi file theo từng khối dòng trong thread, nên
+    không chặn request và tiến độ đọc được qua get(). File được ghi vào
+    '<tên>.part' rồi đổi tên khi xong. Export trùng (cùng project, định dạng
+    và cột) khi job trước còn đang chạy dùng chung job đó. Job đã xong cũ
+    nhất bị xoá (cùng file của nó) khi vượt quá max_history.
+
+    submit() và các job chạy trên event loop; get(), list_jobs() và stats()
+    có thể được gọi từ thread khác (vd. thread của HTTP handler).
+    """
+
+    def __init__(self, client, output_dir: str = 'exports', max_workers: int = 2,
+                 chunk_rows: int = 5000, max_history: int = 200):
+        """
+        Args:
+            client (AsyncWeWorkClient): Client dùng để lấy dữ liệu project
+            output_dir (str): Thư mục chứa file export
+            max_workers (int): Số job được chạy đồng thời, job khác chờ ở trạng thái queued
+            chunk_rows (int): Số dòng mỗi lần ghi (CSV) / mỗi row group (Parquet, Arrow)
+            max_history (int): Số job đã xong (và file export của chúng) được giữ lại
+        """
+        self.client = client
+        self.output_dir = output_dir
+        self.max_workers = max(1, max_workers)
+        self.chunk_rows = max(1, chunk_rows)
+        self.max_history = max_history
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._active: Dict[Tuple, ExportJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def submit(self, project_id: str, project_name: str, fmt: str = 'csv',
+               fields: Optional[List[str]] = None, df: Optional['pd.DataFrame'] = None) -> Tuple[ExportJob, bool]:
+        """
+        Tạo job export (gọi trong event loop đang chạy)
+
+        Args:
+            df: DataFrame đã phân tích sẵn (vd. của analyze_project_tasks) để không tải lại
+
+        Returns:
+            (job, created): created là False nếu dùng chung job đang chạy
+
+        Raises:
+            ValueError: Định dạng không hỗ trợ hoặc thiếu pyarrow
+        """
+        fmt = (fmt or 'csv').lower()
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format '{fmt}' (supported: {', '.join(EXPORT_FORMATS)})")
+        if fmt != 'csv' and not PYARROW_AVAILABLE:
+            raise ValueError(f"Export format '{fmt}' requires pyarrow (pip install pyarrow)")
+
+        project_id = str(project_id)
+        key = (project_id, fmt, tuple(fields) if fields is not None else None)
+        job = self._active.get(key)
+        if job is not None:
+            job.duplicates += 1
+            return job, False
+
+        job = ExportJob(uuid.uuid4().hex, key, project_id, project_name, fmt, fields)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._active[key] = job
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        task = asyncio.get_running_loop().create_task(self._run(job, df))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        self._prune()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(str(job_id))
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Các job, mới nhất trước"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in reversed(jobs)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        states: Dict[str, int] = {}
+        for job in jobs:
+            states[job.state] = states.get(job.state, 0) + 1
+        return {'jobs': states, 'output_dir': os.path.abspath(self.output_dir), 'formats': available_formats()}
+
+    def _prune(self) -> None:
+        """Xoá các job đã xong cũ nhất (và file của chúng) khi vượt quá max_history"""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.state not in ACTIVE_STATES]
+            pruned = [self._jobs.pop(job_id) for job_id in finished[:max(0, len(finished) - self.max_history)]]
+        for job in pruned:
+            if job.path is None:
+                continue
+            try:
+                os.remove(job.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing export file {job.path}: {str(e)}")
+
+    async def _run(self, job: ExportJob, df: Optional['pd.DataFrame']) -> None:
+        try:
+            async with self._semaphore:
+                job.state = JOB_RUNNING
+                job.started_at = time.time()
+                if df is None:
+                    with upstream_priority(PRIORITY_BULK):
+                        df = await self.client.get_project_analysis(job.project_id, job.fields)
+                    # DataFrame rỗng do WeWork lỗi / breaker mở: không ghi file rỗng như thể đã xong
+                    if df.empty and df.attrs.get('error'):
+                        raise RuntimeError(df.attrs['error'])
+                if job.fields is not None:
+                    df = df[[column for column in df.columns if column in job.fields]]
+                job.total_rows = len(df)
+                await asyncio.to_thread(self._write, job, df)
+                job.state = JOB_COMPLETED
+        except Exception as e:
+            print(f"Error exporting project {job.project_id}: {str(e)}")
+            job.error = str(e)
+            job.state = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            self._active.pop(job.key, None)
+
+    def _write(self, job: ExportJob, df: 'pd.DataFrame') -> None:
+        """Ghi df ra file theo từng khối chunk_rows dòng (chạy trong thread)"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        filename = (f"{sanitize_filename(job.project_name)}_{sanitize_filename(job.project_id, 40)}"
+                    f"_{job.id[:8]}_tasks_analysis{EXPORT_FORMATS[job.format]}")
+        path = os.path.join(self.output_dir, filename)
+        tmp_path = path + '.part'
+        writers: Dict[str, Callable[[str, 'pd.DataFrame', ExportJob], None]] = {
+            'csv': self._write_csv,
+            'parquet': self._write_parquet,
+            'arrow': self._write_arrow,
+        }
+        try:
+            writers[job.format](tmp_path, df, job)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        job.path = path
+        job.filename = filename
+        job.size_bytes = os.path.getsize(path)
+
+    def _chunks(self, df: 'pd.DataFrame'):
+        for start in range(0, len(df), self.chunk_rows):
+            yield df.iloc[start:start + self.chunk_rows]
+
+    def _write_csv(self, path: str, df: 'pd.DataFrame', job: ExportJob) -> None:
+        """
+        Ghi CSV theo từng khối chunk_rows dòng
+
+        df đã nằm trọn trong bộ nhớ (kết quả phân tích cả project); chia khối
+        chỉ giới hạn buffer của to_csv và cập nhật tiến độ rows_written, không
+        làm giảm bộ nhớ đỉnh của job.
+        """
+        # utf-8-sig như bản export cũ để Excel đọc đúng tiếng Việt
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            if df.empty:
+                df.to_csv(f, index=False)
+                return
+            for i, chunk in enumerate(self._chunks(df)):
+                chunk.to_csv(f, index=False, header=(i == 0))
+                job.rows_written += len(chunk)
+
+    @staticmethod
+    def _arrow_schema(df: 'pd.DataFrame'):
+        import pyarrow as pa
+        # Suy kiểu từ toàn bộ DataFrame để mọi khối cùng schema; cột toàn None được ghi là chuỗi
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        return pa.schema([
+            pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+            for field in schema
+        ])
+
+    def _iter_batches(self, df: 'pd.DataFrame', schema, job: ExportJob):
+        import pyarrow as pa
+        for chunk in self._chunks(df):
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            yield table
+            job.rows_written += len(chunk)
+
+    def _write_parquet(self, path: str, df: 'pd.DataFrame', job: ExportJob) -> None:
+        import pyarrow.parquet as pq
+        schema = self._arrow_schema(df)
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            for table in self._iter_batches(df, schema, job):
+                writer.write_table(table)
+
+    def _write_arrow(self, path: str, df: 'pd.DataFrame', job: ExportJob) -> None:
+        import pyarrow as pa
+        schema = self._arrow_schema(df)
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+            for table in self._iter_batches(df, schema, job):
+                writer.write_table(table)
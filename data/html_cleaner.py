@@ -0,0 +1,250 @@
+import re
+from functools import lru_cache
+from html.entities import html5
+from html.parser import HTMLParser
+
+
+# Các thẻ rỗng (void) theo HTMLTreeBuilder của BeautifulSoup
+_VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen',
+    'link', 'menuitem', 'meta', 'param', 'source', 'track', 'wbr',
+    'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+})
+
+# Thẻ có nội dung raw text; cleaner nhanh không mô phỏng các thẻ này
+_RAW_TEXT_TAGS = frozenset({
+    'script', 'style', 'textarea', 'title', 'xmp', 'iframe', 'noembed', 'noframes',
+    'noscript', 'plaintext',
+})
+
+# Bảng entity giống EntitySubstitution.HTML_ENTITY_TO_CHARACTER của BeautifulSoup
+_ENTITY_TO_CHARACTER = {}
+for _name, _character in sorted(html5.items()):
+    _ENTITY_TO_CHARACTER.setdefault(_name[:-1] if _name.endswith(';') else _name, _character)
+
+_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+_TAG_RE = re.compile('<[^<]+?>')
+
+# Tokenizer cho HTML "đơn giản": thẻ mở/đóng đúng chuẩn và entity có dấu ';'.
+# Với các dạng này html.parser cho ra đúng chuỗi sự kiện tương ứng.
+_SIMPLE_TOKEN_RE = re.compile(
+    r'<([a-zA-Z][a-zA-Z0-9]*)'
+    r'((?:\s+[a-zA-Z_:][-a-zA-Z0-9_:.]*(?:\s*=\s*(?:"[^"<>]*"|\'[^\'<>]*\'|[^\s"\'=<>`]+))?)*)'
+    r'\s*(/?)>'
+    r'|</([a-zA-Z][a-zA-Z0-9]*)\s*>'
+    r'|&(#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);'
+)
+_ATTR_NAME_RE = re.compile(r'\s+([^\s=]+)(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s"\'=<>`]+))?')
+
+
+def clean_html_reference(content) -> str:
+    """
+    Bản cài đặt gốc bằng BeautifulSoup
+
+    Dùng làm chuẩn đối chiếu và làm fallback cho những cấu trúc HTML mà
+    cleaner nhanh không mô phỏng (comment, script/style, ...).
+    """
+    if not isinstance(content, str):
+        return ""
+
+    # Use BeautifulSoup to remove all HTML/CSS styling
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # Remove all style attributes
+    for tag in soup.find_all(style=True):
+        del tag['style']
+
+    # Convert specific HTML elements to plain text
+    text = str(soup)
+    replacements = {
+        '<p>': '', '</p>': '\n',
+        '<ul>': '', '</ul>': '',
+        '<li>': '- ', '</li>': '\n',
+        '<br>': '\n', '<br/>': '\n',
+        '<ol>': '', '</ol>': '',
+        '<span>': '', '</span>': '',
+        '<strong>': '', '</strong>': '',
+        '&nbsp;': ' '
+    }
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+
+    # Remove any remaining HTML tags
+    text = _TAG_RE.sub('', text)
+
+    # Clean up extra whitespace
+    text = ' '.join(text.split())
+    return text.strip()
+
+
+class _Unsupported(Exception):
+    """Nội dung có cấu trúc mà cleaner nhanh không mô phỏng"""
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Chuyển HTML thành text trong một lần duyệt sự kiện của html.parser
+
+    Mô phỏng cây mà BeautifulSoup dựng (stack thẻ mở, thẻ void, đóng ngầm ở
+    cuối tài liệu) để cho ra cùng kết quả với clean_html_reference mà không
+    phải dựng cây rồi serialize lại.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.pieces = []
+        self._stack = []
+        self._already_closed = []
+
+    def handle_starttag(self, tag, attrs, self_closing=False):
+        if tag in _RAW_TEXT_TAGS or '<' in tag:
+            raise _Unsupported(tag)
+        has_attrs = False
+        for name, _ in attrs:
+            if '<' in name:
+                raise _Unsupported(name)
+            if name != 'style':
+                has_attrs = True
+
+        if tag == 'li' and not has_attrs:
+            self.pieces.append('- ')
+        elif tag == 'br' and not has_attrs:
+            self.pieces.append('\n')
+
+        if tag in _VOID_TAGS and not self_closing:
+            self._already_closed.append(tag)
+        else:
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, self_closing=True)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._already_closed:
+            self._already_closed.remove(tag)
+            return
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i] == tag:
+                for closed in reversed(self._stack[i:]):
+                    self._close(closed)
+                del self._stack[i:]
+                return
+
+    def _close(self, tag):
+        if tag == 'p' or tag == 'li':
+            self.pieces.append('\n')
+
+    def handle_data(self, data):
+        self.pieces.append(data.translate(_TEXT_ESCAPES))
+
+    def handle_entityref(self, name):
+        character = _ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else '&' + name)
+
+    def handle_charref(self, name):
+        if name[:1] in ('x', 'X'):
+            codepoint = int(name.lstrip('xX'), 16)
+        else:
+            codepoint = int(name)
+        data = None
+        if codepoint < 256:
+            try:
+                data = bytearray([codepoint]).decode('windows-1252')
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(codepoint)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or '\N{REPLACEMENT CHARACTER}')
+
+    def handle_comment(self, data):
+        raise _Unsupported('comment')
+
+    def handle_decl(self, decl):
+        raise _Unsupported('decl')
+
+    def unknown_decl(self, data):
+        raise _Unsupported('decl')
+
+    def handle_pi(self, data):
+        raise _Unsupported('pi')
+
+    def feed_simple(self, content: str) -> bool:
+        """
+        Duyệt nội dung bằng tokenizer regex đã biên dịch
+
+        Returns:
+            False nếu nội dung có cấu trúc ngoài dạng "đơn giản" (khi đó cần
+            parse lại bằng html.parser với một extractor mới)
+        """
+        position = 0
+        for match in _SIMPLE_TOKEN_RE.finditer(content):
+            start = match.start()
+            if start > position:
+                text = content[position:start]
+                if '<' in text or '&' in text:
+                    return False
+                self.handle_data(text)
+            position = match.end()
+
+            tag, attrs, self_closing, end_tag, ref = match.groups()
+            if tag is not None:
+                tag = tag.lower()
+                attr_list = [(name.lower(), None) for name in _ATTR_NAME_RE.findall(attrs)] if attrs else []
+                if self_closing:
+                    self.handle_startendtag(tag, attr_list)
+                else:
+                    self.handle_starttag(tag, attr_list)
+            elif end_tag is not None:
+                self.handle_endtag(end_tag.lower())
+            elif ref[0] == '#':
+                self.handle_charref(ref[1:])
+            else:
+                self.handle_entityref(ref)
+
+        text = content[position:]
+        if '<' in text or '&' in text:
+            return False
+        if text:
+            self.handle_data(text)
+        return True
+
+    def text(self) -> str:
+        self.close()
+        for tag in reversed(self._stack):
+            self._close(tag)
+        return ''.join(self.pieces)
+
+
+@lru_cache(maxsize=4096)
+def _clean_markup(content: str) -> str:
+    """Làm sạch một chuỗi HTML (có memoize vì mô tả task hay lặp lại)"""
+    try:
+        parser = _TextExtractor()
+        if not parser.feed_simple(content):
+            parser = _TextExtractor()
+            parser.feed(content)
+        text = parser.text()
+    except _Unsupported:
+        return clean_html_reference(content)
+    return ' '.join(text.split())
+
+
+def clean_html(content) -> str:
+    """
+    Loại bỏ HTML tags và định dạng nội dung
+
+    Cho ra cùng kết quả với clean_html_reference nhưng không dựng cây
+    BeautifulSoup; nội dung không có ký tự đặc biệt của HTML thì bỏ qua
+    bước parse.
+    """
+    if not isinstance(content, str):
+        return ""
+    # BeautifulSoup escape cả '>' trong text nên cũng phải kiểm tra ký tự này
+    if '<' not in content and '&' not in content and '>' not in content:
+        return ' '.join(content.split())
+    return _clean_markup(content)
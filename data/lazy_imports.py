@@ -0,0 +1,76 @@
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """
+    Module chỉ được import ở lần truy cập thuộc tính đầu tiên
+
+    pandas, numpy, scikit-learn, BeautifulSoup mất từ vài trăm ms tới vài
+    giây để import; MCP server qua stdio được khởi động lại cho mỗi phiên
+    nên chỉ nạp chúng khi tool đầu tiên thật sự cần tới.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            with self.__dict__['_lock']:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self.__dict__['_name'])
+                    self.__dict__['_module'] = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._load(), attr, value)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<LazyModule '{self.__dict__['_name']}' ({state})>"
+
+
+def module_available(name: str) -> bool:
+    """Module có cài đặt hay không (tìm spec, không import)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+pd = LazyModule('pandas')
+np = LazyModule('numpy')
+
+_tfidf_lock = threading.Lock()
+_tfidf_vectorizer: Optional[type] = None
+_tfidf_failed = False
+
+
+def load_tfidf_vectorizer() -> Optional[type]:
+    """TfidfVectorizer của sklearn (import ở lần gọi đầu), None nếu không dùng được"""
+    global _tfidf_vectorizer, _tfidf_failed
+    if _tfidf_vectorizer is None and not _tfidf_failed:
+        with _tfidf_lock:
+            if _tfidf_vectorizer is None and not _tfidf_failed:
+                try:
+                    from sklearn.feature_extraction.text import TfidfVectorizer
+                    _tfidf_vectorizer = TfidfVectorizer
+                except ImportError as e:
+                    print(f"Không import được sklearn, dùng string matching: {e}")
+                    _tfidf_failed = True
+    return _tfidf_vectorizer
+
@@ -0,0 +1,339 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from data.metrics import UPSTREAM_LATENCY
+from data.snapshot_store import SNAPSHOT_FRESH, SNAPSHOT_STALE
+
+# Status HTTP được coi là lỗi tạm thời của upstream và đáng để thử lại
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+# Cách đọc chi tiết project khi có snapshot store (xem plan_snapshot_read)
+READ_SNAPSHOT = 'snapshot'
+READ_SNAPSHOT_AND_REFRESH = 'snapshot_and_refresh'
+READ_UPSTREAM = 'upstream'
+READ_UNAVAILABLE = 'unavailable'
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Đọc header Retry-After (số giây hoặc HTTP-date)
+
+    Returns:
+        Số giây cần chờ (>= 0), None nếu header không có hoặc không hợp lệ
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """
+    Chính sách thử lại request tới WeWork
+
+    Backoff lũy thừa với full jitter (chờ ngẫu nhiên trong [0, base * 2^n],
+    tối đa max_delay), tôn trọng Retry-After của upstream và không vượt quá
+    deadline tổng của một lần gọi (tính cả các lần thử và thời gian chờ).
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 8, deadline: float = 30):
+        """
+        Args:
+            max_attempts (int): Số lần gửi request tối đa (tính cả lần đầu)
+            base_delay (float): Thời gian chờ cơ sở (giây) trước lần thử lại đầu tiên
+            max_delay (float): Thời gian chờ tối đa (giây) giữa hai lần thử
+            deadline (float): Tổng thời gian (giây) tối đa cho một lần gọi, <= 0 để bỏ giới hạn
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = max(0.0, base_delay)
+        self.max_delay = max(self.base_delay, max_delay)
+        self.deadline = deadline
+
+    @staticmethod
+    def is_retryable_status(status: int) -> bool:
+        return status in RETRYABLE_STATUSES
+
+    def deadline_at(self) -> Optional[float]:
+        """Mốc time.monotonic() mà lần gọi phải kết thúc, None nếu không giới hạn"""
+        return time.monotonic() + self.deadline if self.deadline > 0 else None
+
+    @staticmethod
+    def remaining(deadline_at: Optional[float]) -> Optional[float]:
+        """Số giây còn lại tới deadline, None nếu không giới hạn"""
+        return None if deadline_at is None else deadline_at - time.monotonic()
+
+    def backoff(self, attempt: int) -> float:
+        """Thời gian chờ (full jitter) sau lần thử thứ attempt (đếm từ 0)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def next_delay(self, attempt: int, deadline_at: Optional[float],
+                   retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Thời gian chờ trước lần thử tiếp theo
+
+        Returns:
+            Số giây cần chờ, None nếu không được thử lại (hết số lần thử hoặc
+            thời gian chờ sẽ vượt quá deadline). Retry-After được tôn trọng
+            nếu còn vừa deadline; khi không có deadline thì chờ tối đa max_delay.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt) if retry_after is None else retry_after
+        remaining = self.remaining(deadline_at)
+        if remaining is None:
+            return min(delay, self.max_delay)
+        if delay >= remaining:
+            return None
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_attempts': self.max_attempts,
+            'base_delay': self.base_delay,
+            'max_delay': self.max_delay,
+            'deadline': self.deadline,
+        }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker cho upstream WeWork
+
+    Sau failure_threshold lỗi liên tiếp, breaker chuyển sang open và từ chối
+    ngay mọi request trong reset_timeout giây (caller dùng dữ liệu cache nếu
+    có). Hết thời gian đó breaker chuyển sang half_open và cho một request
+    thăm dò đi qua: thành công thì đóng lại, lỗi thì mở lại. An toàn khi dùng
+    chung giữa nhiều thread và từ event loop (không có thao tác chặn).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        Args:
+            failure_threshold (int): Số lỗi liên tiếp để mở breaker, <= 0 để tắt breaker
+            reset_timeout (float): Thời gian (giây) breaker giữ trạng thái open
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == CIRCUIT_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = CIRCUIT_HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """True nếu request được phép gửi tới upstream"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            state = self._current_state()
+            if state == CIRCUIT_CLOSED:
+                return True
+            if state == CIRCUIT_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def release_probe(self) -> None:
+        """Request đã qua allow() nhưng không được gửi: trả lại lượt thăm dò nếu đang half_open"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._current_state() == CIRCUIT_HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._state = CIRCUIT_CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == CIRCUIT_HALF_OPEN or (state == CIRCUIT_CLOSED and self._failures >= self.failure_threshold):
+                self._state = CIRCUIT_OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+                self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Trạng thái breaker (hiển thị trên /health)"""
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == CIRCUIT_OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 2)
+            return {
+                'enabled': self.enabled,
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_in': retry_in,
+                'opened': self.opened,
+                'rejected': self.rejected,
+            }
+
+
+class UpstreamCall:
+    """
+    Các quyết định của một lần gọi upstream có retry
+
+    Dùng chung cho WeWorkClient và AsyncWeWorkClient: client chỉ làm phần
+    I/O (chờ slot của scheduler, gửi request, đọc body, sleep giữa các lần
+    thử); việc cắt timeout theo deadline, phân loại response, cập nhật
+    circuit breaker, ghi latency và quyết định thử lại hay dừng nằm ở đây.
+
+    Mỗi lần thử: allowed() -> chờ slot (no_slot() nếu hết hạn) -> begin()
+    -> request_failed() hoặc response_received() -> retry_delay().
+    """
+
+    def __init__(self, policy: RetryPolicy, breaker: CircuitBreaker, url: str, endpoint: str):
+        self.policy = policy
+        self.breaker = breaker
+        self.url = url
+        self.endpoint = endpoint
+        self.deadline_at = policy.deadline_at()
+        self.error: Optional[str] = None
+        self._retry_after: Optional[float] = None
+        self._started = 0.0
+
+    def attempts(self) -> range:
+        return range(self.policy.max_attempts)
+
+    def remaining(self) -> Optional[float]:
+        """Số giây còn lại tới deadline (dùng làm timeout khi chờ slot), None nếu không giới hạn"""
+        return self.policy.remaining(self.deadline_at)
+
+    def allowed(self) -> bool:
+        """
+        Hỏi circuit breaker trước khi chờ slot, để request bị từ chối không
+        chiếm token/slot của scheduler
+
+        Returns:
+            False nếu breaker đang mở (không gửi, lần gọi kết thúc)
+        """
+        if not self.breaker.allow():
+            print(f"Error fetching data: WeWork circuit breaker is open ({self.url})")
+            return False
+        return True
+
+    def no_slot(self) -> None:
+        """Không có slot upstream trước deadline: lần gọi kết thúc"""
+        self.breaker.release_probe()
+        print(f"Error fetching data: no upstream slot before the deadline ({self.url})")
+
+    def begin(self, connect_timeout: float, read_timeout: float) -> Tuple[float, float]:
+        """
+        Bắt đầu một lần gửi request (sau allowed() và khi đã có slot)
+
+        Returns:
+            (connect_timeout, read_timeout) đã cắt theo deadline
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            connect_timeout, read_timeout = min(connect_timeout, remaining), min(read_timeout, remaining)
+        self._retry_after = None
+        self._started = time.perf_counter()
+        return connect_timeout, read_timeout
+
+    def request_failed(self, error: str) -> None:
+        """Lỗi kết nối/timeout, không có response"""
+        UPSTREAM_LATENCY.observe(time.perf_counter() - self._started, endpoint=self.endpoint, status='error')
+        self.error = error
+
+    def response_received(self, status_code: int, reason: str, retry_after: Optional[str]) -> bool:
+        """
+        Phân loại response
+
+        Returns:
+            True nếu là kết quả cuối cùng (caller đọc body và trả về), False
+            nếu là lỗi tạm thời (caller gọi retry_delay())
+        """
+        UPSTREAM_LATENCY.observe(time.perf_counter() - self._started, endpoint=self.endpoint, status=str(status_code))
+        if status_code < 400 or not self.policy.is_retryable_status(status_code):
+            # Upstream vẫn phản hồi: lỗi 4xx là lỗi của request, không phải của WeWork
+            self.breaker.record_success()
+            return True
+        self.error = f"{status_code} {reason} for url: {self.url}"
+        self._retry_after = parse_retry_after(retry_after)
+        return False
+
+    def retry_delay(self, attempt: int) -> Optional[float]:
+        """
+        Ghi nhận lần thử lỗi vào breaker
+
+        Returns:
+            Số giây chờ trước lần thử tiếp theo, None nếu dừng (hết lượt thử,
+            vượt deadline hoặc breaker vừa mở)
+        """
+        self.breaker.record_failure()
+        delay = self.policy.next_delay(attempt, self.deadline_at, self._retry_after)
+        # Breaker vừa mở thì dừng luôn, không chờ backoff rồi mới bị từ chối
+        if delay is None or self.breaker.state != CIRCUIT_CLOSED:
+            print(f"Error fetching data: {self.error}")
+            return None
+        return delay
+
+
+def plan_snapshot_read(state: Optional[str], offline: bool) -> str:
+    """
+    Cách đọc chi tiết project khi có snapshot store
+
+    Snapshot còn mới (hoặc đang offline) được dùng thẳng; snapshot stale được
+    dùng ngay và refresh ở background; snapshot quá cũ hoặc chưa có thì tải
+    từ WeWork (READ_UPSTREAM), nếu WeWork lỗi thì vẫn dùng snapshot cũ nếu có.
+
+    Args:
+        state: Trạng thái snapshot từ ProjectSnapshotStore.lookup(), None nếu chưa có
+        offline: Chỉ đọc từ snapshot store
+    """
+    if state is not None:
+        if offline or state == SNAPSHOT_FRESH:
+            return READ_SNAPSHOT
+        if state == SNAPSHOT_STALE:
+            return READ_SNAPSHOT_AND_REFRESH
+    elif offline:
+        return READ_UNAVAILABLE
+    return READ_UPSTREAM
@@ -0,0 +1,178 @@
+import json
+import uuid
+from json.encoder import encode_basestring
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from data.lazy_imports import np, pd
+from data.metrics import SERIALIZE_SECONDS
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class DataFrameRecords:
+    """
+    Danh sách records của một DataFrame, được serialize trực tiếp từ các cột
+
+    Đặt vào payload thay cho df.to_dict(orient='records'): dumps() lấy dữ
+    liệu từ list của từng cột, không qua bước chuyển DataFrame thành records
+    của pandas.
+    """
+
+    def __init__(self, df: 'pd.DataFrame'):
+        self.df = df
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Chuyển thành list dict (cho nơi cần dữ liệu Python thuần), NaN thành None"""
+        keys = [str(name) for name in self.df.columns]
+        columns = [_column_values(self.df[name]) for name in self.df.columns]
+        if not columns:
+            return [{} for _ in range(len(self.df))]
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def _column_values(series: 'pd.Series') -> List[Any]:
+    """
+    Giá trị của một cột dưới dạng list, NaN / NaT (và ±inf của cột số thực)
+    thành None để orjson và json stdlib cùng encode thành null
+    """
+    values = series.tolist()
+    if series.dtype.kind == 'f':
+        missing = ~np.isfinite(series.to_numpy())
+    elif series.dtype.kind in 'iub':
+        return values
+    else:
+        missing = series.isna().to_numpy()
+    if missing.any():
+        values = [None if is_missing else value for value, is_missing in zip(values, missing.tolist())]
+    return values
+
+
+def _stdlib_value(value) -> str:
+    """Encode một giá trị bằng json stdlib (cùng quy tắc json.dumps(..., default=str))"""
+    if type(value) is str:
+        return encode_basestring(value)
+    if value is None:
+        return 'null'
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _stdlib_dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _orjson_dumps(obj) -> bytes:
+    return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+class JSONSerializer:
+    """
+    Serializer JSON cho response của HTTP server và MCP tools
+
+    Dùng orjson nếu được cài đặt, ngược lại dùng json stdlib. Hai backend cho
+    ra cùng dữ liệu JSON (chỉ khác khoảng trắng).
+    """
+
+    def __init__(self, backend: str = 'auto', target: str = 'response'):
+        """
+        Args:
+            backend (str): 'orjson', 'json' hoặc 'auto' (orjson nếu có)
+            target (str): Label của metric wework_serialize_seconds, vd 'response' hoặc 'snapshot'
+        """
+        if backend == 'auto':
+            backend = 'orjson' if ORJSON_AVAILABLE else 'json'
+        if backend == 'orjson' and not ORJSON_AVAILABLE:
+            raise ValueError("orjson is not installed")
+        if backend not in ('orjson', 'json'):
+            raise ValueError(f"Unknown JSON backend: {backend}")
+        self.backend = backend
+        self.target = target
+        self._dumps: Callable[[Any], bytes] = _orjson_dumps if backend == 'orjson' else _stdlib_dumps
+
+    def _encode_column(self, series: 'pd.Series') -> Tuple[bool, List[bytes]]:
+        """
+        Encode các giá trị của một cột thành bytes JSON
+
+        Returns:
+            (quoted, parts): quoted=True nghĩa là cả cột là chuỗi và parts là
+            nội dung từng chuỗi JSON chưa có dấu nháy hai đầu
+        """
+        if self.backend == 'json':
+            return False, [encoded.encode('utf-8') for encoded in map(_stdlib_value, _column_values(series))]
+        
+        # orjson: mỗi cột chỉ gọi orjson một lần nếu được
+        if series.dtype.kind in 'iufb' and len(series):
+            try:
+                encoded = orjson.dumps(np.ascontiguousarray(series.to_numpy()), option=orjson.OPT_SERIALIZE_NUMPY)
+                return False, encoded[1:-1].split(b',')
+            except TypeError:
+                pass
+        if len(series) and pd.api.types.infer_dtype(series, skipna=False) == 'string':
+            # Cột toàn chuỗi: dấu nháy bên trong chuỗi luôn được escape nên
+            # b'","' chỉ xuất hiện ở ranh giới giữa hai phần tử
+            return True, orjson.dumps(series.tolist())[2:-2].split(b'","')
+        return False, [self._dumps(value) for value in _column_values(series)]
+
+    def iter_records(self, df: 'pd.DataFrame', prefix: bytes = b'') -> Iterator[bytes]:
+        """
+        Encode từng dòng của DataFrame thành một object JSON
+
+        Các cột được encode một lượt, rồi mỗi dòng được ghép từ một template
+        chung (bytes % values) nên không dựng dict cho từng dòng.
+
+        Args:
+            prefix: Các cặp key/value JSON (đã encode, không có dấu phẩy cuối)
+                được chèn vào đầu mỗi object, vd b'"type":"task"'
+        """
+        pairs = [prefix.replace(b'%', b'%%')] if prefix else []
+        columns = []
+        for name in df.columns:
+            quoted, parts = self._encode_column(df[name])
+            key = self._dumps(str(name)).replace(b'%', b'%%')
+            pairs.append(key + (b':"%b"' if quoted else b':%b'))
+            columns.append(parts)
+        template = b'{' + b','.join(pairs) + b'}'
+        if not columns:
+            yield from (template for _ in range(len(df)))
+            return
+        for row in zip(*columns):
+            yield template % row
+
+    def encode_records(self, df: 'pd.DataFrame') -> bytes:
+        """Encode DataFrame thành mảng JSON các records"""
+        return b'[' + b','.join(self.iter_records(df)) + b']'
+
+    def dumps(self, obj) -> bytes:
+        """
+        Serialize object thành JSON (UTF-8)
+
+        Các DataFrameRecords là giá trị của dict (kể cả dict lồng nhau) được
+        thay bằng placeholder, sau đó ghép mảng records đã encode từ cột vào
+        đúng vị trí. List không được duyệt để không phải copy các list lớn.
+        """
+        with SERIALIZE_SECONDS.time(backend=self.backend, target=self.target):
+            return self._dumps_with_records(obj)
+
+    def _dumps_with_records(self, obj) -> bytes:
+        fragments: Dict[bytes, bytes] = {}
+
+        def extract(value):
+            if isinstance(value, DataFrameRecords):
+                token = f"__records_{uuid.uuid4().hex}__"
+                fragments[self._dumps(token)] = self.encode_records(value.df)
+                return token
+            if isinstance(value, dict):
+                return {key: extract(item) for key, item in value.items()}
+            return value
+
+        output = self._dumps(extract(obj))
+        for token, fragment in fragments.items():
+            output = output.replace(token, fragment, 1)
+        return output
+
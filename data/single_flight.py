@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+def request_key(url: str, payload: Dict) -> Tuple:
+    """Key của một request upstream: URL và payload (không phụ thuộc thứ tự key)"""
+    return (url, tuple(sorted((str(key), str(value)) for key, value in payload.items())))
+
+
+class _Call:
+    """Một request đang chạy mà các caller khác có thể chờ"""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Gộp các lời gọi trùng key đang chạy đồng thời (cho code dùng thread)
+
+    Thread đầu tiên thực hiện lời gọi; các thread đến sau với cùng key chờ và
+    nhận chung kết quả (hoặc exception) thay vì gửi thêm request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """
+    Gộp các coroutine trùng key đang chạy đồng thời (cho code asyncio)
+
+    Lời gọi đầu tiên chạy thành một task; các caller cùng key await chung task
+    đó qua asyncio.shield, nên một caller bị huỷ không làm huỷ request của
+    các caller còn lại.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        task = self._calls.get(call_key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = loop.create_task(func())
+            self._calls[call_key] = task
+            self.executed += 1
+            task.add_done_callback(lambda done: self._finish(call_key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, call_key: Tuple[int, Hashable], task: asyncio.Task) -> None:
+        if self._calls.get(call_key) is task:
+            del self._calls[call_key]
+        # Đánh dấu exception đã được lấy (trường hợp mọi caller đều đã bị huỷ)
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._calls),
+        }
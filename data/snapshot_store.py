@@ -0,0 +1,267 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from data.lazy_imports import pd
+from data.serialization import ORJSON_AVAILABLE, JSONSerializer
+
+if ORJSON_AVAILABLE:
+    import orjson
+    _loads = orjson.loads
+else:
+    _loads = json.loads
+
+SNAPSHOT_FRESH = 'fresh'
+SNAPSHOT_STALE = 'stale'
+SNAPSHOT_EXPIRED = 'expired'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS project_details (
+    project_id TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS project_tasks (
+    project_id TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    tasks BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS project_list (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    fetched_at REAL NOT NULL,
+    projects BLOB NOT NULL
+);
+"""
+
+
+class ProjectSnapshot:
+    """Payload project/get.full đã lưu và thời điểm tải về"""
+
+    __slots__ = ('project_id', 'payload', 'fetched_at')
+
+    def __init__(self, project_id: str, payload: Dict, fetched_at: float):
+        self.project_id = project_id
+        self.payload = payload
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class ProjectSnapshotStore:
+    """
+    Lưu snapshot dữ liệu WeWork xuống SQLite để dùng lại sau khi restart
+
+    Mỗi project giữ payload get.full gốc, bảng tasks đã phân tích (gắn với
+    đúng phiên bản payload) và thời điểm tải. Danh sách projects cũng được lưu
+    để phục vụ chế độ offline. Dữ liệu được nén zlib; an toàn khi dùng chung
+    giữa nhiều thread.
+    """
+
+    def __init__(self, directory: str, max_age: float = 300, stale_limit: float = 86400):
+        """
+        Args:
+            directory (str): Thư mục chứa file SQLite (tự tạo nếu chưa có)
+            max_age (float): Snapshot trẻ hơn số giây này được dùng thẳng, không gọi WeWork
+            stale_limit (float): Snapshot cũ hơn max_age nhưng trẻ hơn số giây này vẫn
+                được trả ngay và refresh ở background; cũ hơn nữa thì phải tải lại
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, 'wework_snapshots.sqlite3')
+        self.max_age = max_age
+        self.stale_limit = max(stale_limit, max_age)
+        self._serializer = JSONSerializer(target='snapshot')
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _encode(self, value) -> bytes:
+        return zlib.compress(self._serializer.dumps(value), 1)
+
+    @staticmethod
+    def _decode(blob: bytes):
+        return _loads(zlib.decompress(blob))
+
+    def freshness(self, fetched_at: float) -> str:
+        """Phân loại snapshot theo tuổi: fresh, stale hoặc expired"""
+        age = time.time() - fetched_at
+        if age < self.max_age:
+            return SNAPSHOT_FRESH
+        if age < self.stale_limit:
+            return SNAPSHOT_STALE
+        return SNAPSHOT_EXPIRED
+
+    def lookup(self, project_id: str) -> Tuple[Optional[ProjectSnapshot], Optional[str]]:
+        """
+        Lấy snapshot của project kèm trạng thái
+
+        Returns:
+            (snapshot, state): (None, None) nếu chưa có snapshot
+        """
+        snapshot = self.get(project_id)
+        state = None if snapshot is None else self.freshness(snapshot.fetched_at)
+        with self._lock:
+            if state is None:
+                self.misses += 1
+            elif state == SNAPSHOT_FRESH:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+        return snapshot, state
+
+    def fetched_at(self, project_id: str) -> Optional[float]:
+        """Phiên bản (fetched_at) snapshot của project mà không đọc payload, None nếu chưa có"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT fetched_at FROM project_details WHERE project_id = ?', (str(project_id),)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def get(self, project_id: str) -> Optional[ProjectSnapshot]:
+        """Lấy snapshot payload get.full của project"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT fetched_at, payload FROM project_details WHERE project_id = ?',
+                (str(project_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return ProjectSnapshot(str(project_id), self._decode(row[1]), row[0])
+        except (zlib.error, ValueError) as e:
+            print(f"Error reading snapshot {project_id}: {str(e)}")
+            return None
+
+    def put(self, project_id: str, payload: Dict, fetched_at: Optional[float] = None) -> float:
+        """
+        Lưu payload get.full mới của project
+
+        Returns:
+            fetched_at (phiên bản) của snapshot vừa lưu
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        blob = self._encode(payload)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO project_details (project_id, fetched_at, payload) VALUES (?, ?, ?)',
+                (str(project_id), fetched_at, blob)
+            )
+            self._conn.execute('DELETE FROM project_tasks WHERE project_id = ?', (str(project_id),))
+            self.writes += 1
+        return fetched_at
+
+    def get_tasks(self, project_id: str, fetched_at: float) -> 'Optional[pd.DataFrame]':
+        """Bảng tasks đã phân tích của đúng phiên bản payload fetched_at, None nếu chưa có"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT tasks FROM project_tasks WHERE project_id = ? AND fetched_at = ?',
+                (str(project_id), fetched_at)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            table = self._decode(row[0])
+        except (zlib.error, ValueError) as e:
+            print(f"Error reading task table {project_id}: {str(e)}")
+            return None
+        if not table['columns']:
+            return pd.DataFrame()
+        return pd.DataFrame(table['data'], columns=table['columns'])
+
+    def put_tasks(self, project_id: str, fetched_at: float, df: 'pd.DataFrame') -> None:
+        """Lưu bảng tasks đã phân tích cho phiên bản payload fetched_at"""
+        blob = self._encode({'columns': list(df.columns), 'data': df.values.tolist()})
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO project_tasks (project_id, fetched_at, tasks) '
+                'SELECT ?, ?, ? WHERE EXISTS '
+                '(SELECT 1 FROM project_details WHERE project_id = ? AND fetched_at = ?)',
+                (str(project_id), fetched_at, blob, str(project_id), fetched_at)
+            )
+
+    def analyze_tasks(self, analyzer, project_id: str, payload: Dict, fetched_at: float,
+                      fields: Optional[List[str]] = None) -> 'pd.DataFrame':
+        """
+        Phân tích tasks của snapshot, dùng lại bảng tasks đã lưu nếu có
+
+        Args:
+            analyzer: TaskAnalyzer dùng khi chưa có bảng tasks đã lưu
+            fields: Chỉ trả về các cột này; chỉ kết quả đầy đủ (fields=None) mới được lưu
+        """
+        df = self.get_tasks(project_id, fetched_at)
+        if df is not None:
+            if fields is not None:
+                df = df[[column for column in df.columns if column in fields]]
+            df.attrs['reused_rows'] = len(df)
+            return df
+        df = analyzer.analyze_tasks(payload, fields)
+        if fields is None and not df.empty:
+            self.put_tasks(project_id, fetched_at, df)
+        return df
+
+    def get_project_list(self) -> Optional[List[Dict]]:
+        """Danh sách projects đã lưu gần nhất"""
+        with self._lock:
+            row = self._conn.execute('SELECT projects FROM project_list WHERE id = 1').fetchone()
+        if row is None:
+            return None
+        try:
+            return self._decode(row[0])
+        except (zlib.error, ValueError) as e:
+            print(f"Error reading project list snapshot: {str(e)}")
+            return None
+
+    def put_project_list(self, projects: List[Dict]) -> None:
+        """Lưu danh sách projects"""
+        blob = self._encode(projects)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO project_list (id, fetched_at, projects) VALUES (1, ?, ?)',
+                (time.time(), blob)
+            )
+
+    def begin_refresh(self, project_id: str) -> bool:
+        """Đánh dấu project đang được refresh; False nếu đã có refresh khác đang chạy"""
+        with self._lock:
+            if project_id in self._refreshing:
+                return False
+            self._refreshing.add(project_id)
+            return True
+
+    def end_refresh(self, project_id: str) -> None:
+        with self._lock:
+            self._refreshing.discard(project_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê snapshot store"""
+        with self._lock:
+            projects = self._conn.execute('SELECT COUNT(*) FROM project_details').fetchone()[0]
+            refreshing = len(self._refreshing)
+        return {
+            'path': self.path,
+            'projects': projects,
+            'max_age': self.max_age,
+            'stale_limit': self.stale_limit,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'refreshing': refreshing,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
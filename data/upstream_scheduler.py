@@ -0,0 +1,261 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from data.metrics import UPSTREAM_QUEUE_WAIT
+
+# Các lane ưu tiên, số nhỏ được phục vụ trước
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_BULK: 'bulk',
+    PRIORITY_BACKGROUND: 'background',
+}
+
+# Lane của request upstream trong context hiện tại (thread hoặc asyncio task)
+_current_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    'wework_upstream_priority', default=PRIORITY_INTERACTIVE
+)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+@contextmanager
+def upstream_priority(priority: int) -> Iterator[None]:
+    """
+    Đặt lane ưu tiên cho các request upstream gửi trong khối with
+
+    Giá trị gắn với context hiện tại nên các asyncio task tạo bên trong khối
+    (vd asyncio.gather) cũng kế thừa lane này.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class _Waiter:
+    """
+    Một request đang chờ slot; được đánh thức bằng Event (thread) hoặc Future
+    (asyncio) khi được cấp slot hoặc khi cần kiểm tra lại hàng đợi
+    """
+
+    __slots__ = ('priority', 'enqueued_at', 'granted', 'event', 'future', 'loop')
+
+    def __init__(self, priority: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class _LaneStats:
+    __slots__ = ('granted', 'timed_out', 'wait_total', 'wait_max')
+
+    def __init__(self):
+        self.granted = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class UpstreamScheduler:
+    """
+    Giới hạn request tới WeWork: token bucket + số request đồng thời, có lane ưu tiên
+
+    Mỗi request cần một token (bucket nạp lại rate token/giây, chứa tối đa
+    burst token) và một trong max_concurrency slot. Khi phải xếp hàng, lane
+    interactive luôn được cấp trước bulk, bulk trước background; trong cùng
+    lane theo thứ tự đến. Dùng chung được giữa nhiều thread và nhiều event loop
+    (acquire cho code thread, acquire_async cho asyncio).
+    """
+
+    def __init__(self, max_concurrency: int = 8, rate: float = 0, burst: Optional[float] = None):
+        """
+        Args:
+            max_concurrency (int): Số request upstream chạy đồng thời tối đa, <= 0 để không giới hạn
+            rate (float): Số request mỗi giây (token bucket), <= 0 để không giới hạn
+            burst (float): Số token tối đa tích luỹ được (mặc định bằng max(1, rate))
+        """
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._queues: Dict[int, Deque[_Waiter]] = {p: deque() for p in PRIORITY_NAMES}
+        self._active = 0
+        self._lanes: Dict[int, _LaneStats] = {p: _LaneStats() for p in PRIORITY_NAMES}
+
+    def _refill_locked(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _dispatch_locked(self, caller: Optional[_Waiter] = None) -> Optional[float]:
+        """
+        Cấp slot cho các waiter ở đầu hàng đợi (theo thứ tự ưu tiên)
+
+        Khi hết token, waiter đứng đầu hàng (nếu không phải caller) được đánh
+        thức để tự hẹn giờ chờ token tiếp theo.
+
+        Returns:
+            Số giây tới khi có token tiếp theo nếu còn waiter phải chờ token, ngược lại None
+        """
+        now = time.monotonic()
+        self._refill_locked(now)
+        for priority in sorted(self._queues):
+            queue = self._queues[priority]
+            while queue:
+                if 0 < self.max_concurrency <= self._active:
+                    return None
+                if self.rate > 0 and self._tokens < 1:
+                    if queue[0] is not caller:
+                        queue[0].wake()
+                    return (1 - self._tokens) / self.rate
+                waiter = queue.popleft()
+                self._grant_locked(waiter, now)
+                waiter.wake()
+        return None
+
+    def _grant_locked(self, waiter: _Waiter, now: float) -> None:
+        if self.rate > 0:
+            self._tokens -= 1
+        self._active += 1
+        waiter.granted = True
+        lane = self._lanes[waiter.priority]
+        waited = now - waiter.enqueued_at
+        lane.granted += 1
+        lane.wait_total += waited
+        lane.wait_max = max(lane.wait_max, waited)
+        UPSTREAM_QUEUE_WAIT.observe(waited, lane=PRIORITY_NAMES[waiter.priority])
+
+    def _enqueue(self, waiter: _Waiter) -> Optional[float]:
+        with self._lock:
+            self._queues[waiter.priority].append(waiter)
+            return self._dispatch_locked(waiter)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Waiter bỏ cuộc (timeout/huỷ): rút khỏi hàng đợi, hoặc trả slot nếu đã được cấp"""
+        with self._lock:
+            if waiter.granted:
+                self._active -= 1
+            else:
+                self._queues[waiter.priority].remove(waiter)
+                self._lanes[waiter.priority].timed_out += 1
+            self._dispatch_locked()
+
+    @staticmethod
+    def _wait_time(next_token: Optional[float], deadline: Optional[float]) -> Optional[float]:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if next_token is None:
+            return remaining
+        return next_token if remaining is None else min(next_token, remaining)
+
+    def acquire(self, priority: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Chờ một slot (cho code chạy trên thread)
+
+        Args:
+            priority: Lane ưu tiên, mặc định lấy từ context (upstream_priority)
+            timeout: Số giây chờ tối đa, None để chờ đến khi có slot
+
+        Returns:
+            True nếu được cấp slot (phải gọi release() sau khi xong), False nếu hết timeout
+        """
+        waiter = _Waiter(current_priority() if priority is None else priority)
+        deadline = None if timeout is None else waiter.enqueued_at + timeout
+        next_token = self._enqueue(waiter)
+        while True:
+            wait = self._wait_time(next_token, deadline)
+            if wait is not None and wait <= 0:
+                with self._lock:
+                    if waiter.granted:
+                        return True
+                self._abandon(waiter)
+                return False
+            waiter.event.wait(wait)
+            with self._lock:
+                if waiter.granted:
+                    return True
+                waiter.event.clear()
+                next_token = self._dispatch_locked(waiter)
+                if waiter.granted:
+                    return True
+
+    async def acquire_async(self, priority: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Như acquire() nhưng chờ trên event loop đang chạy"""
+        waiter = _Waiter(current_priority() if priority is None else priority, asyncio.get_running_loop())
+        deadline = None if timeout is None else waiter.enqueued_at + timeout
+        try:
+            next_token = self._enqueue(waiter)
+            while True:
+                with self._lock:
+                    if waiter.granted:
+                        return True
+                wait = self._wait_time(next_token, deadline)
+                if wait is not None and wait <= 0:
+                    self._abandon(waiter)
+                    return False
+                await asyncio.wait({waiter.future}, timeout=wait)
+                with self._lock:
+                    if waiter.granted:
+                        return True
+                    if waiter.future.done():
+                        waiter.future = waiter.loop.create_future()
+                    next_token = self._dispatch_locked(waiter)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def release(self) -> None:
+        """Trả slot sau khi request upstream kết thúc"""
+        with self._lock:
+            self._active -= 1
+            self._dispatch_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        """Độ sâu hàng đợi và thời gian chờ theo từng lane"""
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            lanes = {}
+            for priority, name in PRIORITY_NAMES.items():
+                lane = self._lanes[priority]
+                lanes[name] = {
+                    'queued': len(self._queues[priority]),
+                    'granted': lane.granted,
+                    'timed_out': lane.timed_out,
+                    'avg_wait_ms': round(lane.wait_total / lane.granted * 1000, 2) if lane.granted else 0.0,
+                    'max_wait_ms': round(lane.wait_max * 1000, 2),
+                }
+            return {
+                'max_concurrency': self.max_concurrency,
+                'rate': self.rate,
+                'burst': self.burst,
+                'tokens': round(self._tokens, 2) if self.rate > 0 else None,
+                'active': self._active,
+                'queued': sum(len(queue) for queue in self._queues.values()),
+                'lanes': lanes,
+            }
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from data.upstream_scheduler import PRIORITY_BACKGROUND, upstream_priority
+
+WARMUP_DISABLED = 'disabled'
+WARMUP_PENDING = 'pending'
+WARMUP_RUNNING = 'running'
+WARMUP_READY = 'ready'
+
+
+class ProjectWarmup:
+    """
+    Làm nóng cache của AsyncWeWorkClient khi server khởi động và theo chu kỳ
+
+    Mỗi lượt: tải lại project/list, dựng search index, rồi tải và phân tích
+    chi tiết các project được cấu hình cùng các project được dùng gần đây
+    (snapshot store, task memo, connection pool, các thư viện import lazy).
+    Mọi request upstream chạy ở lane background nên không chặn request của
+    người dùng. Server được coi là sẵn sàng sau lượt đầu tiên, kể cả khi
+    lượt đó lỗi (lỗi được ghi trong status()).
+    """
+
+    def __init__(self, client, project_ids: Sequence[str] = (), recent_limit: int = 10,
+                 interval: float = 0, concurrency: int = 4, state_path: Optional[str] = None,
+                 enabled: bool = True):
+        """
+        Args:
+            client (AsyncWeWorkClient): Client cần làm nóng
+            project_ids: ID các project luôn được làm nóng
+            recent_limit (int): Số project dùng gần đây được làm nóng thêm
+            interval (float): Chu kỳ (giây) chạy lại warm-up, <= 0 để chỉ chạy khi khởi động
+            concurrency (int): Số project được tải/phân tích đồng thời
+            state_path (str): File lưu danh sách project dùng gần đây giữa các lần khởi động
+            enabled (bool): False để tắt warm-up (server sẵn sàng ngay)
+        """
+        self.client = client
+        self.project_ids = [str(project_id) for project_id in project_ids if str(project_id)]
+        self.recent_limit = recent_limit
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.state_path = state_path
+        self.enabled = enabled and client is not None
+        self.state = WARMUP_PENDING if self.enabled else WARMUP_DISABLED
+        self.runs = 0
+        self.last_started_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_result: Dict[str, Any] = {}
+        self.last_error: Optional[str] = None
+        self._ready_at: Optional[float] = None
+        self._next_run_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """Có thể nhận traffic: warm-up tắt hoặc đã xong lượt đầu tiên"""
+        return not self.enabled or self._ready_at is not None
+
+    def _load_saved_recent(self) -> List[str]:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return []
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return [str(project_id) for project_id in json.load(f).get('recent_projects', [])]
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Error reading warm-up state {self.state_path}: {str(e)}")
+            return []
+
+    def _save_recent(self, recent: List[str]) -> None:
+        if not self.state_path:
+            return
+        try:
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'recent_projects': recent, 'saved_at': time.time()}, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Error saving warm-up state {self.state_path}: {str(e)}")
+
+    def targets(self) -> List[str]:
+        """Các project sẽ được làm nóng: cấu hình trước, rồi tới dùng gần đây (không trùng)"""
+        recent = self.client.recent_projects.most_recent(self.recent_limit)
+        if not recent and self.runs == 0:
+            recent = self._load_saved_recent()[:max(0, self.recent_limit)]
+        seen = set()
+        targets = []
+        for project_id in self.project_ids + recent:
+            if project_id not in seen:
+                seen.add(project_id)
+                targets.append(project_id)
+        return targets
+
+    async def _warm_project(self, project_id: str, semaphore: asyncio.Semaphore) -> bool:
+        async with semaphore:
+            try:
+                df = await self.client.get_project_analysis(project_id)
+                return not df.empty
+            except Exception as e:
+                print(f"Error warming up project {project_id}: {str(e)}")
+                return False
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Chạy một lượt warm-up, trả về kết quả của lượt đó"""
+        self.state = WARMUP_RUNNING
+        self.last_started_at = time.time()
+        start = time.perf_counter()
+        result: Dict[str, Any] = {'projects_listed': 0, 'search_index': False,
+                                  'projects_warmed': 0, 'projects_failed': 0}
+        error = None
+        try:
+            with upstream_priority(PRIORITY_BACKGROUND):
+                projects = await self.client.fetch_projects(force_refresh=True)
+                result['projects_listed'] = len(projects)
+                if projects:
+                    # Dựng index (và import sklearn) ở thread để không chặn event loop
+                    index = await asyncio.to_thread(self.client.project_cache.search_index_for, projects)
+                    result['search_index'] = index.vectorized
+                else:
+                    error = 'project/list returned no projects'
+
+                targets = self.targets()
+                semaphore = asyncio.Semaphore(self.concurrency)
+                warmed = await asyncio.gather(*(self._warm_project(pid, semaphore) for pid in targets))
+            result['projects_warmed'] = sum(1 for ok in warmed if ok)
+            result['projects_failed'] = len(warmed) - result['projects_warmed']
+            self._save_recent(self.client.recent_projects.most_recent() or targets)
+        except Exception as e:
+            error = str(e)
+            print(f"Error during warm-up: {error}")
+        finally:
+            self.runs += 1
+            self.last_duration = time.perf_counter() - start
+            self.last_result = result
+            self.last_error = error
+            if self._ready_at is None:
+                self._ready_at = time.time()
+            self.state = WARMUP_READY
+        return result
+
+    async def run_forever(self) -> None:
+        """Warm-up khi khởi động rồi lặp lại mỗi interval giây (nếu interval > 0)"""
+        if not self.enabled:
+            return
+        while True:
+            await self.run_once()
+            if self.interval <= 0:
+                self._next_run_at = None
+                return
+            self._next_run_at = time.time() + self.interval
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> Optional[asyncio.Task]:
+        """Chạy run_forever() như task nền trên event loop hiện tại"""
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return self._task
+        self._task = asyncio.get_running_loop().create_task(self.run_forever())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        """Trạng thái cho /health"""
+        return {
+            'enabled': self.enabled,
+            'state': self.state,
+            'ready': self.ready,
+            'runs': self.runs,
+            'interval': self.interval,
+            'configured_projects': len(self.project_ids),
+            'last_started_at': self.last_started_at,
+            'last_duration_seconds': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+            'next_run_in': round(max(0.0, self._next_run_at - time.time()), 1)
+            if self._next_run_at is not None else None,
+        }
@@ -1,23 +1,166 @@
-import requests
-import pandas as pd
 from datetime import datetime
+from functools import lru_cache
+import os
 import time
-import re
-from bs4 import BeautifulSoup
-from collections import defaultdict
-from typing import Dict, List, Optional, Tuple, Any
-
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    import numpy as np
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
+import threading
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from data.html_cleaner import clean_html
+from data.lazy_imports import LazyModule, load_tfidf_vectorizer, module_available, np, pd
+from data.serialization import ORJSON_AVAILABLE
+from data.snapshot_store import ProjectSnapshotStore
+from data.single_flight import SingleFlight, request_key
+from data.resilience import (
+    READ_SNAPSHOT_AND_REFRESH, READ_UPSTREAM, CircuitBreaker, RetryPolicy, UpstreamCall,
+    plan_snapshot_read,
+)
+from data.upstream_scheduler import (
+    PRIORITY_BACKGROUND, PRIORITY_BULK, UpstreamScheduler, current_priority, upstream_priority,
+)
+from data.metrics import HTML_CLEAN_SECONDS, PARSE_TASKS_SECONDS
+
+# requests chỉ cần cho client đồng bộ; sklearn được import khi dựng search index đầu tiên
+requests = LazyModule('requests')
+SKLEARN_AVAILABLE = module_available('sklearn')
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+# Thứ tự cột của DataFrame kết quả phân tích tasks
+TASK_COLUMNS = [
+    'Loại công việc', 'Tên công việc', 'Công việc con', 'Người thực hiện', 'Người liên quan',
+    'Mô tả công việc', 'Trạng thái', 'Kết quả đạt được', 'Lí do thất bại',
+    'Ngày bắt đầu', 'Deadline', 'Ngày hoàn thành', 'Metatype',
+]
+
+# Khoảng epoch mà pd.to_datetime(unit='s') xử lý được (năm 1677..2262), chừa một ngày cho offset múi giờ
+_MIN_EPOCH = -9223372036 + 86400
+_MAX_EPOCH = 9223372036 - 86400
+
+STATUS_FAILED = 'Thất bại'
+STATUS_COMPLETED = 'Hoàn thành'
+STATUS_IN_PROGRESS = 'Đang thực hiện'
+
+# Cột cần làm sạch HTML, tốn chi phí nhất khi phân tích
+DESCRIPTION_COLUMN = 'Mô tả công việc'
+
+
+@lru_cache(maxsize=1)
+def _local_timezone() -> Any:
+    """
+    Múi giờ địa phương (múi giờ mà datetime.fromtimestamp dùng) cho pandas
+
+    Ưu tiên tên múi giờ IANA lấy từ biến TZ hoặc /etc/localtime vì pandas đổi
+    múi giờ theo tên nhanh hơn nhiều; không xác định được thì dùng tzlocal().
+    """
+    name = os.environ.get('TZ', '').lstrip(':')
+    if not name:
+        localtime = os.path.realpath('/etc/localtime')
+        if '/zoneinfo/' in localtime:
+            name = localtime.split('/zoneinfo/', 1)[1]
+    if name:
+        try:
+            ZoneInfo(name)
+            return name
+        except (ValueError, ZoneInfoNotFoundError):
+            pass
+    # dateutil đi kèm pandas
+    from dateutil.tz import tzlocal
+    return tzlocal()
+
+
+def _task_digest(task: Dict) -> bytes:
+    """Hash nội dung của một task (không phụ thuộc thứ tự key)"""
+    if ORJSON_AVAILABLE:
+        try:
+            raw = orjson.dumps(task, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            raw = json.dumps(task, sort_keys=True, default=str).encode('utf-8')
+    else:
+        raw = json.dumps(task, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+class TaskParseMemo:
+    """
+    Bộ nhớ đệm LRU các dòng task đã parse
+
+    Key gồm loại task (task/subtask), các cột được dựng, id và hash nội dung
+    của task gốc, nên task bị sửa sẽ có key mới và được parse lại. An toàn
+    khi dùng chung giữa nhiều thread.
+    """
+
+    def __init__(self, maxsize: int = 20000):
+        """
+        Args:
+            maxsize (int): Số dòng tối đa được giữ lại
+        """
+        self.maxsize = maxsize
+        self._rows: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(task: Dict, is_subtask: bool, fields: Optional[Tuple[str, ...]]) -> Tuple:
+        return (is_subtask, fields, str(task.get('id', '')), _task_digest(task))
+
+    def get_many(self, keys: List[Tuple]) -> List[Optional[tuple]]:
+        """Các dòng đã parse theo thứ tự keys (None nếu chưa có)"""
+        rows = []
+        with self._lock:
+            for key in keys:
+                row = self._rows.get(key)
+                if row is not None:
+                    self._rows.move_to_end(key)
+                rows.append(row)
+            found = sum(1 for row in rows if row is not None)
+            self.hits += found
+            self.misses += len(keys) - found
+        return rows
+
+    def put_many(self, items: List[Tuple[Tuple, tuple]]) -> None:
+        """Lưu các cặp (key, dòng), loại bỏ các dòng ít dùng nhất khi vượt maxsize"""
+        with self._lock:
+            for key, row in items:
+                self._rows[key] = row
+                self._rows.move_to_end(key)
+            while len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': len(self._rows),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
 
 class TaskAnalyzer:
     """Phân tích và xử lý dữ liệu task từ WeWork"""
     
+    def __init__(self, memo_size: int = 0, memo_min_rows: int = 5000):
+        """
+        Args:
+            memo_size (int): Số dòng task đã parse được nhớ lại giữa các lần phân tích
+                (chỉ parse lại task mới hoặc đã thay đổi); 0 để tắt
+            memo_min_rows (int): Chỉ dùng memo khi một lần parse có từ chừng này task trở lên;
+                với danh sách nhỏ, chi phí hash từng task lớn hơn phần parse tiết kiệm được
+        """
+        self.memo = TaskParseMemo(memo_size) if memo_size > 0 else None
+        self.memo_min_rows = memo_min_rows
+    
     @staticmethod
     def convert_timestamp(timestamp) -> Optional[str]:
         """Chuyển đổi timestamp thành định dạng ngày"""
@@ -31,183 +174,654 @@ class TaskAnalyzer:
     @staticmethod
     def clean_html_content(content) -> str:
         """Loại bỏ HTML tags và định dạng nội dung"""
-        if not isinstance(content, str):
-            return ""
-        
-        # Use BeautifulSoup to remove all HTML/CSS styling
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Remove all style attributes
-        for tag in soup.find_all(style=True):
-            del tag['style']
-        
-        # Convert specific HTML elements to plain text
-        text = str(soup)
-        replacements = {
-            '<p>': '', '</p>': '\n',
-            '<ul>': '', '</ul>': '',
-            '<li>': '- ', '</li>': '\n',
-            '<br>': '\n', '<br/>': '\n',
-            '<ol>': '', '</ol>': '',
-            '<span>': '', '</span>': '',
-            '<strong>': '', '</strong>': '',
-            '&nbsp;': ' '
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
+        return clean_html(content)
+
+    def _clean_contents(self, contents: List[Any]) -> List[str]:
+        """Làm sạch HTML của cả cột mô tả công việc"""
+        with HTML_CLEAN_SECONDS.time():
+            return [self.clean_html_content(content) for content in contents]
+
+    @staticmethod
+    def resolve_fields(fields) -> Optional[List[str]]:
+        """
+        Chuẩn hoá danh sách cột được yêu cầu
+        
+        Args:
+            fields: List tên cột hoặc chuỗi phân tách bằng dấu phẩy, None để lấy tất cả
         
-        # Remove any remaining HTML tags
-        text = re.sub('<[^<]+?>', '', text)
+        Returns:
+            Các cột theo thứ tự của TASK_COLUMNS, None nếu lấy tất cả
         
-        # Clean up extra whitespace
-        text = ' '.join(text.split())
-        return text.strip()
+        Raises:
+            ValueError: Nếu có tên cột không tồn tại
+        """
+        if fields is None:
+            return None
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        requested = {str(field).strip() for field in fields if str(field).strip()}
+        unknown = requested.difference(TASK_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return [column for column in TASK_COLUMNS if column in requested]
 
-    def parse_tasks(self, tasks: List[Dict], is_subtask: bool = False) -> pd.DataFrame:
-        """Parse tasks data thành DataFrame"""
+    def parse_tasks(self, tasks: List[Dict], is_subtask: bool = False,
+                    fields: Optional[List[str]] = None) -> 'pd.DataFrame':
+        """
+        Parse tasks data thành DataFrame
+        
+        Args:
+            fields: Chỉ dựng các cột này (None để dựng tất cả); mô tả công việc
+                không được yêu cầu thì không làm sạch HTML
+        """
         if not tasks:
             return pd.DataFrame()
+        with PARSE_TASKS_SECONDS.time():
+            return self._parse_tasks_memoized(tasks, is_subtask, fields)
+
+    def _parse_tasks_memoized(self, tasks: List[Dict], is_subtask: bool = False,
+                              fields: Optional[List[str]] = None) -> 'pd.DataFrame':
+        """Parse tasks, dùng lại các dòng đã parse trong memo (nếu bật và đủ số task)"""
+        if self.memo is None or len(tasks) < self.memo_min_rows:
+            return self._parse_tasks_uncached(tasks, is_subtask, fields)
         
-        parsed_data = []
-        for task in tasks:
-            try:
-                content = self.clean_html_content(task.get('content', ''))
-                
-                # Handle tasklist name
-                origin_task_name = ''
-                if isinstance(task.get('tasklist'), dict):
-                    origin_task_name = task['tasklist'].get('name', '')
-                
-                # Handle origin export name
-                origin_task = ''
-                if isinstance(task.get('origin_export'), dict):
-                    origin_task = task['origin_export'].get('name', '')
-                    
-                # Handle result content
-                result = ''
-                if isinstance(task.get('result'), dict):
-                    result = task['result'].get('content', '')
-                
-                # Fix for failed reason extraction
-                failed_reason = ''
-                if isinstance(task.get('data'), dict):
-                    data_dict = task['data']
-                    if isinstance(data_dict.get('failed_reason'), dict):
-                        failed_reason = data_dict['failed_reason'].get('reason', '')
-                    elif isinstance(data_dict.get('failed_reason'), str):
-                        failed_reason = data_dict['failed_reason']
+        field_key = None if fields is None else tuple(fields)
+        keys = [self.memo.key(task, is_subtask, field_key) for task in tasks]
+        rows = self.memo.get_many(keys)
+        missing = [i for i, row in enumerate(rows) if row is None]
+        columns = TASK_COLUMNS if fields is None else list(fields)
+        
+        if missing:
+            parsed = self._parse_tasks_uncached([tasks[i] for i in missing], is_subtask, fields)
+            if len(parsed) != len(missing):
+                # Có task lỗi bị bỏ qua nên không ghép được từng dòng với task gốc
+                return self._parse_tasks_uncached(tasks, is_subtask, fields)
+            parsed_rows = list(zip(*[parsed[column].tolist() for column in columns]))
+            for i, row in zip(missing, parsed_rows):
+                rows[i] = row
+            self.memo.put_many([(keys[i], row) for i, row in zip(missing, parsed_rows)])
+            if len(missing) == len(tasks):
+                parsed.attrs['reused_rows'] = 0
+                return parsed
+        
+        df = pd.DataFrame(dict(zip(columns, map(list, zip(*rows)))))
+        df.attrs['reused_rows'] = len(tasks) - len(missing)
+        return df
     
-                # Handle deadline date
-                deadline = ''
-                if int(task.get('has_deadline', '0')) == 1:
-                    deadline = self.convert_timestamp(task.get('deadline'))
-                
-                # Handle completion date
-                completion_date = ''
-                if task.get('completed_time') and int(task.get('completed_time', 0)) != 0:
-                    completion_date = self.convert_timestamp(task.get('completed_time'))
-                
-                # Determine status based on completion and failed_reason
-                status = 'Thất bại' if failed_reason else ('Hoàn thành' if task.get('complete') == '100.00' else 'Đang thực hiện')
-                
-                # Creation date
-                created_date = self.convert_timestamp(task.get('start_time'))
-                
-                task_data = {
-                    'Loại công việc': origin_task_name,
-                    'Tên công việc': origin_task if is_subtask else task.get('name', ''),
-                    'Công việc con': task.get('name', '') if is_subtask else "",
-                    'Người thực hiện': task.get('username', ''),
-                    'Người liên quan': ', '.join([follower.get('username', '') for follower in task.get('followers', [])]),
-                    'Mô tả công việc': content,
-                    'Trạng thái': status,
-                    'Kết quả đạt được': result,
-                    'Lí do thất bại': failed_reason,
-                    'Ngày bắt đầu': created_date,
-                    'Deadline': deadline,
-                    'Ngày hoàn thành': completion_date,
-                    'Metatype': task.get('metatype', ''),
-                }
-                
-                parsed_data.append(task_data)
-                
-            except Exception as e:
-                print(f"Error parsing task: {str(e)}")
+    def _parse_tasks_uncached(self, tasks: List[Dict], is_subtask: bool = False,
+                              fields: Optional[List[str]] = None) -> 'pd.DataFrame':
+        """
+        Parse tasks theo cột: tách từng trường thành mảng một lần rồi xử lý
+        cả cột (làm sạch HTML, chuyển timestamp, tính trạng thái).
+
+        Task không qua được _task_is_parseable bị bỏ qua.
+        """
+        task_types, names, subtask_names, assignees, followers = [], [], [], [], []
+        contents, results, failed_reasons, completes, metatypes = [], [], [], [], []
+        start_times, deadline_times, completed_times = [], [], []
+        has_deadline_rows, completed_rows = [], []
+        
+        for task in tasks:
+            if not self._task_is_parseable(task):
+                print("Error parsing task: invalid task data, task skipped")
+                continue
+            i = len(names)
+            get = task.get
+            
+            tasklist = get('tasklist')
+            task_types.append(tasklist.get('name', '') if isinstance(tasklist, dict) else '')
+            
+            if is_subtask:
+                origin_export = get('origin_export')
+                names.append(origin_export.get('name', '') if isinstance(origin_export, dict) else '')
+                subtask_names.append(get('name', ''))
+            else:
+                names.append(get('name', ''))
+                subtask_names.append("")
+            
+            assignees.append(get('username', ''))
+            followers.append(', '.join([follower.get('username', '') for follower in get('followers', [])]))
+            contents.append(get('content', ''))
+            
+            result = get('result')
+            results.append(result.get('content', '') if isinstance(result, dict) else '')
+            failed_reasons.append(self._failed_reason(task))
+            completes.append(get('complete'))
+            metatypes.append(get('metatype', ''))
+            start_times.append(get('start_time'))
+            
+            if int(get('has_deadline', '0')) == 1:
+                has_deadline_rows.append(i)
+                deadline_times.append(get('deadline'))
+            
+            completed_time = get('completed_time')
+            if completed_time and int(completed_time) != 0:
+                completed_rows.append(i)
+                completed_times.append(completed_time)
+        
+        n = len(names)
+        if n == 0:
+            return pd.DataFrame()
+        
+        # Trạng thái: Thất bại nếu có lí do thất bại, Hoàn thành nếu complete == '100.00'
+        failed_mask = np.fromiter(failed_reasons, dtype=object, count=n).astype(bool)
+        completed_mask = np.fromiter(completes, dtype=object, count=n) == '100.00'
+        statuses = np.where(
+            failed_mask, STATUS_FAILED, np.where(completed_mask, STATUS_COMPLETED, STATUS_IN_PROGRESS)
+        ).tolist()
+        
+        # Ngày: cả ba cột timestamp được chuyển trong một lần; deadline / ngày hoàn thành
+        # chỉ có ở các task có deadline / đã hoàn thành
+        dates = self.convert_timestamps(start_times + deadline_times + completed_times)
+        start_dates = dates[:n]
+        deadlines: List[Optional[str]] = [''] * n
+        for i, date in zip(has_deadline_rows, dates[n:n + len(deadline_times)]):
+            deadlines[i] = date
+        completion_dates: List[Optional[str]] = [''] * n
+        for i, date in zip(completed_rows, dates[n + len(deadline_times):]):
+            completion_dates[i] = date
+        
+        columns = dict(zip(TASK_COLUMNS, [
+            task_types,
+            names,
+            subtask_names,
+            assignees,
+            followers,
+            self._clean_contents(contents) if fields is None or DESCRIPTION_COLUMN in fields else None,
+            statuses,
+            results,
+            failed_reasons,
+            start_dates,
+            deadlines,
+            completion_dates,
+            metatypes,
+        ]))
+        if fields is not None:
+            columns = {column: columns[column] for column in fields}
+        return pd.DataFrame(columns)
+
+    @staticmethod
+    def _failed_reason(task: Dict) -> Any:
+        """Lí do thất bại của task ('' nếu không có)"""
+        data_dict = task.get('data')
+        if isinstance(data_dict, dict):
+            reason = data_dict.get('failed_reason')
+            if isinstance(reason, dict):
+                return reason.get('reason', '')
+            if isinstance(reason, str):
+                return reason
+        return ''
+
+    @classmethod
+    def _task_is_parseable(cls, task: Dict) -> bool:
+        """
+        Task có đủ dữ liệu hợp lệ để parse không
+
+        Task bị bỏ qua khi: người liên quan không phải list các dict có username
+        là chuỗi, has_deadline / completed_time không phải số, hoặc timestamp
+        vượt quá time_t của hệ thống. Timestamp chỉ ngoài khoảng năm 1..9999
+        thì không làm task bị bỏ qua (ngày tương ứng là None).
+        """
+        try:
+            for follower in task.get('followers', []):
+                if not isinstance(follower.get('username', ''), str):
+                    return False
+            timestamps = [task.get('start_time')]
+            if int(task.get('has_deadline', '0')) == 1:
+                timestamps.append(task.get('deadline'))
+            completed_time = task.get('completed_time')
+            if completed_time and int(completed_time) != 0:
+                timestamps.append(completed_time)
+            for timestamp in timestamps:
+                epoch = cls._epoch_or_none(timestamp)
+                if epoch is not None and not _MIN_EPOCH <= epoch <= _MAX_EPOCH:
+                    cls.convert_timestamp(epoch)
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _epoch_or_none(timestamp) -> Optional[int]:
+        """Giá trị epoch hợp lệ theo đúng điều kiện của convert_timestamp, None nếu không"""
+        try:
+            if timestamp and str(timestamp).strip() and int(timestamp) != 0:
+                return int(timestamp)
+        except (ValueError, TypeError):
+            pass
+        return None
+
+    @classmethod
+    def convert_timestamps(cls, timestamps: List[Any]) -> List[Optional[str]]:
+        """
+        Chuyển đổi cả cột timestamp thành ngày theo giờ địa phương
+
+        Cho cùng kết quả với convert_timestamp trên từng giá trị. Các timestamp
+        trong khoảng pandas hỗ trợ được chuyển bằng một lần pd.to_datetime;
+        timestamp ngoài khoảng đó (hiếm) được chuyển riêng từng giá trị.
+        """
+        epochs = [cls._epoch_or_none(timestamp) for timestamp in timestamps]
+        dates: List[Optional[str]] = [None] * len(epochs)
+        valid = []
+        for i, epoch in enumerate(epochs):
+            if epoch is None:
                 continue
+            if _MIN_EPOCH <= epoch <= _MAX_EPOCH:
+                valid.append(i)
+            else:
+                dates[i] = cls.convert_timestamp(epoch)
+        if not valid:
+            return dates
         
-        return pd.DataFrame(parsed_data)
+        values = np.fromiter((epochs[i] for i in valid), dtype=np.int64, count=len(valid))
+        local_times = pd.to_datetime(values, unit='s', utc=True).tz_convert(_local_timezone()).tz_localize(None)
+        # Nhiều task trùng ngày: chỉ định dạng mỗi ngày khác nhau một lần
+        days, inverse = np.unique(local_times.values.astype('datetime64[D]'), return_inverse=True)
+        for i, date in zip(valid, days.astype(str)[inverse.ravel()].tolist()):
+            dates[i] = date
+        return dates
 
-    def analyze_tasks(self, response_data: Dict) -> pd.DataFrame:
-        """Phân tích dữ liệu tasks và trả về DataFrame"""
+    def analyze_tasks(self, response_data: Dict, fields: Optional[List[str]] = None) -> 'pd.DataFrame':
+        """
+        Phân tích dữ liệu tasks và trả về DataFrame
+        
+        Args:
+            fields: Chỉ trả về các cột này (xem resolve_fields), None để trả về tất cả
+        
+        Returns:
+            DataFrame; df.attrs['reused_rows'] là số dòng lấy lại từ memo thay vì parse,
+            df.attrs['error'] là lỗi khi DataFrame rỗng vì phân tích thất bại
+        """
         try:
-            df = self.parse_tasks(response_data.get('tasks', []))
-            df_sub = self.parse_tasks(response_data.get('subtasks', []), is_subtask=True)
+            # Tên công việc luôn được dựng để sắp xếp, rồi mới chiếu theo fields
+            parse_fields = None
+            if fields is not None:
+                parse_fields = [column for column in TASK_COLUMNS
+                                if column in fields or column == 'Tên công việc']
+            df = self.parse_tasks(response_data.get('tasks', []), fields=parse_fields)
+            df_sub = self.parse_tasks(response_data.get('subtasks', []), is_subtask=True, fields=parse_fields)
             
             if df.empty and df_sub.empty:
                 return pd.DataFrame()
             
             final_df = pd.concat([df, df_sub], ignore_index=True)
-            final_df = final_df.map(lambda x: str(x).strip() if isinstance(x, str) else x)
+            final_df = self._strip_strings(final_df)
             final_df = final_df.dropna(axis=1, how='all')
             final_df = final_df.loc[:, (final_df != "").any(axis=0)]
             
             if not final_df.empty and 'Tên công việc' in final_df.columns:
                 final_df = final_df.sort_values(by='Tên công việc').reset_index(drop=True)
             
+            if fields is not None:
+                final_df = final_df[[column for column in final_df.columns if column in fields]]
+            
+            final_df.attrs['reused_rows'] = df.attrs.get('reused_rows', 0) + df_sub.attrs.get('reused_rows', 0)
             return final_df
         except Exception as e:
             print(f"Error analyzing tasks: {str(e)}")
-            return pd.DataFrame()
+            df = pd.DataFrame()
+            df.attrs['error'] = f"Error analyzing tasks: {str(e)}"
+            return df
 
+    def iter_task_batches(self, response_data: Dict, batch_size: int = 500,
+                          fields: Optional[List[str]] = None) -> 'Iterator[pd.DataFrame]':
+        """
+        Phân tích tasks theo từng lô để stream kết quả
 
-class WeWorkClient:
-    """
-    Client để tương tác với WeWork API
-    """
-    
-    BASE_URL = "https://wework.base.vn/extapi/v3"
-    
-    def __init__(self, access_token: str):
+        Mỗi lô là DataFrame đã strip chuỗi, theo thứ tự tasks rồi subtasks như
+        dữ liệu gốc. Khác analyze_tasks: không sắp xếp theo tên và không bỏ
+        cột rỗng, vì các thao tác đó cần toàn bộ dữ liệu.
         """
-        Khởi tạo WeWork client
-        
-        Args:
-            access_token (str): Access token để truy cập WeWork API
+        batch_size = max(1, batch_size)
+        for is_subtask, items in ((False, response_data.get('tasks', [])),
+                                  (True, response_data.get('subtasks', []))):
+            for start in range(0, len(items), batch_size):
+                df = self.parse_tasks(items[start:start + batch_size], is_subtask=is_subtask, fields=fields)
+                if not df.empty:
+                    yield self._strip_strings(df)
+
+    @staticmethod
+    def _strip_strings(df: 'pd.DataFrame') -> 'pd.DataFrame':
+        """Strip khoảng trắng của các giá trị chuỗi, chỉ trên các cột kiểu object"""
+        df = df.copy()
+        for column in df.columns:
+            values = df[column]
+            if values.dtype != object:
+                continue
+            inferred = pd.api.types.infer_dtype(values, skipna=False)
+            if inferred == 'string':
+                df[column] = [value.strip() for value in values.tolist()]
+            elif inferred not in ('empty', 'integer', 'floating', 'boolean', 'decimal', 'complex'):
+                df[column] = [str(value).strip() if isinstance(value, str) else value for value in values.tolist()]
+        return df
+
+    @staticmethod
+    def summarize(df: 'pd.DataFrame') -> Dict[str, Any]:
+        """Tóm tắt trạng thái tasks của DataFrame đã phân tích"""
+        status_counts = df['Trạng thái'].value_counts().to_dict() if 'Trạng thái' in df.columns else {}
+        return TaskAnalyzer.summarize_counts(len(df), status_counts)
+
+    @staticmethod
+    def summarize_counts(total_tasks: int, status_counts: Dict[str, int]) -> Dict[str, Any]:
+        """Tóm tắt trạng thái tasks từ số lượng task theo từng trạng thái"""
+        completed = status_counts.get(STATUS_COMPLETED, 0)
+        return {
+            'total_tasks': total_tasks,
+            'completed_tasks': completed,
+            'in_progress_tasks': status_counts.get(STATUS_IN_PROGRESS, 0),
+            'failed_tasks': status_counts.get(STATUS_FAILED, 0),
+            'completion_rate': round(completed / total_tasks * 100, 2) if total_tasks > 0 else 0,
+            'status_breakdown': status_counts,
+        }
+
+    def analyze_and_summarize(self, response_data: Dict) -> Dict[str, Any]:
+        """Tóm tắt tasks của một project (dùng bộ đếm một lượt, không dựng DataFrame)"""
+        statistics = self.compute_statistics(response_data)
+        return self.summarize_counts(statistics['total_tasks'], statistics['status_counts'])
+
+    def compute_statistics(self, response_data: Dict) -> Dict[str, Any]:
         """
-        self.access_token = access_token
-        self.task_analyzer = TaskAnalyzer()
+        Thống kê tasks trong một lượt duyệt dữ liệu JSON gốc
+
+        Cho cùng kết quả với value_counts() trên DataFrame của analyze_tasks
+        (bỏ qua task lỗi, strip chuỗi, bỏ cột toàn giá trị rỗng) nhưng không
+        dựng DataFrame và không làm sạch HTML.
+
+        Returns:
+            Dict gồm total_tasks, status_counts, assignee_counts,
+            task_type_counts và completion_rate
+        """
+        total_tasks = 0
+        status_counts: Counter = Counter()
+        assignee_counts: Counter = Counter()
+        task_type_counts: Counter = Counter()
+        # Cột chỉ toàn giá trị rỗng bị analyze_tasks loại bỏ nên không được thống kê
+        has_assignee = has_task_type = False
+        
+        rows = (response_data.get('tasks', []) or []) + (response_data.get('subtasks', []) or [])
         
-    def _fetch_data_with_retry(self, url: str, payload: Dict, max_retries: int = 3) -> Optional[Dict]:
-        """Gửi request với retry logic"""
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        for task in rows:
+            if not self._task_is_parseable(task):
+                continue
+            tasklist = task.get('tasklist')
+            task_type = tasklist.get('name', '') if isinstance(tasklist, dict) else ''
+            assignee = task.get('username', '')
+            failed_reason = self._failed_reason(task)
+            
+            total_tasks += 1
+            if failed_reason:
+                status_counts[STATUS_FAILED] += 1
+            elif task.get('complete') == '100.00':
+                status_counts[STATUS_COMPLETED] += 1
+            else:
+                status_counts[STATUS_IN_PROGRESS] += 1
+            
+            if isinstance(assignee, str):
+                assignee = assignee.strip()
+            if assignee is not None:
+                assignee_counts[assignee] += 1
+                has_assignee = has_assignee or assignee != ''
+            
+            if isinstance(task_type, str):
+                task_type = task_type.strip()
+            if task_type is not None:
+                task_type_counts[task_type] += 1
+                has_task_type = has_task_type or task_type != ''
         
-        for attempt in range(max_retries):
+        completed = status_counts.get(STATUS_COMPLETED, 0)
+        return {
+            'total_tasks': total_tasks,
+            'status_counts': dict(status_counts.most_common()),
+            'assignee_counts': dict(assignee_counts.most_common()) if has_assignee else {},
+            'task_type_counts': dict(task_type_counts.most_common()) if has_task_type else {},
+            'completion_rate': round(completed / total_tasks * 100, 2) if total_tasks > 0 else 0,
+        }
+
+
+def aggregate_summaries(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cộng dồn tóm tắt của nhiều projects thành tóm tắt toàn portfolio"""
+    status_counts: Dict[str, int] = defaultdict(int)
+    for summary in summaries:
+        for status, count in summary.get('status_breakdown', {}).items():
+            status_counts[status] += count
+    total_tasks = sum(summary.get('total_tasks', 0) for summary in summaries)
+    return {'projects': len(summaries), **TaskAnalyzer.summarize_counts(total_tasks, dict(status_counts))}
+
+
+def build_project_index(projects: List[Dict]) -> Dict[str, Dict]:
+    """Dựng index id -> project (giữ project xuất hiện đầu tiên nếu trùng id)"""
+    index: Dict[str, Dict] = {}
+    for project in projects:
+        index.setdefault(str(project.get('id')), project)
+    return index
+
+
+class ProjectSearchIndex:
+    """
+    Index tìm kiếm tên project, dựng một lần cho mỗi danh sách projects.
+
+    Dùng TF-IDF trên n-gram ký tự (2-3) nếu sklearn có sẵn; mỗi truy vấn
+    chấm điểm toàn bộ projects bằng một phép nhân ma trận thưa - vector.
+    """
+
+    def __init__(self, projects: List[Dict]):
+        self.projects = projects
+        self.names = [project['name'].lower() for project in projects]
+        self._name_chars: Optional[List[set]] = None
+        self._vectorizer = None
+        self._matrix = None
+
+        vectorizer_class = load_tfidf_vectorizer() if SKLEARN_AVAILABLE and self.names else None
+        if vectorizer_class is not None:
             try:
-                response = requests.post(url, headers=headers, data=payload, timeout=30)
-                response.raise_for_status()
-                return response.json()
-            except requests.exceptions.RequestException as e:
-                if attempt < max_retries - 1:
-                    time.sleep(2)
-                    continue
-                else:
-                    print(f"Error fetching data: {str(e)}")
-                    return None
-        return None
+                vectorizer = vectorizer_class(analyzer='char', ngram_range=(2, 3))
+                self._matrix = vectorizer.fit_transform(self.names)
+                self._vectorizer = vectorizer
+            except Exception as e:
+                print(f"Lỗi khi dựng search index: {e}")
 
-    def fetch_projects(self) -> List[Dict]:
-        """Lấy danh sách tất cả projects"""
-        url = f"{self.BASE_URL}/project/list"
-        data = self._fetch_data_with_retry(url, {'access_token': self.access_token})
-        return data.get('projects', []) if data else []
+    @property
+    def vectorized(self) -> bool:
+        return self._matrix is not None
 
-    def fetch_project_details(self, project_id: str) -> Optional[Dict]:
-        """Lấy chi tiết của một project"""
-        url = f"{self.BASE_URL}/project/get.full"
-        return self._fetch_data_with_retry(url, {
-            'access_token': self.access_token,
-            'id': project_id
-        })
+    def similarities(self, text: str):
+        """Cosine similarity giữa text và tên của tất cả projects (None nếu không có TF-IDF)"""
+        if self._matrix is None:
+            return None
+        query = self._vectorizer.transform([text.lower()])
+        # Các vector TF-IDF đã được chuẩn hoá L2 nên tích vô hướng chính là cosine similarity
+        return (self._matrix @ query.T).toarray().ravel()
+
+    def char_similarities(self, text: str) -> List[float]:
+        """Độ tương đồng đơn giản (Jaccard trên tập ký tự) giữa text và tên của tất cả projects"""
+        if self._name_chars is None:
+            self._name_chars = [set(name) for name in self.names]
+        text_chars = set(text.lower())
+        similarities = []
+        for chars in self._name_chars:
+            total_chars = len(text_chars | chars)
+            similarities.append(len(text_chars & chars) / total_chars if total_chars else 0)
+        return similarities
+
+    def substring_matches(self, text: str) -> List[int]:
+        """Vị trí các projects có tên chứa text hoặc nằm trong text"""
+        text_lower = text.lower()
+        return [i for i, name in enumerate(self.names) if text_lower in name or name in text_lower]
+
+
+class RecentProjects:
+    """
+    Các project được dùng gần đây (LRU theo lần truy cập cuối)
+
+    Được ghi lại khi caller lấy chi tiết project; warm-up dùng danh sách này
+    để làm nóng trước những project hay được hỏi tới.
+    """
+
+    def __init__(self, maxsize: int = 50):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, None]" = OrderedDict()
+
+    def touch(self, project_id: str) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[str(project_id)] = None
+            self._items.move_to_end(str(project_id))
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def most_recent(self, limit: Optional[int] = None) -> List[str]:
+        """ID các project, dùng gần nhất trước"""
+        with self._lock:
+            ids = list(reversed(self._items))
+        return ids if limit is None else ids[:max(0, limit)]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class ProjectListCache:
+    """
+    Cache danh sách projects với TTL theo kiểu stale-while-revalidate.
+
+    Khi entry còn mới thì trả thẳng từ cache; khi đã hết TTL thì vẫn trả
+    danh sách cũ và báo cho caller biết cần refresh ở background (chỉ một
+    refresh tại một thời điểm). An toàn khi dùng chung giữa nhiều thread.
+    """
+
+    def __init__(self, ttl: float = 300):
+        """
+        Args:
+            ttl (float): Thời gian (giây) danh sách được coi là còn mới; <= 0 để tắt cache
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._projects: Optional[List[Dict]] = None
+        self._by_id: Dict[str, Dict] = {}
+        self._search_index: Optional[ProjectSearchIndex] = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        # Tăng mỗi khi danh sách được thay hoặc xoá (dùng để dựng ETag)
+        self.version = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self) -> Tuple[Optional[List[Dict]], bool]:
+        """
+        Lấy danh sách projects từ cache
+
+        Returns:
+            (projects, needs_refresh): projects là None nếu cache trống;
+            needs_refresh là True nếu caller phải khởi động refresh background
+        """
+        with self._lock:
+            if not self.enabled or self._projects is None:
+                self.misses += 1
+                return None, False
+            if time.monotonic() - self._fetched_at < self.ttl:
+                self.hits += 1
+                return self._projects, False
+            self.stale_hits += 1
+            if self._refreshing:
+                return self._projects, False
+            self._refreshing = True
+            return self._projects, True
+
+    def fresh_version(self) -> Optional[int]:
+        """Phiên bản của danh sách đang cache nếu còn mới (lần get() tới trả về đúng nó), None nếu không"""
+        with self._lock:
+            if not self.enabled or self._projects is None or time.monotonic() - self._fetched_at >= self.ttl:
+                return None
+            return self.version
+
+    def set(self, projects: List[Dict]) -> None:
+        """Lưu danh sách projects mới vào cache và dựng lại index theo id"""
+        by_id = build_project_index(projects)
+        with self._lock:
+            self._projects = projects
+            self._by_id = by_id
+            self._search_index = None
+            self._fetched_at = time.monotonic()
+            self._refreshing = False
+            self.refreshes += 1
+            self.version += 1
+
+    def refresh_failed(self) -> None:
+        """Đánh dấu refresh background thất bại, giữ lại danh sách cũ"""
+        with self._lock:
+            self._refreshing = False
+
+    def index_for(self, projects: List[Dict]) -> Dict[str, Dict]:
+        """Trả về index id -> project của danh sách projects (dùng lại index đã dựng nếu có)"""
+        with self._lock:
+            if projects is self._projects:
+                return self._by_id
+        return build_project_index(projects)
+
+    def search_index_for(self, projects: List[Dict]) -> ProjectSearchIndex:
+        """
+        Trả về search index của danh sách projects
+
+        Index của danh sách đang cache được dựng một lần (lazy) và dùng lại
+        cho đến khi danh sách thay đổi.
+        """
+        with self._lock:
+            if projects is self._projects and self._search_index is not None:
+                return self._search_index
+        index = ProjectSearchIndex(projects)
+        with self._lock:
+            if projects is self._projects:
+                self._search_index = index
+        return index
+
+    def invalidate(self) -> None:
+        """Xoá cache, lần gọi tiếp theo sẽ tải lại từ WeWork"""
+        with self._lock:
+            self._projects = None
+            self._by_id = {}
+            self._search_index = None
+            self._fetched_at = 0.0
+            self.version += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hit/miss của cache"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            age = time.monotonic() - self._fetched_at if self._projects is not None else None
+            return {
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'hit_ratio': round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                'cached_projects': len(self._projects) if self._projects is not None else 0,
+                'age_seconds': round(age, 2) if age is not None else None,
+                'refreshing': self._refreshing,
+            }
+
+
+class ProjectMatcher:
+    """
+    Tìm kiếm trên danh sách projects, dùng chung cho client sync và async.
+
+    Lớp con cần có thuộc tính project_cache (ProjectListCache) và
+    recent_projects (RecentProjects).
+    """
+
+    project_cache: ProjectListCache
+    recent_projects: RecentProjects
+
+    def _record_project_use(self, project_id: str) -> None:
+        """Ghi nhận project được dùng (warm-up và refresh nền ở lane background thì bỏ qua)"""
+        if current_priority() != PRIORITY_BACKGROUND:
+            self.recent_projects.touch(project_id)
 
     def find_best_project_match(self, target_name: str, projects: List[Dict], threshold: float = 0.3) -> Tuple[Optional[Dict], float]:
         """
@@ -217,30 +831,21 @@ class WeWorkClient:
         if not projects:
             return None, 0
         
-        # Tạo danh sách tên dự án
-        project_names = [project['name'].lower() for project in projects]
-        target_name_lower = target_name.lower()
+        index = self.project_cache.search_index_for(projects)
         
         # Kiểm tra khớp chính xác trước
-        for i, name in enumerate(project_names):
-            if target_name_lower in name or name in target_name_lower:
-                return projects[i], 1.0
+        substring_matches = index.substring_matches(target_name)
+        if substring_matches:
+            return projects[substring_matches[0]], 1.0
         
         # Sử dụng TF-IDF và cosine similarity nếu sklearn có sẵn
-        if SKLEARN_AVAILABLE:
+        if index.vectorized:
             try:
-                vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(2, 3))
-                all_names = project_names + [target_name_lower]
-                tfidf_matrix = vectorizer.fit_transform(all_names)
-                
-                # Tính cosine similarity giữa target và tất cả project names
-                target_vector = tfidf_matrix[-1]
-                project_vectors = tfidf_matrix[:-1]
-                similarities = cosine_similarity(target_vector, project_vectors).flatten()
+                similarities = index.similarities(target_name)
                 
                 # Tìm similarity cao nhất
-                best_idx = np.argmax(similarities)
-                best_similarity = similarities[best_idx]
+                best_idx = int(np.argmax(similarities))
+                best_similarity = float(similarities[best_idx])
                 
                 if best_similarity >= threshold:
                     return projects[best_idx], best_similarity
@@ -254,67 +859,484 @@ class WeWorkClient:
         best_match = None
         best_score = 0
         
-        for project in projects:
-            name_lower = project['name'].lower()
-            # Simple similarity based on common characters
-            common_chars = len(set(target_name_lower) & set(name_lower))
-            total_chars = len(set(target_name_lower) | set(name_lower))
-            similarity = common_chars / total_chars if total_chars > 0 else 0
-            
+        for project, similarity in zip(projects, index.char_similarities(target_name)):
             if similarity > best_score and similarity >= threshold:
                 best_match = project
                 best_score = similarity
         
         return best_match, best_score
 
-    def search_projects(self, search_text: str, limit: int = 10) -> List[Dict]:
+    def rank_projects(self, projects: List[Dict], search_text: str, limit: int = 10) -> List[Dict]:
         """
-        Tìm kiếm projects theo tên
+        Xếp hạng projects theo độ phù hợp của tên với search_text
         """
-        projects = self.fetch_projects()
-        if not projects:
-            return []
+        index = self.project_cache.search_index_for(projects)
+        search_lower = search_text.lower()
         
-        # Tìm projects phù hợp
+        # Điểm similarity của tất cả projects trong một lần tính; không có
+        # TF-IDF (thiếu sklearn, import hoặc dựng index lỗi) thì dùng fallback
+        scores = index.similarities(search_text) if index.vectorized else None
+        
+        # Exact match hoặc partial match
+        exact_scores = {
+            i: 1.0 if search_lower == index.names[i] else 0.8
+            for i in index.substring_matches(search_text)
+        }
+        
+        if scores is not None:
+            scores = scores.copy()
+            for i, score in exact_scores.items():
+                scores[i] = score
+            candidates = np.flatnonzero(scores > 0.3)
+            if limit > 0 and len(candidates) > limit:
+                # Chọn top-k bằng argpartition rồi chỉ sắp xếp k phần tử
+                top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+                candidates = candidates[top]
+            order = sorted(candidates.tolist(), key=lambda i: (-scores[i], i))
+            return [projects[i] for i in order[:limit]]
+        
+        # Fallback khi không có TF-IDF: simple string similarity trên cùng index
         matches = []
-        for project in projects:
-            project_name = project['name'].lower()
-            search_lower = search_text.lower()
-            
-            # Exact match hoặc partial match
-            if search_lower in project_name or project_name in search_lower:
-                matches.append({
-                    'project': project,
-                    'similarity': 1.0 if search_lower == project_name else 0.8
-                })
-            else:
-                # Sử dụng find_best_project_match
-                _, similarity = self.find_best_project_match(search_text, [project])
-                if similarity > 0.3:
-                    matches.append({
-                        'project': project,
-                        'similarity': similarity
-                    })
+        for i, (project, similarity) in enumerate(zip(projects, index.char_similarities(search_text))):
+            if i in exact_scores:
+                matches.append({'project': project, 'similarity': exact_scores[i]})
+                continue
+            if similarity > 0.3:
+                matches.append({'project': project, 'similarity': similarity})
         
         # Sắp xếp theo similarity và giới hạn kết quả
         matches.sort(key=lambda x: x['similarity'], reverse=True)
         return [match['project'] for match in matches[:limit]]
 
-    def get_project_analysis(self, project_id: str) -> pd.DataFrame:
+
+class WeWorkClientBase(ProjectMatcher):
+    """
+    Phần không gọi mạng dùng chung cho WeWorkClient và AsyncWeWorkClient
+
+    Gồm trạng thái của client, dựng request, cache danh sách projects và
+    cách đọc snapshot; lớp con chỉ hiện thực phần I/O (sync hoặc asyncio).
+    """
+
+    BASE_URL = "https://wework.base.vn/extapi/v3"
+
+    def __init__(self, access_token: str, project_cache_ttl: float = 300,
+                 pool_maxsize: int = 10, connect_timeout: float = 5, read_timeout: float = 30,
+                 snapshot_store: Optional[ProjectSnapshotStore] = None, offline: bool = False,
+                 task_memo_size: int = 0, task_memo_min_rows: int = 5000,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 scheduler: Optional[UpstreamScheduler] = None, base_url: Optional[str] = None):
+        """Khởi tạo trạng thái chung của client (xem WeWorkClient.__init__)"""
+        self.access_token = access_token
+        if base_url:
+            self.BASE_URL = base_url.rstrip('/')
+        self.task_analyzer = TaskAnalyzer(task_memo_size, task_memo_min_rows)
+        self.project_cache = ProjectListCache(project_cache_ttl)
+        self.snapshot_store = snapshot_store
+        self.offline = offline
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_maxsize = pool_maxsize
+        self.recent_projects = RecentProjects()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.scheduler = scheduler or UpstreamScheduler(max_concurrency=pool_maxsize)
+
+    def upstream_health(self) -> Dict[str, Any]:
+        """Trạng thái circuit breaker, chính sách retry và hàng đợi request upstream"""
+        return {
+            'circuit': self.circuit_breaker.stats(),
+            'retry': self.retry_policy.stats(),
+            'scheduler': self.scheduler.stats(),
+        }
+
+    def invalidate_projects_cache(self) -> None:
+        """Xoá cache danh sách projects"""
+        self.project_cache.invalidate()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Thống kê cache của client"""
+        return {
+            'projects': self.project_cache.stats(),
+            'snapshots': self.snapshot_store.stats() if self.snapshot_store else None,
+            'task_memo': self.task_analyzer.memo.stats() if self.task_analyzer.memo else None,
+            'offline': self.offline,
+        }
+
+    def _projects_request(self) -> Tuple[str, Dict]:
+        """URL và payload của request tải danh sách projects"""
+        return f"{self.BASE_URL}/project/list", {'access_token': self.access_token}
+
+    def _project_details_request(self, project_id: str) -> Tuple[str, Dict]:
+        """URL và payload của request tải chi tiết project"""
+        return f"{self.BASE_URL}/project/get.full", {
+            'access_token': self.access_token,
+            'id': project_id
+        }
+
+    @staticmethod
+    def _flight_key(url: str, payload: Dict) -> Tuple:
+        """
+        Key để gộp các request trùng nhau đang chạy (single-flight)
+
+        Request chạy theo lane ưu tiên của caller đầu tiên, nên key gồm cả
+        lane hiện tại: lời gọi interactive không phải chờ sau request của
+        lane bulk/background đang xếp hàng.
+        """
+        return current_priority(), request_key(url, payload)
+
+    def _upstream_call(self, url: str) -> UpstreamCall:
+        """Trạng thái retry/breaker của một lần gọi WeWork, endpoint tính từ BASE_URL"""
+        return UpstreamCall(self.retry_policy, self.circuit_breaker, url, url[len(self.BASE_URL):].lstrip('/'))
+
+    def _cached_projects(self, force_refresh: bool) -> Tuple[Optional[List[Dict]], bool]:
+        """
+        Danh sách projects trong cache
+
+        Returns:
+            (projects, needs_refresh): projects là None nếu phải tải từ WeWork;
+            needs_refresh cho biết cần refresh cache ở background
+        """
+        if force_refresh:
+            return None, False
+        return self.project_cache.get()
+
+    def _projects_downloaded(self, projects: Optional[List[Dict]]) -> List[Dict]:
+        """Lưu danh sách vừa tải vào cache; request lỗi (None) trả về danh sách rỗng"""
+        if projects is None:
+            return []
+        if self.project_cache.enabled:
+            self.project_cache.set(projects)
+        return projects
+
+    def _projects_refreshed(self, projects: Optional[List[Dict]]) -> None:
+        """Cập nhật cache sau một lần refresh ở background (None nếu refresh lỗi)"""
+        if projects is None:
+            self.project_cache.refresh_failed()
+        else:
+            self.project_cache.set(projects)
+
+    def _plan_project_read(self, project_id: str, state: Optional[str]) -> Tuple[str, bool]:
+        """
+        Cách đọc chi tiết project theo trạng thái snapshot (xem plan_snapshot_read)
+
+        Returns:
+            (plan, refresh): refresh là True nếu caller phải chạy refresh
+            snapshot ở background (đã đánh dấu begin_refresh)
+        """
+        plan = plan_snapshot_read(state, self.offline)
+        refresh = plan == READ_SNAPSHOT_AND_REFRESH and self.snapshot_store.begin_refresh(project_id)
+        return plan, refresh
+
+    @staticmethod
+    def _snapshot_details(snapshot) -> Tuple[Optional[Dict], Optional[float]]:
+        """(payload, fetched_at) của snapshot, (None, None) nếu không có"""
+        if snapshot is None:
+            return None, None
+        return snapshot.payload, snapshot.fetched_at
+
+    def _project_loaded(self, project_id: str, payload: Optional[Dict]) -> None:
+        """Ghi nhận project được dùng nếu lấy được dữ liệu"""
+        if payload:
+            self._record_project_use(project_id)
+
+    def _find_project(self, projects: List[Dict], project_id: str) -> Optional[Dict]:
+        """Tìm project theo ID trong danh sách, ghi nhận project được dùng nếu có"""
+        project = self.project_cache.index_for(projects).get(str(project_id))
+        if project is not None:
+            self._record_project_use(project_id)
+        return project
+
+    @staticmethod
+    def _analysis_error(project_id: str) -> 'pd.DataFrame':
+        """DataFrame rỗng có attrs['error'], phân biệt với project không có task nào"""
+        df = pd.DataFrame()
+        df.attrs['error'] = f"Could not load project {project_id} from WeWork"
+        return df
+
+
+class WeWorkClient(WeWorkClientBase):
+    """
+    Client để tương tác với WeWork API
+    """
+    
+    def __init__(self, access_token: str, project_cache_ttl: float = 300,
+                 pool_maxsize: int = 10, connect_timeout: float = 5, read_timeout: float = 30,
+                 snapshot_store: Optional[ProjectSnapshotStore] = None, offline: bool = False,
+                 task_memo_size: int = 0, task_memo_min_rows: int = 5000,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 scheduler: Optional[UpstreamScheduler] = None, base_url: Optional[str] = None):
+        """
+        Khởi tạo WeWork client
+        
+        Args:
+            access_token (str): Access token để truy cập WeWork API
+            project_cache_ttl (float): TTL (giây) của cache danh sách projects, <= 0 để tắt
+            pool_maxsize (int): Số kết nối keep-alive tối đa giữ lại cho mỗi host
+            connect_timeout (float): Timeout (giây) khi mở kết nối
+            read_timeout (float): Timeout (giây) khi chờ response
+            snapshot_store (ProjectSnapshotStore): Nơi lưu snapshot dữ liệu xuống đĩa (None để tắt)
+            offline (bool): Chỉ đọc từ snapshot store, không gọi WeWork API
+            task_memo_size (int): Số dòng task đã parse được nhớ lại giữa các lần phân tích, 0 để tắt
+            task_memo_min_rows (int): Số task tối thiểu của một lần parse để dùng memo
+            retry_policy (RetryPolicy): Backoff/deadline khi thử lại request (mặc định RetryPolicy())
+            circuit_breaker (CircuitBreaker): Breaker cho upstream (mặc định CircuitBreaker())
+            scheduler (UpstreamScheduler): Giới hạn tốc độ/số request upstream đồng thời, có thể
+                dùng chung giữa nhiều client (mặc định chỉ giới hạn theo pool_maxsize)
+            base_url (str): URL gốc của WeWork API (mặc định BASE_URL), vd stub server khi benchmark
+        """
+        super().__init__(
+            access_token, project_cache_ttl, pool_maxsize, connect_timeout, read_timeout,
+            snapshot_store, offline, task_memo_size, task_memo_min_rows,
+            retry_policy, circuit_breaker, scheduler, base_url,
+        )
+        self.session = self._create_session(pool_maxsize)
+        self.single_flight = SingleFlight()
+
+    @staticmethod
+    def _create_session(pool_maxsize: int) -> 'requests.Session':
+        """Tạo HTTP session dùng chung với connection pool keep-alive"""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+        return session
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Thống kê connection pool của session (theo từng host)"""
+        hosts = []
+        for adapter in {id(a): a for a in self.session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                queued = list(pool.pool.queue) if pool.pool is not None else []
+                hosts.append({
+                    'host': f"{pool.scheme}://{pool.host}:{pool.port}",
+                    'maxsize': self.pool_maxsize,
+                    'connections_created': pool.num_connections,
+                    'requests': pool.num_requests,
+                    'idle_connections': sum(1 for conn in queued if conn is not None),
+                    'in_use': self.pool_maxsize - len(queued),
+                })
+        return {
+            'pool_maxsize': self.pool_maxsize,
+            'connect_timeout': self.timeout[0],
+            'read_timeout': self.timeout[1],
+            'hosts': hosts,
+            'single_flight': self.single_flight.stats(),
+        }
+
+    def close(self) -> None:
+        """Đóng session và giải phóng các kết nối"""
+        self.session.close()
+        
+    def _fetch_data_with_retry(self, url: str, payload: Dict) -> Optional[Dict]:
+        """
+        Gửi request với retry logic
+
+        Các thread cùng gửi một request (cùng URL, payload và lane ưu tiên)
+        trong lúc request đó đang chạy sẽ chờ và dùng chung kết quả.
+        """
+        return self.single_flight.do(
+            self._flight_key(url, payload), lambda: self._post_with_retry(url, payload)
+        )
+
+    def _post_with_retry(self, url: str, payload: Dict) -> Optional[Dict]:
+        """
+        Gửi request tới WeWork theo retry_policy
+
+        Chỉ thử lại lỗi kết nối/timeout và các status tạm thời (429, 5xx), có
+        tôn trọng Retry-After; lỗi 4xx khác trả về None ngay. Khi circuit
+        breaker đang mở thì không gửi request (trả None để caller dùng cache).
+        """
+        call = self._upstream_call(url)
+        for attempt in call.attempts():
+            if not call.allowed():
+                return None
+            if not self.scheduler.acquire(timeout=call.remaining()):
+                call.no_slot()
+                return None
+            try:
+                timeout = call.begin(*self.timeout)
+                try:
+                    response = self.session.post(url, data=payload, timeout=timeout)
+                except requests.exceptions.RequestException as e:
+                    call.request_failed(str(e))
+                else:
+                    if call.response_received(response.status_code, response.reason,
+                                              response.headers.get('Retry-After')):
+                        try:
+                            response.raise_for_status()
+                            return response.json()
+                        except (requests.exceptions.RequestException, ValueError) as e:
+                            print(f"Error fetching data: {str(e)}")
+                            return None
+            finally:
+                self.scheduler.release()
+
+            delay = call.retry_delay(attempt)
+            if delay is None:
+                return None
+            time.sleep(delay)
+        return None
+
+    def _download_projects(self) -> Optional[List[Dict]]:
+        """
+        Tải danh sách projects từ WeWork, None nếu request lỗi
+
+        Khi có snapshot store: lưu danh sách vừa tải, và dùng danh sách đã lưu
+        nếu đang offline hoặc WeWork không phản hồi.
+        """
+        store = self.snapshot_store
+        if self.offline:
+            return store.get_project_list() if store else None
+        data = self._fetch_data_with_retry(*self._projects_request())
+        if not data:
+            return store.get_project_list() if store else None
+        projects = data.get('projects', [])
+        if store:
+            store.put_project_list(projects)
+        return projects
+
+    def _refresh_projects(self) -> None:
+        """Refresh cache danh sách projects (chạy ở background thread)"""
+        try:
+            with upstream_priority(PRIORITY_BACKGROUND):
+                projects = self._download_projects()
+        except Exception as e:
+            print(f"Error refreshing projects: {str(e)}")
+            projects = None
+        self._projects_refreshed(projects)
+
+    def fetch_projects(self, force_refresh: bool = False) -> List[Dict]:
+        """
+        Lấy danh sách tất cả projects (có cache TTL)
+
+        Args:
+            force_refresh (bool): Bỏ qua cache và tải lại từ WeWork
+        """
+        projects, needs_refresh = self._cached_projects(force_refresh)
+        if projects is not None:
+            if needs_refresh:
+                threading.Thread(target=self._refresh_projects, daemon=True).start()
+            return projects
+        return self._projects_downloaded(self._download_projects())
+
+    def _download_project_details(self, project_id: str) -> Optional[Dict]:
+        """Tải chi tiết project từ WeWork"""
+        return self._fetch_data_with_retry(*self._project_details_request(project_id))
+
+    def _refresh_project_snapshot(self, project_id: str) -> None:
+        """Tải lại snapshot của project (chạy ở background thread)"""
+        try:
+            with upstream_priority(PRIORITY_BACKGROUND):
+                data = self._download_project_details(project_id)
+            if data is not None:
+                self.snapshot_store.put(project_id, data)
+        except Exception as e:
+            print(f"Error refreshing project {project_id}: {str(e)}")
+        finally:
+            self.snapshot_store.end_refresh(project_id)
+
+    def _load_project_details(self, project_id: str) -> Tuple[Optional[Dict], Optional[float]]:
+        """Như _read_project_details, ghi nhận project được dùng nếu lấy được dữ liệu"""
+        payload, fetched_at = self._read_project_details(project_id)
+        self._project_loaded(project_id, payload)
+        return payload, fetched_at
+
+    def _read_project_details(self, project_id: str) -> Tuple[Optional[Dict], Optional[float]]:
+        """
+        Lấy chi tiết project, ưu tiên snapshot store
+
+        Snapshot còn mới được dùng thẳng; snapshot cũ (stale) được trả ngay và
+        refresh ở background; snapshot quá cũ hoặc chưa có thì tải từ WeWork,
+        nếu WeWork lỗi thì vẫn dùng snapshot cũ.
+
+        Returns:
+            (payload, fetched_at): fetched_at là phiên bản snapshot, None nếu không dùng store
+        """
+        store = self.snapshot_store
+        if store is None:
+            return self._download_project_details(project_id), None
+
+        snapshot, state = store.lookup(project_id)
+        plan, refresh = self._plan_project_read(project_id, state)
+        if refresh:
+            threading.Thread(
+                target=self._refresh_project_snapshot, args=(project_id,), daemon=True
+            ).start()
+        if plan != READ_UPSTREAM:
+            return self._snapshot_details(snapshot)
+
+        data = self._download_project_details(project_id)
+        if data is None:
+            return self._snapshot_details(snapshot)
+        return data, store.put(project_id, data)
+
+    def fetch_project_details(self, project_id: str) -> Optional[Dict]:
+        """Lấy chi tiết của một project"""
+        return self._load_project_details(project_id)[0]
+
+    def search_projects(self, search_text: str, limit: int = 10) -> List[Dict]:
+        """
+        Tìm kiếm projects theo tên
+        """
+        projects = self.fetch_projects()
+        if not projects:
+            return []
+        return self.rank_projects(projects, search_text, limit)
+
+    def get_project_analysis(self, project_id: str, fields: Optional[List[str]] = None) -> 'pd.DataFrame':
         """
         Lấy và phân tích dữ liệu project
         """
-        project_data = self.fetch_project_details(project_id)
+        project_data, fetched_at = self._load_project_details(project_id)
         
-        if project_data:
-            return self.task_analyzer.analyze_tasks(project_data)
-        else:
-            return pd.DataFrame()
+        if not project_data:
+            return self._analysis_error(project_id)
+        if fetched_at is not None:
+            return self.snapshot_store.analyze_tasks(
+                self.task_analyzer, project_id, project_data, fetched_at, fields
+            )
+        return self.task_analyzer.analyze_tasks(project_data, fields)
+
+    def analyze_projects(self, project_ids: List[str], max_concurrency: int = 8) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Phân tích đồng thời nhiều projects
+
+        Args:
+            project_ids (List[str]): Danh sách ID dự án
+            max_concurrency (int): Số project được tải và phân tích cùng lúc
+
+        Returns:
+            Dict project_id -> tóm tắt tasks (None nếu không tải được project)
+        """
+        def analyze_one(project_id: str) -> Optional[Dict[str, Any]]:
+            # Job nhiều project nhường upstream cho các lời gọi tương tác
+            with upstream_priority(PRIORITY_BULK):
+                project_data = self.fetch_project_details(project_id)
+            if not project_data:
+                return None
+            return self.task_analyzer.analyze_and_summarize(project_data)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            summaries = list(executor.map(analyze_one, project_ids))
+        return dict(zip(project_ids, summaries))
+
+    def get_project_statistics(self, project_id: str) -> Dict[str, Any]:
+        """
+        Lấy thống kê tasks của project (không dựng DataFrame)
+        """
+        project_data = self.fetch_project_details(project_id)
+        return self.task_analyzer.compute_statistics(project_data or {})
 
     def get_project_info(self, project_id: str) -> Optional[Dict]:
         """Lấy thông tin cơ bản của project"""
-        projects = self.fetch_projects()
-        for project in projects:
-            if project['id'] == project_id:
-                return project
-        return None
+        return self._find_project(self.fetch_projects(), project_id)
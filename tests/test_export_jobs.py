@@ -0,0 +1,62 @@
+import asyncio
+import os
+
+import pandas as pd
+
+from data.export_jobs import JOB_COMPLETED, JOB_FAILED, ExportJobManager
+
+
+class FakeClient:
+    def __init__(self, df):
+        self.df = df
+
+    async def get_project_analysis(self, project_id, fields=None):
+        return self.df.copy()
+
+
+def failed_analysis():
+    df = pd.DataFrame()
+    df.attrs['error'] = 'Could not load project 1 from WeWork'
+    return df
+
+
+async def run_jobs(manager, project_ids):
+    jobs = [manager.submit(project_id, f'Project {project_id}')[0] for project_id in project_ids]
+    while manager._tasks:
+        await asyncio.sleep(0.01)
+    return jobs
+
+
+def test_upstream_failure_fails_job(tmp_path):
+    manager = ExportJobManager(FakeClient(failed_analysis()), str(tmp_path))
+    job, = asyncio.run(run_jobs(manager, ['1']))
+    assert job.state == JOB_FAILED
+    assert job.error == 'Could not load project 1 from WeWork'
+    assert job.path is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_export_writes_csv(tmp_path):
+    df = pd.DataFrame({'Tên công việc': ['A', 'B', 'C'], 'Trạng thái': ['Hoàn thành'] * 3})
+    manager = ExportJobManager(FakeClient(df), str(tmp_path), chunk_rows=2)
+    job, = asyncio.run(run_jobs(manager, ['1']))
+    assert job.state == JOB_COMPLETED
+    assert job.rows_written == 3
+    assert pd.read_csv(job.path, encoding='utf-8-sig').equals(df)
+
+
+def test_prune_deletes_files(tmp_path):
+    df = pd.DataFrame({'Tên công việc': ['A']})
+    manager = ExportJobManager(FakeClient(df), str(tmp_path), max_history=1)
+
+    async def scenario():
+        first, = await run_jobs(manager, ['1'])
+        second, = await run_jobs(manager, ['2'])
+        third, = await run_jobs(manager, ['3'])
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert manager.get(first.id) is None
+    assert not os.path.exists(first.path)
+    assert os.path.exists(second.path) and os.path.exists(third.path)
+    assert [job['job_id'] for job in manager.list_jobs()] == [third.id, second.id]
@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+pytest.importorskip('bs4')
+
+from data.html_cleaner import _TextExtractor, _clean_markup, clean_html, clean_html_reference
+
+# Nội dung đi được tokenizer regex (feed_simple)
+SIMPLE_CORPUS = [
+    '',
+    'Không có thẻ nào',
+    '  nhiều   khoảng\n\ntrắng\t ',
+    'a > b',
+    '<p>Mô tả công việc</p>',
+    '<p>Dòng 1</p><p>Dòng 2</p>',
+    '<ul><li>Một</li><li>Hai</li></ul>',
+    '<ol><li>Một<li>Hai</ol>',
+    '<p>Xuống<br>dòng<br/>nữa<br /></p>',
+    '<p style="color: red">Có style</p>',
+    '<p class="x">Có class</p>',
+    '<li class="item">Có attr</li>',
+    '<br class="x">',
+    '<span style="font-weight:bold"><strong>Đậm</strong></span>',
+    '<div><p>Chưa đóng',
+    '<p>Đóng thừa</p></p></div>',
+    '<P>Chữ hoa</P><LI>Mục</LI>',
+    '<img src="a.png"><p>Ảnh</p>',
+    '<img src="a.png"/></img>',
+    '<a href="https://example.com/?a=1&amp;b=2">Link</a>',
+    'Tom &amp; Jerry &lt;3 &gt; &nbsp;cách&nbsp;',
+    '&copy; &eacute; &hellip; &unknownentity;',
+    '&#65;&#x42;&#X43; &#150; &#129; &#0; &#1114112;',
+    '<p>a &lt;b&gt; c</p>',
+    '<table><tr><td>1</td><td>2</td></tr></table>',
+    '<p><em>Nghiêng</em> và <u>gạch</u></p>',
+    '<p a=1 b>Attr không có giá trị</p>',
+    '<p>x</p\n>',
+]
+
+# Nội dung cần html.parser (feed_simple trả về False)
+PARSER_CORPUS = [
+    'a < b',
+    'Tom & Jerry',
+    '&amp Không có dấu chấm phẩy',
+    '&copy 2024',
+    '<p>Chưa đóng thẻ <b',
+    '<p data-x="a<b">Attr có dấu nhỏ hơn</p>',
+    '<1p>Không phải thẻ</1p>',
+    '</>',
+    '< p>Có khoảng trắng</ p>',
+    '<p/ >x',
+    '&#xZZ; &#; &#65',
+]
+
+# Nội dung cleaner nhanh chuyển cho BeautifulSoup
+UNSUPPORTED_CORPUS = [
+    '<p>Có <!-- comment --> ở giữa</p>',
+    '<script>alert("<p>")</script><p>Sau script</p>',
+    '<style>p { color: red }</style>Text',
+    '<!DOCTYPE html><p>Doc</p>',
+    '<?php echo 1 ?><p>PI</p>',
+    '<![CDATA[x]]><p>CDATA</p>',
+    '<textarea><p>raw</p></textarea>',
+]
+
+FUZZ_TOKENS = [
+    '<p>', '</p>', '<li>', '</li>', '<ul>', '</ul>', '<ol>', '</ol>', '<br>', '<br/>', '<br />',
+    '<span>', '</span>', '<strong>', '</strong>', '<div>', '</div>', '<img src="x">', '</img>',
+    '<p style="a:b">', '<li class="c">', '<br id="d">', '<P>', '</LI>', '<b', 'a', 'b c', ' ',
+    '\n', 'Việt', '&amp;', '&nbsp;', '&lt;', '&gt;', '&copy', '&#65;', '&#x41;', '&#150;', '&',
+    '<', '>', '=', '"', "'", '/', '<!-- x -->', '<script>s</script>', '</', '<1',
+]
+
+
+def reference(content):
+    return clean_html_reference(content)
+
+
+def takes_simple_path(content):
+    return _TextExtractor().feed_simple(content)
+
+
+@pytest.fixture(autouse=True)
+def clear_memo():
+    _clean_markup.cache_clear()
+    yield
+    _clean_markup.cache_clear()
+
+
+@pytest.mark.parametrize('content', SIMPLE_CORPUS)
+def test_regex_path_matches_reference(content):
+    assert takes_simple_path(content)
+    assert clean_html(content) == reference(content)
+
+
+@pytest.mark.parametrize('content', PARSER_CORPUS)
+def test_html_parser_path_matches_reference(content):
+    assert not takes_simple_path(content)
+    assert clean_html(content) == reference(content)
+
+
+@pytest.mark.parametrize('content', UNSUPPORTED_CORPUS)
+def test_unsupported_markup_matches_reference(content):
+    assert clean_html(content) == reference(content)
+
+
+@pytest.mark.parametrize('content', [None, 123, 1.5, ['<p>x</p>'], {'a': 1}])
+def test_non_string_content(content):
+    assert clean_html(content) == reference(content) == ''
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_fuzz_matches_reference(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        content = ''.join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(1, 30)))
+        assert clean_html(content) == reference(content), content
@@ -0,0 +1,113 @@
+import http.client
+import importlib
+import json
+import os
+import threading
+
+import pytest
+
+from benchmarks.stub_server import StubWeWorkAPI
+
+
+@pytest.fixture(scope='module')
+def stub():
+    api = StubWeWorkAPI(num_projects=5, task_sizes=(20,), latency=0)
+    api.start()
+    yield api
+    api.stop()
+
+
+@pytest.fixture(scope='module')
+def server(stub, tmp_path_factory):
+    # Cấu hình server trước khi import: trỏ tới stub, thử lại một lần, không giới hạn tốc độ upstream
+    os.environ.update({
+        'WEWORK_BASE_URL': stub.base_url,
+        'WEWORK_UPSTREAM_RATE': '0',
+        'WEWORK_RETRY_ATTEMPTS': '1',
+        'WEWORK_BREAKER_THRESHOLD': '0',
+        'WEWORK_EXPORT_DIR': str(tmp_path_factory.mktemp('exports')),
+        'WEWORK_SNAPSHOT_DIR': str(tmp_path_factory.mktemp('snapshots')),
+    })
+    module = importlib.import_module('wework_http_server')
+    httpd = module.MCPThreadingHTTPServer(('127.0.0.1', 0), module.MCPHTTPHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        conn.request(method, path, data, {'Content-Type': 'application/json', **(headers or {})})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def test_stream_reports_upstream_failure(server, stub):
+    project_id = stub.projects[0]['id']
+    status, headers, body = request(server, 'POST', '/api/project/analyze',
+                                    {'project_id': project_id, 'stream': True})
+    assert status == 200 and headers['Transfer-Encoding'] == 'chunked'
+    assert json.loads(body.splitlines()[-1])['summary']['total_tasks'] == 20
+
+    # Project chưa có snapshot nên phải gọi WeWork
+    project_id = stub.projects[1]['id']
+    stub.error_rate = 1.0
+    try:
+        status, headers, body = request(server, 'POST', '/api/project/analyze',
+                                        {'project_id': project_id, 'stream': True})
+        assert status == 502
+        assert 'Transfer-Encoding' not in headers
+        assert 'Could not load project' in json.loads(body)['error']
+
+        status, _, body = request(server, 'POST', '/api/project/analyze',
+                                  {'project_id': project_id, 'export_csv': True})
+        result = json.loads(body)
+        assert result['success'] is False
+        assert 'Could not load project' in result['error']
+        assert 'Could not load project' in result['export_job']['error']
+    finally:
+        stub.error_rate = 0.0
+
+
+def test_summary_shapes_match(server, stub):
+    project_id = stub.projects[0]['id']
+    _, _, body = request(server, 'POST', '/api/project/analyze', {'project_id': project_id, 'limit': 5})
+    paged = json.loads(body)
+    _, _, body = request(server, 'POST', '/api/project/analyze', {'project_id': project_id, 'summary_only': True})
+    summary_only = json.loads(body)
+    assert len(paged['tasks']) == 5
+    assert paged['summary'] == summary_only['summary']
+    assert set(paged['summary']) == {
+        'total_tasks', 'completed_tasks', 'in_progress_tasks', 'failed_tasks',
+        'completion_rate', 'status_breakdown',
+    }
+
+
+def test_unchanged_polls_get_304_without_upstream_calls(server, stub):
+    project_id = stub.projects[2]['id']
+    query = {'project_id': project_id, 'limit': 5}
+    # Lần đầu tạo snapshot; từ lần sau ETag được dựng từ phiên bản snapshot
+    request(server, 'POST', '/api/project/analyze', query)
+    status, headers, body = request(server, 'POST', '/api/project/analyze', query)
+    assert status == 200
+    etag = headers['ETag']
+
+    upstream_calls = dict(stub.requests)
+    status, headers, body = request(server, 'POST', '/api/project/analyze', query, {'If-None-Match': etag})
+    assert status == 304 and body == b''
+    assert headers['ETag'] == etag
+    assert stub.requests == upstream_calls
+
+    status, headers, _ = request(server, 'POST', '/api/project/analyze', {**query, 'limit': 6},
+                                 {'If-None-Match': etag})
+    assert status == 200 and headers['ETag'] != etag
+
+    status, headers, _ = request(server, 'GET', '/api/projects?search=Marketing')
+    assert status == 200
+    status, _, _ = request(server, 'GET', '/api/projects?search=Marketing', headers={'If-None-Match': headers['ETag']})
+    assert status == 304
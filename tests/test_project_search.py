@@ -0,0 +1,57 @@
+import pytest
+
+from data import wework_client
+from data.wework_client import ProjectListCache, ProjectMatcher, RecentProjects
+
+PROJECTS = [
+    {'id': '1', 'name': 'Mobile App Redesign'},
+    {'id': '2', 'name': 'Website Migration'},
+    {'id': '3', 'name': 'Kế hoạch Marketing Q3'},
+    {'id': '4', 'name': 'Data Warehouse'},
+]
+
+
+class Matcher(ProjectMatcher):
+    def __init__(self):
+        self.project_cache = ProjectListCache()
+        self.recent_projects = RecentProjects()
+
+
+class BrokenVectorizer:
+    def __init__(self, **kwargs):
+        pass
+
+    def fit_transform(self, names):
+        raise MemoryError('fit failed')
+
+
+@pytest.fixture(params=['import-failed', 'fit-failed'])
+def without_tfidf(request, monkeypatch):
+    vectorizer = None if request.param == 'import-failed' else BrokenVectorizer
+    monkeypatch.setattr(wework_client, 'load_tfidf_vectorizer', lambda: vectorizer)
+
+
+def test_rank_projects_falls_back_to_string_similarity(without_tfidf):
+    matcher = Matcher()
+    assert not matcher.project_cache.search_index_for(PROJECTS).vectorized
+    results = matcher.rank_projects(PROJECTS, 'Mobil Ap Redesgn')
+    assert [project['id'] for project in results][:1] == ['1']
+
+
+def test_rank_projects_fallback_builds_one_index(without_tfidf, monkeypatch):
+    built = []
+    index_class = wework_client.ProjectSearchIndex
+    monkeypatch.setattr(wework_client, 'ProjectSearchIndex', lambda projects: built.append(projects) or index_class(projects))
+    Matcher().rank_projects(PROJECTS, 'Website Migratoin')
+    assert built == [PROJECTS]
+
+
+def test_rank_projects_fallback_keeps_substring_matches(without_tfidf):
+    results = Matcher().rank_projects(PROJECTS, 'marketing')
+    assert [project['id'] for project in results][:1] == ['3']
+
+
+@pytest.mark.skipif(not wework_client.SKLEARN_AVAILABLE, reason='sklearn is not installed')
+def test_rank_projects_with_tfidf():
+    results = Matcher().rank_projects(PROJECTS, 'Mobil Ap Redesgn')
+    assert [project['id'] for project in results][:1] == ['1']
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from benchmarks.stub_server import StubWeWorkAPI
+from data.async_wework_client import AsyncWeWorkClient
+from data.upstream_scheduler import PRIORITY_BACKGROUND, upstream_priority
+from data.wework_client import WeWorkClient
+
+
+@pytest.fixture(scope='module')
+def stub():
+    api = StubWeWorkAPI(num_projects=3, task_sizes=(5,), latency=0)
+    api.start()
+    yield api
+    api.stop()
+
+
+def test_only_found_projects_are_recorded(stub):
+    client = WeWorkClient('token', base_url=stub.base_url)
+    try:
+        first, second = stub.projects[0]['id'], stub.projects[1]['id']
+        assert client.get_project_info('missing') is None
+        assert client.fetch_project_details('missing') is None
+        assert client.recent_projects.most_recent() == []
+
+        assert client.get_project_info(first) is not None
+        assert client.fetch_project_details(second) is not None
+        assert client.recent_projects.most_recent() == [second, first]
+
+        with upstream_priority(PRIORITY_BACKGROUND):
+            client.get_project_info(first)
+        assert client.recent_projects.most_recent() == [second, first]
+    finally:
+        client.close()
+
+
+def test_async_client_only_records_found_projects(stub):
+    async def scenario():
+        client = AsyncWeWorkClient('token', base_url=stub.base_url)
+        try:
+            project_id = stub.projects[0]['id']
+            assert await client.get_project_info('missing') is None
+            assert await client.fetch_project_details('missing') is None
+            assert client.recent_projects.most_recent() == []
+            assert await client.get_project_info(project_id) is not None
+            return client.recent_projects.most_recent()
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(scenario()) == [stub.projects[0]['id']]
+
+
+def test_async_client_stays_on_its_event_loop(stub):
+    client = AsyncWeWorkClient('token', base_url=stub.base_url)
+    project_id = stub.projects[0]['id']
+
+    async def fetch():
+        return await client.fetch_project_details(project_id)
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(fetch()) is not None
+        with pytest.raises(RuntimeError):
+            asyncio.run(fetch())
+        loop.run_until_complete(client.aclose())
+    finally:
+        loop.close()
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from benchmarks.stub_server import StubWeWorkAPI
+from data.async_wework_client import AsyncWeWorkClient
+from data.resilience import (
+    CIRCUIT_CLOSED, CIRCUIT_OPEN, READ_SNAPSHOT, READ_SNAPSHOT_AND_REFRESH, READ_UNAVAILABLE,
+    READ_UPSTREAM, CircuitBreaker, RetryPolicy, UpstreamCall, plan_snapshot_read,
+)
+from data.snapshot_store import SNAPSHOT_FRESH, SNAPSHOT_STALE
+from data.upstream_scheduler import PRIORITY_BACKGROUND, UpstreamScheduler, upstream_priority
+from data.wework_client import WeWorkClient, WeWorkClientBase
+
+
+def make_call(max_attempts=3, deadline=30, failure_threshold=5):
+    return UpstreamCall(RetryPolicy(max_attempts=max_attempts, base_delay=0.01, deadline=deadline),
+                        CircuitBreaker(failure_threshold=failure_threshold), 'http://wework/x', 'x')
+
+
+def test_success_and_client_errors_are_final():
+    call = make_call(deadline=0)
+    call.breaker.record_failure()
+    assert call.begin(5, 30) == (5, 30)
+    assert call.response_received(200, 'OK', None)
+    assert call.breaker.stats()['consecutive_failures'] == 0
+    assert call.response_received(404, 'Not Found', None)
+    assert call.breaker.state == CIRCUIT_CLOSED
+
+
+def test_retryable_status_is_retried_until_attempts_run_out():
+    call = make_call(max_attempts=2)
+    call.begin(5, 30)
+    assert not call.response_received(503, 'Service Unavailable', None)
+    assert call.retry_delay(0) is not None
+    call.begin(5, 30)
+    call.request_failed('timed out')
+    assert call.retry_delay(1) is None
+    assert call.error == 'timed out'
+    assert call.breaker.stats()['consecutive_failures'] == 2
+
+
+def test_retry_after_beyond_deadline_stops():
+    call = make_call(deadline=0.5)
+    connect_timeout, read_timeout = call.begin(5, 30)
+    assert connect_timeout <= 0.5 and read_timeout <= 0.5
+    assert not call.response_received(429, 'Too Many Requests', '10')
+    assert call.retry_delay(0) is None
+
+
+def test_open_breaker_stops_retrying_and_sending():
+    call = make_call(failure_threshold=1)
+    call.begin(5, 30)
+    call.request_failed('connection refused')
+    assert call.retry_delay(0) is None
+    assert call.breaker.state == CIRCUIT_OPEN
+    assert not call.allowed()
+
+
+def test_unsent_probe_is_released():
+    call = make_call(failure_threshold=1)
+    call.breaker.reset_timeout = 0
+    call.breaker.record_failure()
+    assert call.allowed()
+    assert not call.breaker.allow()
+    call.no_slot()
+    assert call.breaker.allow()
+
+
+@pytest.mark.parametrize('state,offline,plan', [
+    (SNAPSHOT_FRESH, False, READ_SNAPSHOT),
+    (SNAPSHOT_STALE, False, READ_SNAPSHOT_AND_REFRESH),
+    ('expired', False, READ_UPSTREAM),
+    (None, False, READ_UPSTREAM),
+    (SNAPSHOT_STALE, True, READ_SNAPSHOT),
+    ('expired', True, READ_SNAPSHOT),
+    (None, True, READ_UNAVAILABLE),
+])
+def test_plan_snapshot_read(state, offline, plan):
+    assert plan_snapshot_read(state, offline) == plan
+
+
+def fetch_sync(base_url, breaker, project_id):
+    client = WeWorkClient('token', base_url=base_url, circuit_breaker=breaker,
+                          retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01, deadline=0.5))
+    try:
+        return client.fetch_project_details(project_id)
+    finally:
+        client.close()
+
+
+def fetch_async(base_url, breaker, project_id):
+    async def fetch():
+        client = AsyncWeWorkClient('token', base_url=base_url, circuit_breaker=breaker,
+                                   retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01, deadline=0.5))
+        try:
+            return await client.fetch_project_details(project_id)
+        finally:
+            await client.aclose()
+    return asyncio.run(fetch())
+
+
+@pytest.fixture
+def stub():
+    api = StubWeWorkAPI(num_projects=3, task_sizes=(5,), latency=0)
+    api.start()
+    yield api
+    api.stop()
+
+
+@pytest.mark.parametrize('fetch', [fetch_sync, fetch_async])
+def test_clients_share_retry_decisions(stub, fetch):
+    breaker = CircuitBreaker(failure_threshold=1)
+    project_id = stub.projects[0]['id']
+    assert fetch(stub.base_url, breaker, project_id)['tasks']
+    assert fetch(stub.base_url, breaker, 'missing') is None
+    assert breaker.state == CIRCUIT_CLOSED
+
+    # 503 kèm Retry-After: 1 vượt deadline 0.5 giây nên chỉ gửi một lần rồi mở breaker
+    stub.error_rate = 1.0
+    before = stub.requests.get('project/get.full', 0)
+    assert fetch(stub.base_url, breaker, project_id) is None
+    assert breaker.state == CIRCUIT_OPEN
+    assert fetch(stub.base_url, breaker, project_id) is None
+    assert stub.requests['project/get.full'] == before + 1
+
+
+def test_open_breaker_does_not_take_a_slot(stub):
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    scheduler = UpstreamScheduler(max_concurrency=1, rate=1)
+    client = WeWorkClient('token', base_url=stub.base_url, circuit_breaker=breaker, scheduler=scheduler)
+    try:
+        assert client.fetch_project_details(stub.projects[0]['id']) is None
+    finally:
+        client.close()
+    stats = scheduler.stats()
+    assert stats['lanes']['interactive']['granted'] == 0
+    assert stats['tokens'] == 1
+
+
+def test_requests_are_not_coalesced_across_lanes():
+    key = WeWorkClientBase._flight_key('http://wework/x', {'id': 1})
+    assert WeWorkClientBase._flight_key('http://wework/x', {'id': 1}) == key
+    with upstream_priority(PRIORITY_BACKGROUND):
+        assert WeWorkClientBase._flight_key('http://wework/x', {'id': 1}) != key
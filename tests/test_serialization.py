@@ -0,0 +1,49 @@
+import json
+import math
+
+import pandas as pd
+import pytest
+
+from data.serialization import ORJSON_AVAILABLE, DataFrameRecords, JSONSerializer
+
+BACKENDS = ['json'] + (['orjson'] if ORJSON_AVAILABLE else [])
+
+
+def make_frame():
+    return pd.DataFrame({
+        'Tên công việc': ['a","b\\', '', '"', 'Thiết kế 100%'],
+        'Deadline': ['2024-01-01', None, float('nan'), '2024-02-01'],
+        'score': [1.5, float('nan'), float('inf'), -2.0],
+        'count': [1, 2, 3, 4],
+        'done': [True, False, True, False],
+        '%s': [{'x': 1}, [1, 2], None, 'text'],
+    })
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_records_match_plain_python(backend):
+    df = make_frame()
+    expected = DataFrameRecords(df).to_list()
+    assert expected[1]['Deadline'] is None and expected[2]['Deadline'] is None
+    assert expected[1]['score'] is None and expected[2]['score'] is None
+    
+    serializer = JSONSerializer(backend)
+    assert json.loads(serializer.dumps({'tasks': DataFrameRecords(df)})) == {'tasks': expected}
+    lines = [json.loads(line) for line in serializer.iter_records(df, prefix=b'"type":"task"')]
+    assert lines == [{'type': 'task', **record} for record in expected]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_empty_frames(backend):
+    serializer = JSONSerializer(backend)
+    assert json.loads(serializer.encode_records(pd.DataFrame({'a': []}))) == []
+    assert json.loads(serializer.encode_records(pd.DataFrame(index=range(2)))) == [{}, {}]
+
+
+def test_backends_agree_on_nan():
+    if not ORJSON_AVAILABLE:
+        pytest.skip('orjson is not installed')
+    df = make_frame()
+    stdlib = json.loads(JSONSerializer('json').encode_records(df))
+    assert stdlib == json.loads(JSONSerializer('orjson').encode_records(df))
+    assert not any(isinstance(value, float) and math.isnan(value) for row in stdlib for value in row.values())
@@ -0,0 +1,106 @@
+import pytest
+
+from data.wework_client import (
+    STATUS_COMPLETED, STATUS_FAILED, STATUS_IN_PROGRESS, TaskAnalyzer, aggregate_summaries,
+)
+
+
+def make_task(i, **overrides):
+    task = {
+        'name': f'Task {i}',
+        'username': f'user{i % 3}',
+        'tasklist': {'name': f'List {i % 2}'},
+        'followers': [{'username': 'follower'}],
+        'content': '<p>Nội dung</p>',
+        'complete': '100.00' if i % 3 == 0 else '50.00',
+        'start_time': 1700000000 + i * 86400,
+        'has_deadline': '1',
+        'deadline': 1700500000 + i * 86400,
+        'completed_time': 1700300000 + i * 86400 if i % 3 == 0 else 0,
+        'metatype': 'task',
+    }
+    if i % 5 == 0:
+        task['data'] = {'failed_reason': {'reason': 'Thiếu nguồn lực'}}
+    task.update(overrides)
+    return task
+
+
+def assert_matches_parse_tasks(response_data):
+    analyzer = TaskAnalyzer()
+    statistics = analyzer.compute_statistics(response_data)
+    df = analyzer.analyze_tasks(response_data)
+    expected = df['Trạng thái'].value_counts().to_dict() if not df.empty else {}
+    assert statistics['total_tasks'] == len(df)
+    assert statistics['status_counts'] == expected
+    return statistics
+
+
+@pytest.mark.parametrize('field,value', [
+    ('start_time', '99999999999999'),
+    ('start_time', 99999999999999),
+    ('start_time', 253402297199),
+    ('start_time', -62135596800),
+    ('deadline', '99999999999999'),
+    ('deadline', 253402297199),
+    ('completed_time', '99999999999999'),
+    ('completed_time', 253402297199),
+])
+def test_out_of_range_timestamps_are_counted(field, value):
+    tasks = [make_task(i) for i in range(12)]
+    tasks[3][field] = value
+    tasks[4][field] = value
+    statistics = assert_matches_parse_tasks({'tasks': tasks, 'subtasks': []})
+    assert statistics['total_tasks'] == 12
+
+
+def test_skips_same_tasks_as_parse_tasks():
+    tasks = [make_task(i) for i in range(10)]
+    tasks[1]['has_deadline'] = 'yes'
+    tasks[2]['followers'] = ['not-a-dict']
+    tasks[3]['completed_time'] = 'abc'
+    tasks[4]['start_time'] = 10 ** 20
+    tasks[5]['start_time'] = '99999999999999'
+    tasks[6]['followers'] = [{'username': None}]
+    tasks[7]['has_deadline'] = None
+    statistics = assert_matches_parse_tasks({'tasks': tasks, 'subtasks': []})
+    assert statistics['total_tasks'] == 4
+    assert [TaskAnalyzer._task_is_parseable(task) for task in tasks[:8]] == [
+        True, False, False, False, False, True, False, False,
+    ]
+
+
+def test_subtasks_and_statuses():
+    tasks = [make_task(i) for i in range(7)]
+    subtasks = [make_task(i, origin_export={'name': 'Parent'}, deadline='99999999999999') for i in range(7, 15)]
+    statistics = assert_matches_parse_tasks({'tasks': tasks, 'subtasks': subtasks})
+    assert statistics['status_counts'][STATUS_FAILED] == 3
+    assert statistics['status_counts'][STATUS_COMPLETED] == 4
+
+
+def test_aggregate_summaries():
+    analyzer = TaskAnalyzer()
+    payloads = [
+        {'tasks': [make_task(i) for i in range(6)]},
+        {'tasks': [make_task(i) for i in range(6, 10)], 'subtasks': [make_task(10, origin_export={})]},
+        {'tasks': []},
+    ]
+    summaries = [analyzer.analyze_and_summarize(payload) for payload in payloads]
+    aggregate = aggregate_summaries(summaries)
+    assert aggregate['projects'] == 3
+    assert aggregate['total_tasks'] == 11
+    assert aggregate['failed_tasks'] == 3
+    assert aggregate['completed_tasks'] == 3
+    assert aggregate['in_progress_tasks'] == 5
+    assert aggregate['status_breakdown'] == {STATUS_FAILED: 3, STATUS_COMPLETED: 3, STATUS_IN_PROGRESS: 5}
+    assert aggregate['completion_rate'] == round(3 / 11 * 100, 2)
+    assert aggregate_summaries([])['completion_rate'] == 0
+
+
+def test_convert_timestamps_matches_convert_timestamp():
+    timestamps = [
+        1700000000, '1700000000', 0, '0', None, '', ' ', 'abc', 1.5, -86400,
+        -9300000000, 9300000000, 253402297199, '99999999999999', 1711846800,
+    ]
+    assert TaskAnalyzer.convert_timestamps(timestamps) == [
+        TaskAnalyzer.convert_timestamp(timestamp) for timestamp in timestamps
+    ]
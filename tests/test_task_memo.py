@@ -0,0 +1,22 @@
+from benchmarks.fixtures import make_project_payload
+from data.wework_client import TaskAnalyzer
+
+
+def test_small_projects_skip_the_memo():
+    payload = make_project_payload(50)
+    analyzer = TaskAnalyzer(memo_size=1000, memo_min_rows=100)
+    first = analyzer.analyze_tasks(payload)
+    second = analyzer.analyze_tasks(payload)
+    assert analyzer.memo.stats()['size'] == 0
+    assert second.attrs['reused_rows'] == 0
+    assert second.equals(first)
+
+
+def test_large_projects_reuse_parsed_rows():
+    payload = make_project_payload(200)
+    analyzer = TaskAnalyzer(memo_size=1000, memo_min_rows=100)
+    first = analyzer.analyze_tasks(payload)
+    second = analyzer.analyze_tasks(payload)
+    assert second.attrs['reused_rows'] == 200
+    assert second.equals(first)
+    assert first.equals(TaskAnalyzer().analyze_tasks(payload))
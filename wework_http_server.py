@@ -1,16 +1,25 @@
 import asyncio
+import gzip
+import hashlib
 import json
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+import time
+import zlib
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote
 import threading
 from mcp.server.fastmcp import FastMCP
-from data.wework_client import WeWorkClient
 from typing import Dict, List, Optional, Any
 import pandas as pd
 from dotenv import load_dotenv
 import logging
 
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,50 +32,341 @@ WEWORK_ACCESS_TOKEN = os.getenv('WEWORK_ACCESS_TOKEN', '5654-FCVE2Z8T53L7WTFKVXF
 PORT = int(os.getenv('PORT', 8000))
 HOST = os.getenv('HOST', '0.0.0.0')
 
+# Chế độ phục vụ: 'threaded' (mặc định, mỗi kết nối một thread) hoặc 'single'
+HTTP_SERVER_MODE = os.getenv('HTTP_SERVER_MODE', 'threaded').lower()
+# Số request API được xử lý đồng thời; request vượt quá sẽ chờ tối đa HTTP_QUEUE_TIMEOUT giây
+HTTP_MAX_WORKERS = int(os.getenv('HTTP_MAX_WORKERS', 16))
+HTTP_QUEUE_TIMEOUT = float(os.getenv('HTTP_QUEUE_TIMEOUT', 30))
+# Chỉ nén response lớn hơn ngưỡng này (bytes)
+HTTP_COMPRESS_MIN_SIZE = int(os.getenv('HTTP_COMPRESS_MIN_SIZE', 1024))
+
+# Import all MCP tools and the shared WeWork client from original server
+from wework_mcp_server import (
+    wework_client, warmup, warmup_lifespan, export_jobs,
+    search_projects, get_project_details, build_task_analysis, analyze_projects,
+    find_project_by_name, get_project_statistics, test_connection, json_serializer,
+    export_project_tasks, get_export_status, data_version
+)
+from data.wework_client import TaskAnalyzer
+from data.export_jobs import JOB_COMPLETED
+from data.metrics import REGISTRY, SIZE_BUCKETS
+
 # Create MCP server
-mcp = FastMCP("WeWork Project Management Server")
+mcp = FastMCP("WeWork Project Management Server", lifespan=warmup_lifespan)
 
-# Initialize WeWork client
-try:
-    wework_client = WeWorkClient(WEWORK_ACCESS_TOKEN)
-    logger.info("WeWork client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize WeWork client: {e}")
-    wework_client = None
+# Event loop dùng chung cho các MCP tools (async). AsyncWeWorkClient giữ
+# connection pool gắn với một loop, nên mọi handler thread đều gửi coroutine
+# về loop này thay vì tạo loop riêng cho mỗi request.
+tools_loop = asyncio.new_event_loop()
+threading.Thread(target=tools_loop.run_forever, name="mcp-tools-loop", daemon=True).start()
 
-# Import all MCP tools from original server
-from wework_mcp_server import (
-    search_projects, get_project_details, analyze_project_tasks,
-    find_project_by_name, get_project_statistics, test_connection
+def run_tool(coro):
+    """Chạy coroutine của tool trên event loop dùng chung và chờ kết quả"""
+    return asyncio.run_coroutine_threadsafe(coro, tools_loop).result()
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Chọn content-coding từ header Accept-Encoding
+    
+    Returns:
+        'br' (nếu có module brotli), 'gzip' hoặc None nếu không nén
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    
+    candidates = ['br', 'gzip'] if BROTLI_AVAILABLE else ['gzip']
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """Nén body theo content-coding đã chọn"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+def compute_etag(body: bytes) -> str:
+    """Strong ETag từ nội dung response (chưa nén)"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def version_etag(version: Optional[str], *params) -> Optional[str]:
+    """
+    Strong ETag dựng từ phiên bản dữ liệu (xem data_version) và tham số request
+
+    Dựng được trước khi tạo response nên request polling không đổi được trả
+    304 mà không phải phân tích hay serialize; None nếu chưa biết phiên bản.
+    """
+    if version is None:
+        return None
+    key = json.dumps([version, *params], sort_keys=True, default=str, ensure_ascii=False)
+    return compute_etag(b'v:' + key.encode('utf-8'))
+
+def matched_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    ETag trong If-None-Match khớp với etag (so sánh weak như RFC 9110 quy định
+    cho header này), None nếu không khớp
+    
+    Chấp nhận cả ETag của bản đã nén ("<hash>-gzip", "<hash>-br") vì cùng nội dung;
+    khi đó trả về đúng biến thể client đang giữ.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == '*':
+        return etag
+    opaque = etag.strip('"')
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag == opaque or tag in (f"{opaque}-gzip", f"{opaque}-br"):
+            return f'"{tag}"'
+    return None
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Kiểm tra If-None-Match (xem matched_etag)"""
+    return matched_etag(if_none_match, etag) is not None
+
+class WorkerLimiter:
+    """Giới hạn số request API được xử lý đồng thời"""
+    
+    def __init__(self, max_workers: int, queue_timeout: float):
+        self.max_workers = max(1, max_workers)
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.waiting = 0
+        self.rejected = 0
+    
+    def acquire(self) -> bool:
+        """Chờ một worker slot, False nếu hết thời gian chờ"""
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.busy += 1
+            else:
+                self.rejected += 1
+        return acquired
+    
+    def release(self):
+        with self._lock:
+            self.busy -= 1
+        self._slots.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'busy': self.busy,
+                'waiting': self.waiting,
+                'rejected': self.rejected,
+            }
+
+api_workers = WorkerLimiter(HTTP_MAX_WORKERS, HTTP_QUEUE_TIMEOUT)
+
+# Các route được ghi metric theo tên; route khác gộp vào 'other' để giới hạn số series
+METRIC_ROUTES = frozenset({
+    '/health', '/metrics', '/api/test', '/api/projects',
+    '/api/project/details', '/api/project/analyze', '/api/projects/analyze', '/api/exports',
+})
+EXPORTS_PREFIX = '/api/exports/'
+# Content-Type của file export khi tải về
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+}
+
+
+def metric_route(path: str) -> str:
+    """Route dùng làm label metric (ID job export được thay bằng placeholder)"""
+    if path in METRIC_ROUTES:
+        return path
+    if path.startswith(EXPORTS_PREFIX):
+        return '/api/exports/{job_id}/download' if path.endswith('/download') else '/api/exports/{job_id}'
+    return 'other'
+
+
+HTTP_LATENCY = REGISTRY.histogram(
+    'wework_http_request_seconds', 'Latency of HTTP API requests', ('method', 'route', 'status')
+)
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    'wework_http_response_bytes', 'Size of HTTP response bodies as sent (after compression)',
+    ('route',), SIZE_BUCKETS
+)
+
+def _cache_samples():
+    """Số lần tra cứu các cache của client theo kết quả"""
+    if not wework_client:
+        return
+    stats = wework_client.cache_stats()
+    for cache in ('projects', 'snapshots'):
+        if stats.get(cache):
+            yield {'cache': cache, 'result': 'hit'}, stats[cache]['hits']
+            yield {'cache': cache, 'result': 'stale_hit'}, stats[cache]['stale_hits']
+            yield {'cache': cache, 'result': 'miss'}, stats[cache]['misses']
+    if stats.get('task_memo'):
+        yield {'cache': 'task_memo', 'result': 'hit'}, stats['task_memo']['hits']
+        yield {'cache': 'task_memo', 'result': 'miss'}, stats['task_memo']['misses']
+
+def _cache_hit_ratio_samples():
+    """Tỉ lệ hit (kể cả stale hit) của từng cache"""
+    lookups: Dict[str, List[float]] = {}
+    for labels, value in _cache_samples():
+        counts = lookups.setdefault(labels['cache'], [0, 0])
+        counts[1] += value
+        if labels['result'] != 'miss':
+            counts[0] += value
+    for cache, (hits, total) in lookups.items():
+        yield {'cache': cache}, hits / total if total else 0.0
+
+def _upstream_queue_samples():
+    """Số request upstream đang chờ slot theo lane"""
+    if not wework_client:
+        return
+    for lane, stats in wework_client.scheduler.stats()['lanes'].items():
+        yield {'lane': lane}, stats['queued']
+
+REGISTRY.callback(
+    'wework_cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result'),
+    _cache_samples, 'counter'
+)
+REGISTRY.callback('wework_cache_hit_ratio', 'Share of cache lookups served from cache', ('cache',), _cache_hit_ratio_samples)
+REGISTRY.callback(
+    'wework_upstream_queue_depth', 'WeWork API requests waiting for an upstream slot', ('lane',),
+    _upstream_queue_samples
+)
+REGISTRY.callback(
+    'wework_upstream_active_requests', 'WeWork API requests currently in flight', (),
+    lambda: [({}, wework_client.scheduler.stats()['active'])] if wework_client else []
+)
+REGISTRY.callback(
+    'wework_upstream_circuit_open', 'Whether the WeWork circuit breaker rejects requests (1) or not (0)', (),
+    lambda: [({}, int(wework_client.circuit_breaker.state != 'closed'))] if wework_client else []
+)
+REGISTRY.callback(
+    'wework_upstream_coalesced_total', 'WeWork API requests served by an identical in-flight request', (),
+    lambda: [({}, wework_client.pool_stats()['single_flight']['coalesced'])] if wework_client else [],
+    'counter'
+)
+REGISTRY.callback(
+    'wework_http_workers', 'HTTP API worker slots by state', ('state',),
+    lambda: [({'state': key}, value) for key, value in api_workers.stats().items() if key in ('busy', 'waiting')]
 )
 
 class MCPHTTPHandler(BaseHTTPRequestHandler):
     """HTTP Handler cho MCP server"""
     
+    # HTTP/1.1 để hỗ trợ keep-alive (chỉ ở chế độ threaded) và chunked transfer cho NDJSON stream
+    protocol_version = 'HTTP/1.1'
+    # Header và body được ghi riêng: tắt Nagle để response keep-alive không bị
+    # giữ lại ~40 ms chờ delayed ACK của client
+    disable_nagle_algorithm = True
+    # Đóng kết nối keep-alive nhàn rỗi sau khoảng thời gian này (giây)
+    timeout = 120
+    
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+    
+    def observe_request(self, method: str, handler):
+        """Chạy handler và ghi latency, status và kích thước response vào metrics"""
+        self._status = None
+        self._response_bytes = 0
+        start = time.perf_counter()
+        try:
+            handler()
+        finally:
+            path = urlparse(self.path).path
+            route = metric_route(path)
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start, method=method, route=route, status=str(self._status or 0)
+            )
+            HTTP_RESPONSE_BYTES.observe(self._response_bytes, route=route)
+    
     def do_GET(self):
         """Handle GET requests"""
+        self.observe_request('GET', self.handle_get)
+    
+    def handle_get(self):
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         
+        # Health check và metrics không đi qua hàng đợi worker để luôn trả lời ngay
         if path == '/health':
             self.send_health_check()
-        elif path == '/api/test':
+            return
+        if path == '/metrics':
+            self.send_metrics()
+            return
+        
+        if not api_workers.acquire():
+            self.send_error_response("Server busy, try again later", 503)
+            return
+        try:
+            self.route_get(path, parsed_path.query)
+        finally:
+            api_workers.release()
+    
+    def route_get(self, path: str, query: str):
+        """Route GET requests tới các API endpoint"""
+        if path == '/api/test':
             self.send_test_connection()
         elif path == '/api/projects':
-            query_params = parse_qs(parsed_path.query)
+            query_params = parse_qs(query)
             search_text = query_params.get('search', [''])[0]
             if search_text:
                 self.send_search_projects(search_text)
             else:
                 self.send_error_response("Missing search parameter")
+        elif path == '/api/exports':
+            self.send_json_response({'success': True, 'jobs': export_jobs.list_jobs()})
+        elif path.startswith(EXPORTS_PREFIX):
+            job_id, _, action = path[len(EXPORTS_PREFIX):].partition('/')
+            if action == 'download':
+                self.send_export_file(job_id)
+            elif not action:
+                self.send_export_status(job_id)
+            else:
+                self.send_error_response("Endpoint not found", 404)
         else:
             self.send_error_response("Endpoint not found", 404)
     
     def do_POST(self):
         """Handle POST requests"""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
+        self.observe_request('POST', self.handle_post)
+    
+    def handle_post(self):
+        if not api_workers.acquire():
+            # Body chưa được đọc nên không thể tái sử dụng kết nối
+            self.close_connection = True
+            self.send_error_response("Server busy, try again later", 503)
+            return
+        try:
+            self.route_post(urlparse(self.path).path)
+        finally:
+            api_workers.release()
+    
+    def route_post(self, path: str):
+        """Route POST requests tới các API endpoint"""
         try:
             content_length = int(self.headers.get('Content-Length', 0))
             post_data = self.rfile.read(content_length)
@@ -81,10 +381,25 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
             elif path == '/api/project/analyze':
                 project_id = data.get('project_id')
                 export_csv = data.get('export_csv', False)
+                if not project_id:
+                    self.send_error_response("Missing project_id")
+                elif data.get('stream') or data.get('format') == 'ndjson':
+                    self.stream_project_analysis(project_id, data.get('fields'))
+                else:
+                    self.send_project_analysis(
+                        project_id, export_csv, data.get('offset', 0), data.get('limit'),
+                        data.get('fields'), data.get('summary_only', False)
+                    )
+            elif path == '/api/exports':
+                project_id = data.get('project_id')
                 if project_id:
-                    self.send_project_analysis(project_id, export_csv)
+                    self.send_export_submit(project_id, data.get('format', 'csv'), data.get('fields'))
                 else:
                     self.send_error_response("Missing project_id")
+            elif path == '/api/projects/analyze':
+                self.send_portfolio_analysis(
+                    data.get('project_ids'), data.get('name_filter'), data.get('max_concurrency')
+                )
             else:
                 self.send_error_response("Endpoint not found", 404)
                 
@@ -95,18 +410,36 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
     
     def send_health_check(self):
         """Health check endpoint"""
+        # Chưa warm-up xong thì trả 503 để load balancer chưa chuyển traffic tới
+        ready = warmup.ready
         response = {
-            "status": "healthy",
+            "status": "healthy" if ready else "warming_up",
+            "ready": ready,
             "service": "WeWork MCP Server",
             "wework_client": wework_client is not None,
+            "cache": wework_client.cache_stats() if wework_client else None,
+            "upstream_pool": wework_client.pool_stats() if wework_client else None,
+            "upstream": wework_client.upstream_health() if wework_client else None,
+            "http_workers": api_workers.stats(),
+            "warmup": warmup.status(),
             "timestamp": pd.Timestamp.now().isoformat()
         }
-        self.send_json_response(response)
+        self.send_json_response(response, 200 if ready else 503)
+    
+    def send_metrics(self):
+        """Metrics endpoint (Prometheus text format)"""
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', REGISTRY.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self._response_bytes += len(body)
     
     def send_test_connection(self):
         """Test WeWork connection"""
         try:
-            result = test_connection()
+            result = run_tool(test_connection())
             self.send_json_response(result)
         except Exception as e:
             self.send_error_response(f"Connection test failed: {str(e)}")
@@ -114,36 +447,265 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
     def send_search_projects(self, search_text: str):
         """Search projects endpoint"""
         try:
-            result = search_projects(search_text)
-            self.send_json_response(result)
+            etag = version_etag(data_version(), '/api/projects', search_text)
+            if self.send_not_modified(etag):
+                return
+            result = run_tool(search_projects(search_text))
+            self.send_json_response(result, etag=etag)
         except Exception as e:
             self.send_error_response(f"Search failed: {str(e)}")
     
     def send_project_details(self, project_id: str):
         """Get project details endpoint"""
         try:
-            result = get_project_details(project_id)
-            self.send_json_response(result)
+            etag = version_etag(data_version(), '/api/project/details', project_id)
+            if self.send_not_modified(etag):
+                return
+            result = run_tool(get_project_details(project_id))
+            self.send_json_response(result, etag=etag)
         except Exception as e:
             self.send_error_response(f"Failed to get project details: {str(e)}")
     
-    def send_project_analysis(self, project_id: str, export_csv: bool = False):
+    def send_project_analysis(self, project_id: str, export_csv: bool = False,
+                              offset: int = 0, limit: Optional[int] = None,
+                              fields: Optional[List[str]] = None, summary_only: bool = False):
         """Analyze project tasks endpoint"""
         try:
-            result = analyze_project_tasks(project_id, export_csv)
-            self.send_json_response(result)
+            # Export CSV tạo job mới mỗi lần nên không trả 304
+            etag = None
+            if not export_csv:
+                etag = version_etag(
+                    data_version(project_id), '/api/project/analyze', project_id,
+                    offset, limit, fields, summary_only
+                )
+                if self.send_not_modified(etag):
+                    return
+            result = run_tool(build_task_analysis(
+                project_id, export_csv, offset, limit, fields, summary_only
+            ))
+            self.send_json_response(result, etag=etag)
+        except Exception as e:
+            self.send_error_response(f"Analysis failed: {str(e)}")
+    
+    def stream_project_analysis(self, project_id: str, fields: Optional[List[str]] = None):
+        """
+        Analyze project tasks endpoint, NDJSON streaming mode
+        
+        Mỗi dòng là một JSON object: dòng đầu {"type": "project"}, sau đó mỗi
+        task một dòng {"type": "task", ...}, dòng cuối {"type": "summary"}.
+        Tasks được phân tích và ghi theo từng lô nên không cần dựng toàn bộ
+        kết quả trong bộ nhớ trước khi gửi byte đầu tiên.
+        """
+        try:
+            fields = TaskAnalyzer.resolve_fields(fields)
+        except ValueError as e:
+            self.send_error_response(str(e))
+            return
+        # Luôn dựng cột trạng thái để tính dòng summary
+        parse_fields = None if fields is None else list(dict.fromkeys(fields + ['Trạng thái']))
+        
+        try:
+            project_info = run_tool(wework_client.get_project_info(project_id))
+            if not project_info:
+                self.send_error_response(f"Không tìm thấy dự án với ID: {project_id}", 404)
+                return
+            project_data = run_tool(wework_client.fetch_project_details(project_id))
         except Exception as e:
             self.send_error_response(f"Analysis failed: {str(e)}")
+            return
+        if project_data is None:
+            # WeWork lỗi / breaker mở: báo lỗi trước khi gửi header, không stream như project rỗng
+            self.send_error_response(f"Could not load project {project_id} from WeWork", 502)
+            return
+        
+        # Stream gzip: mỗi chunk được flush (Z_SYNC_FLUSH) để client giải nén được ngay
+        self._stream_compressor = None
+        self.send_response(200)
+        self.send_header('Content-type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Vary', 'Accept-Encoding')
+        if negotiate_encoding(self.headers.get('Accept-Encoding')) is not None:
+            self._stream_compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        
+        self.write_ndjson_lines([{
+            'type': 'project',
+            'project_id': project_id,
+            'project_name': project_info['name'],
+        }])
+        total_tasks = 0
+        status_counts: Dict[str, int] = {}
+        try:
+            for batch in wework_client.task_analyzer.iter_task_batches(project_data, fields=parse_fields):
+                for status, count in batch['Trạng thái'].value_counts().items():
+                    status_counts[status] = status_counts.get(status, 0) + int(count)
+                if fields is not None:
+                    batch = batch[fields]
+                self.write_chunk_lines(json_serializer.iter_records(batch, prefix=b'"type":"task"'))
+                total_tasks += len(batch)
+            summary = wework_client.task_analyzer.summarize_counts(total_tasks, status_counts)
+            self.write_ndjson_lines([{'type': 'summary', 'summary': summary}])
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+            return
+        except Exception as e:
+            logger.error(f"Error streaming analysis for {project_id}: {e}")
+            self.write_ndjson_lines([{'type': 'error', 'error': str(e)}])
+        if self._stream_compressor is not None:
+            self.write_chunk(self._stream_compressor.flush())
+        self.wfile.write(b'0\r\n\r\n')
+    
+    def write_ndjson_lines(self, items: List[Dict[str, Any]]):
+        """Ghi các object thành một chunk NDJSON"""
+        self.write_chunk_lines(json_serializer.dumps(item) for item in items)
+    
+    def write_chunk_lines(self, lines):
+        """Ghi các dòng JSON đã encode thành một chunk NDJSON"""
+        payload = b''.join(line + b'\n' for line in lines)
+        if self._stream_compressor is not None:
+            payload = self._stream_compressor.compress(payload) + self._stream_compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.write_chunk(payload)
+    
+    def write_chunk(self, payload: bytes):
+        """Ghi một chunk của Transfer-Encoding: chunked"""
+        if not payload:
+            return
+        self.wfile.write(f"{len(payload):X}\r\n".encode('ascii') + payload + b'\r\n')
+        self._response_bytes += len(payload)
+        self.wfile.flush()
     
-    def send_json_response(self, data: dict, status_code: int = 200):
-        """Send JSON response"""
+    def export_links(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Thay đường dẫn file trên server bằng URL trạng thái/tải về"""
+        job.pop('file', None)
+        job['status_url'] = f"{EXPORTS_PREFIX}{job['job_id']}"
+        if job['state'] == JOB_COMPLETED:
+            job['download_url'] = f"{EXPORTS_PREFIX}{job['job_id']}/download"
+        return job
+    
+    def send_export_submit(self, project_id: str, fmt: str, fields: Optional[List[str]]):
+        """Tạo job export, trả về 202 cùng job_id"""
+        try:
+            result = run_tool(export_project_tasks(project_id, fmt, fields))
+        except Exception as e:
+            self.send_error_response(f"Export failed: {str(e)}")
+            return
+        if not result.get('success'):
+            self.send_error_response(result.get('error', 'Export failed'))
+            return
+        result['job'] = self.export_links(result['job'])
+        self.send_json_response(result, 202)
+    
+    def send_export_status(self, job_id: str):
+        """Trạng thái và tiến độ của job export"""
+        result = run_tool(get_export_status(job_id))
+        if not result.get('success'):
+            self.send_error_response(result['error'], 404)
+            return
+        result['job'] = self.export_links(result['job'])
+        self.send_json_response(result)
+    
+    def send_export_file(self, job_id: str):
+        """Tải file của job export đã xong"""
+        job = export_jobs.get(job_id)
+        if job is None:
+            self.send_error_response(f"Không tìm thấy job export: {job_id}", 404)
+            return
+        if job.state != JOB_COMPLETED:
+            self.send_error_response(f"Export job is {job.state}", 409)
+            return
+        try:
+            f = open(job.path, 'rb')
+        except OSError:
+            self.send_error_response("Export file is no longer available", 410)
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            ascii_name = job.filename.encode('ascii', 'replace').decode('ascii').replace('?', '_').replace('"', '_')
+            self.send_response(200)
+            self.send_header('Content-type', EXPORT_CONTENT_TYPES[job.format])
+            self.send_header('Content-Length', str(size))
+            self.send_header('Content-Disposition',
+                             f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(job.filename)}")
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            while True:
+                chunk = f.read(65536)
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                self._response_bytes += len(chunk)
+    
+    def send_portfolio_analysis(self, project_ids: Optional[List[str]], name_filter: Optional[str],
+                                max_concurrency: Optional[int] = None):
+        """Analyze many projects endpoint"""
+        try:
+            result = run_tool(analyze_projects(project_ids, name_filter, max_concurrency))
+            self.send_json_response(result)
+        except Exception as e:
+            self.send_error_response(f"Portfolio analysis failed: {str(e)}")
+    
+    def send_not_modified(self, etag: Optional[str]) -> bool:
+        """Gửi 304 nếu If-None-Match khớp etag; trả về True nếu đã gửi"""
+        matched = matched_etag(self.headers.get('If-None-Match'), etag) if etag else None
+        if matched is None:
+            return False
+        self.send_response(304)
+        self.send_header('ETag', matched)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        return True
+    
+    def send_json_response(self, data: dict, status_code: int = 200, etag: Optional[str] = None):
+        """
+        Send JSON response
+        
+        Response 200 có strong ETag: etag truyền vào (dựng từ phiên bản dữ liệu,
+        được kiểm tra trước khi serialize) hoặc hash của body. Request gửi
+        If-None-Match trùng ETag nhận 304 không có body. Body được nén gzip/br
+        theo Accept-Encoding.
+        """
+        if status_code == 200 and self.send_not_modified(etag):
+            return
+        
+        body = json_serializer.dumps(data)
+        
+        encoding = None
+        if len(body) >= HTTP_COMPRESS_MIN_SIZE:
+            encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+        
+        if status_code != 200:
+            etag = None
+        elif etag is None:
+            etag = compute_etag(body)
+            if self.send_not_modified(etag):
+                return
+        # Mỗi content-coding là một representation riêng nên có ETag riêng
+        if etag is not None and encoding is not None:
+            etag = f'{etag[:-1]}-{encoding}"'
+        
+        if encoding is not None:
+            body = compress_body(body, encoding)
+        
         self.send_response(status_code)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, If-None-Match')
+        self.send_header('Access-Control-Expose-Headers', 'ETag')
+        self.send_header('Vary', 'Accept-Encoding')
+        if etag is not None:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8'))
+        self.wfile.write(body)
+        self._response_bytes += len(body)
     
     def send_error_response(self, message: str, status_code: int = 400):
         """Send error response"""
@@ -159,20 +721,56 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, If-None-Match')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
+class MCPSingleHTTPHandler(MCPHTTPHandler):
+    """
+    Handler cho HTTP_SERVER_MODE=single: mỗi kết nối chỉ phục vụ một request
+
+    Server chỉ có một thread nên một client giữ kết nối keep-alive nhàn rỗi
+    sẽ chặn mọi client khác. Vẫn dùng HTTP/1.1 để stream NDJSON bằng chunked
+    transfer, nhưng mọi response đều kèm Connection: close.
+    """
+    
+    # Client chậm gửi request (hoặc chậm nhận response) không được giữ thread duy nhất quá lâu
+    timeout = 10
+    
+    def end_headers(self):
+        if not self.close_connection:
+            # send_header() cũng đặt close_connection = True
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
+class MCPThreadingHTTPServer(ThreadingHTTPServer):
+    """HTTP server xử lý mỗi kết nối trên một thread riêng"""
+    daemon_threads = True
+    request_queue_size = 128
+
 def run_http_server():
     """Chạy HTTP server"""
     server_address = (HOST, PORT)
-    httpd = HTTPServer(server_address, MCPHTTPHandler)
-    logger.info(f"HTTP Server starting on http://{HOST}:{PORT}")
+    if HTTP_SERVER_MODE == 'single':
+        httpd = HTTPServer(server_address, MCPSingleHTTPHandler)
+    else:
+        httpd = MCPThreadingHTTPServer(server_address, MCPHTTPHandler)
+    logger.info(f"HTTP Server starting on http://{HOST}:{PORT} "
+                f"(mode: {HTTP_SERVER_MODE}, max API workers: {HTTP_MAX_WORKERS})")
     logger.info("Available endpoints:")
     logger.info("  GET  /health - Health check")
+    logger.info("  GET  /metrics - Prometheus metrics")
     logger.info("  GET  /api/test - Test WeWork connection")
     logger.info("  GET  /api/projects?search=<text> - Search projects")
     logger.info("  POST /api/project/details - Get project details")
     logger.info("  POST /api/project/analyze - Analyze project tasks")
+    logger.info("  POST /api/projects/analyze - Analyze many projects (portfolio)")
+    logger.info("  POST /api/exports - Start a background export (csv/parquet/arrow)")
+    logger.info("  GET  /api/exports/<job_id>[/download] - Export status / download")
+    
+    if warmup.enabled:
+        logger.info("Warm-up started (/health returns 503 until it finishes)")
+        asyncio.run_coroutine_threadsafe(warmup.run_forever(), tools_loop)
     
     try:
         httpd.serve_forever()
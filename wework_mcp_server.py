@@ -1,14 +1,27 @@
 from mcp.server.fastmcp import FastMCP
-from data.wework_client import WeWorkClient
+from data.async_wework_client import AsyncWeWorkClient
+from data.wework_client import (
+    STATUS_COMPLETED, STATUS_FAILED, STATUS_IN_PROGRESS, TaskAnalyzer, aggregate_summaries
+)
+from data.serialization import JSONSerializer, DataFrameRecords
+from data.snapshot_store import ProjectSnapshotStore
+from data.resilience import READ_SNAPSHOT, CircuitBreaker, RetryPolicy, plan_snapshot_read
+from data.upstream_scheduler import UpstreamScheduler
+from data.warmup import ProjectWarmup
+from data.export_jobs import ExportJobManager, JOB_COMPLETED
+from data.metrics import REGISTRY
 from typing import Dict, List, Optional, Any
-import pandas as pd
+from contextlib import asynccontextmanager
 import os
+import asyncio
+import functools
 from dotenv import load_dotenv
 import logging
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,26 +29,172 @@ load_dotenv()
 # Access token từ environment hoặc fallback
 WEWORK_ACCESS_TOKEN = os.getenv('WEWORK_ACCESS_TOKEN', '5654-FCVE2Z8T53L7WTFKVXFP2PTM9MUABP6WRU5LCY6E365RY6TCSRYY4GTAJ48WJEMV-THT9F7ZZNPVMGBNV3FTB8P2QZF5HN2FW9HKV7J64MXDV8BQWN43SK3DUCBJP6JT2')
 
+# URL gốc của WeWork API (để trống dùng mặc định; trỏ tới stub server khi benchmark)
+WEWORK_BASE_URL = os.getenv('WEWORK_BASE_URL', '')
+
+# TTL (giây) của cache danh sách projects, 0 để tắt cache
+PROJECT_CACHE_TTL = float(os.getenv('WEWORK_PROJECT_CACHE_TTL', 300))
+
+# Connection pool tới WeWork API
+POOL_SIZE = int(os.getenv('WEWORK_POOL_SIZE', 10))
+CONNECT_TIMEOUT = float(os.getenv('WEWORK_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('WEWORK_READ_TIMEOUT', 30))
+
+# Retry request tới WeWork: số lần thử, backoff lũy thừa có jitter và deadline tổng mỗi lần gọi
+RETRY_ATTEMPTS = int(os.getenv('WEWORK_RETRY_ATTEMPTS', 3))
+RETRY_BASE_DELAY = float(os.getenv('WEWORK_RETRY_BASE_DELAY', 0.5))
+RETRY_MAX_DELAY = float(os.getenv('WEWORK_RETRY_MAX_DELAY', 8))
+REQUEST_DEADLINE = float(os.getenv('WEWORK_REQUEST_DEADLINE', 45))
+# Circuit breaker: mở sau BREAKER_THRESHOLD lỗi liên tiếp (0 để tắt), thử lại sau BREAKER_RESET giây
+BREAKER_THRESHOLD = int(os.getenv('WEWORK_BREAKER_THRESHOLD', 5))
+BREAKER_RESET = float(os.getenv('WEWORK_BREAKER_RESET', 30))
+# Giới hạn request tới WeWork: số request đồng thời, tốc độ (request/giây, 0 để không giới hạn)
+# và số token burst; lời gọi tương tác được ưu tiên trước job nhiều project và refresh nền
+UPSTREAM_CONCURRENCY = int(os.getenv('WEWORK_UPSTREAM_CONCURRENCY', POOL_SIZE))
+UPSTREAM_RATE = float(os.getenv('WEWORK_UPSTREAM_RATE', 10))
+UPSTREAM_BURST = float(os.getenv('WEWORK_UPSTREAM_BURST', 20))
+
+# Phân tích nhiều dự án: số request get.full đồng thời và số worker phân tích
+PORTFOLIO_CONCURRENCY = int(os.getenv('WEWORK_PORTFOLIO_CONCURRENCY', 8))
+ANALYSIS_WORKERS = int(os.getenv('WEWORK_ANALYSIS_WORKERS', 4))
+
+# Snapshot dữ liệu trên đĩa (để trống để tắt): snapshot trẻ hơn MAX_AGE được dùng thẳng,
+# cũ hơn nhưng trong STALE_LIMIT thì được trả ngay và refresh ở background
+SNAPSHOT_DIR = os.getenv('WEWORK_SNAPSHOT_DIR', '')
+SNAPSHOT_MAX_AGE = float(os.getenv('WEWORK_SNAPSHOT_MAX_AGE', 300))
+SNAPSHOT_STALE_LIMIT = float(os.getenv('WEWORK_SNAPSHOT_STALE_LIMIT', 86400))
+# Chế độ offline: chỉ phục vụ từ snapshot, không gọi WeWork API
+OFFLINE_MODE = os.getenv('WEWORK_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+# Số dòng task đã parse được nhớ lại để lần phân tích sau chỉ parse task mới/đã sửa, 0 để tắt.
+# Chỉ dùng cho project có từ TASK_MEMO_MIN_ROWS task: project nhỏ parse lại còn nhanh hơn hash
+TASK_MEMO_SIZE = int(os.getenv('WEWORK_TASK_MEMO_SIZE', 20000))
+TASK_MEMO_MIN_ROWS = int(os.getenv('WEWORK_TASK_MEMO_MIN_ROWS', 5000))
+
+# Warm-up khi khởi động (và mỗi WARMUP_INTERVAL giây nếu > 0): tải project/list, dựng search
+# index, tải và phân tích các project trong WEWORK_WARMUP_PROJECTS cùng WARMUP_RECENT project dùng
+# gần đây; WARMUP_STATE là file lưu danh sách project dùng gần đây qua các lần khởi động
+WARMUP_ENABLED = os.getenv('WEWORK_WARMUP', '').lower() in ('1', 'true', 'yes')
+WARMUP_PROJECTS = [p.strip() for p in os.getenv('WEWORK_WARMUP_PROJECTS', '').split(',') if p.strip()]
+WARMUP_RECENT = int(os.getenv('WEWORK_WARMUP_RECENT', 10))
+WARMUP_INTERVAL = float(os.getenv('WEWORK_WARMUP_INTERVAL', 0))
+WARMUP_STATE = os.getenv('WEWORK_WARMUP_STATE', '')
+
+# Export tasks chạy nền: thư mục chứa file, số job chạy đồng thời và số dòng mỗi lần ghi
+EXPORT_DIR = os.getenv('WEWORK_EXPORT_DIR', 'exports')
+EXPORT_WORKERS = int(os.getenv('WEWORK_EXPORT_WORKERS', 2))
+EXPORT_CHUNK_ROWS = int(os.getenv('WEWORK_EXPORT_CHUNK_ROWS', 5000))
+# Số job export đã xong được giữ lại; file của job cũ hơn bị xoá
+EXPORT_HISTORY = int(os.getenv('WEWORK_EXPORT_HISTORY', 200))
+
+# Serializer JSON cho response lớn: 'auto' dùng orjson nếu được cài đặt, 'json' để dùng stdlib
+json_serializer = JSONSerializer(os.getenv('WEWORK_JSON_BACKEND', 'auto'))
+
+@asynccontextmanager
+async def warmup_lifespan(server: FastMCP):
+    """Chạy warm-up nền trong suốt phiên stdio"""
+    warmup.start()
+    try:
+        yield {}
+    finally:
+        await warmup.stop()
+
 # Create MCP server
-mcp = FastMCP("WeWork Project Management Server")
+mcp = FastMCP("WeWork Project Management Server", lifespan=warmup_lifespan)
+
+TOOL_LATENCY = REGISTRY.histogram('wework_mcp_tool_seconds', 'Latency of MCP tool calls', ('tool',))
+
+def timed_tool(func):
+    """Đo latency của MCP tool (xuất ra /metrics của HTTP server)"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with TOOL_LATENCY.time(tool=func.__name__):
+            return await func(*args, **kwargs)
+    return wrapper
 
 # Initialize WeWork client with error handling
 try:
-    wework_client = WeWorkClient(WEWORK_ACCESS_TOKEN)
+    snapshot_store = None
+    if SNAPSHOT_DIR:
+        snapshot_store = ProjectSnapshotStore(
+            SNAPSHOT_DIR, max_age=SNAPSHOT_MAX_AGE, stale_limit=SNAPSHOT_STALE_LIMIT
+        )
+        logger.info(f"Snapshot store: {snapshot_store.path}")
+    elif OFFLINE_MODE:
+        logger.warning("WEWORK_OFFLINE requires WEWORK_SNAPSHOT_DIR; offline mode disabled")
+    
+    wework_client = AsyncWeWorkClient(
+        WEWORK_ACCESS_TOKEN,
+        project_cache_ttl=PROJECT_CACHE_TTL,
+        pool_maxsize=POOL_SIZE,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        analysis_workers=ANALYSIS_WORKERS,
+        snapshot_store=snapshot_store,
+        offline=OFFLINE_MODE and snapshot_store is not None,
+        task_memo_size=TASK_MEMO_SIZE,
+        task_memo_min_rows=TASK_MEMO_MIN_ROWS,
+        retry_policy=RetryPolicy(
+            max_attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY,
+            max_delay=RETRY_MAX_DELAY, deadline=REQUEST_DEADLINE,
+        ),
+        circuit_breaker=CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET),
+        scheduler=UpstreamScheduler(UPSTREAM_CONCURRENCY, UPSTREAM_RATE, UPSTREAM_BURST),
+        base_url=WEWORK_BASE_URL or None,
+    )
     logger.info("WeWork client initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize WeWork client: {e}")
     wework_client = None
 
+warmup = ProjectWarmup(
+    wework_client,
+    project_ids=WARMUP_PROJECTS,
+    recent_limit=WARMUP_RECENT,
+    interval=WARMUP_INTERVAL,
+    state_path=WARMUP_STATE or None,
+    enabled=WARMUP_ENABLED,
+)
+
+export_jobs = ExportJobManager(
+    wework_client, EXPORT_DIR, max_workers=EXPORT_WORKERS, chunk_rows=EXPORT_CHUNK_ROWS,
+    max_history=EXPORT_HISTORY
+)
+
+def data_version(project_id: Optional[str] = None) -> Optional[str]:
+    """
+    Phiên bản dữ liệu mà các tool sẽ đọc nếu được gọi ngay bây giờ, None nếu chưa biết
+
+    Chỉ có khi danh sách projects trong cache còn mới và (nếu có project_id)
+    snapshot của project được đọc thẳng không gọi WeWork. HTTP server dựng
+    ETag từ phiên bản này để trả 304 trước khi phân tích và serialize.
+    """
+    if not wework_client:
+        return None
+    list_version = wework_client.project_cache.fresh_version()
+    if list_version is None:
+        return None
+    if project_id is None:
+        return str(list_version)
+    store = wework_client.snapshot_store
+    if store is None:
+        return None
+    fetched_at = store.fetched_at(project_id)
+    if fetched_at is None:
+        return None
+    if plan_snapshot_read(store.freshness(fetched_at), wework_client.offline) != READ_SNAPSHOT:
+        return None
+    return f"{list_version}:{fetched_at!r}"
+
 # Resource to get available projects
 @mcp.resource("file://projects/available")
-def get_available_projects() -> str:
+async def get_available_projects() -> str:
     """Lấy danh sách tất cả các dự án có sẵn"""
     try:
         if not wework_client:
             return "Error: WeWork client not initialized"
         
-        projects = wework_client.fetch_projects()
+        projects = await wework_client.fetch_projects()
         result = {
             'projects': projects,
             'total_count': len(projects)
@@ -55,7 +214,8 @@ def get_available_projects() -> str:
 
 # Tool to search projects
 @mcp.tool()
-def search_projects(search_text: str, limit: int = 10) -> Dict[str, Any]:
+@timed_tool
+async def search_projects(search_text: str, limit: int = 10) -> Dict[str, Any]:
     """
     Tìm kiếm dự án theo tên
     
@@ -71,7 +231,7 @@ def search_projects(search_text: str, limit: int = 10) -> Dict[str, Any]:
             return {'error': 'WeWork client not initialized'}
         
         logger.info(f"Searching projects with text: {search_text}")
-        results = wework_client.search_projects(search_text=search_text, limit=limit)
+        results = await wework_client.search_projects(search_text=search_text, limit=limit)
         
         return {
             'success': True,
@@ -85,7 +245,8 @@ def search_projects(search_text: str, limit: int = 10) -> Dict[str, Any]:
 
 # Tool to get project details
 @mcp.tool()
-def get_project_details(project_id: str) -> Dict[str, Any]:
+@timed_tool
+async def get_project_details(project_id: str) -> Dict[str, Any]:
     """
     Lấy chi tiết của một dự án
     
@@ -100,7 +261,7 @@ def get_project_details(project_id: str) -> Dict[str, Any]:
             return {'error': 'WeWork client not initialized'}
         
         logger.info(f"Getting project details for ID: {project_id}")
-        project_info = wework_client.get_project_info(project_id)
+        project_info = await wework_client.get_project_info(project_id)
         
         if project_info:
             return {
@@ -116,18 +277,20 @@ def get_project_details(project_id: str) -> Dict[str, Any]:
         logger.error(f"Error in get_project_details: {e}")
         return {'error': str(e), 'success': False}
 
-# Tool to analyze project tasks
-@mcp.tool()
-def analyze_project_tasks(project_id: str, export_csv: bool = False) -> Dict[str, Any]:
+async def build_task_analysis(
+    project_id: str,
+    export_csv: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    summary_only: bool = False
+) -> Dict[str, Any]:
     """
-    Phân tích các tasks trong dự án
-    
-    Args:
-        project_id: ID của dự án
-        export_csv: Có xuất file CSV không (default: False)
+    Phân tích các tasks trong dự án (dùng chung cho MCP tool và HTTP endpoint)
     
     Returns:
-        Phân tích tasks dưới dạng dictionary
+        Dictionary kết quả; 'tasks' là DataFrameRecords để json_serializer
+        encode thẳng từ các cột của DataFrame
     """
     try:
         if not wework_client:
@@ -135,46 +298,74 @@ def analyze_project_tasks(project_id: str, export_csv: bool = False) -> Dict[str
         
         logger.info(f"Analyzing tasks for project ID: {project_id}")
         
+        try:
+            fields = TaskAnalyzer.resolve_fields(fields)
+        except ValueError as e:
+            return {'error': str(e), 'success': False}
+        
         # Lấy thông tin dự án
-        project_info = wework_client.get_project_info(project_id)
+        project_info = await wework_client.get_project_info(project_id)
         if not project_info:
             return {
                 'error': f'Không tìm thấy dự án với ID: {project_id}',
                 'success': False
             }
         
-        # Phân tích tasks
-        df = wework_client.get_project_analysis(project_id)
+        # Chỉ cần thống kê: đếm trên dữ liệu gốc, không dựng DataFrame
+        if summary_only and not export_csv:
+            stats = await wework_client.get_project_statistics(project_id)
+            return {
+                'success': True,
+                'project_name': project_info['name'],
+                'project_id': project_id,
+                'total_tasks': stats['total_tasks'],
+                'summary': TaskAnalyzer.summarize_counts(stats['total_tasks'], stats['status_counts'])
+            }
+        
+        # Phân tích tasks (luôn kèm cột trạng thái để tính thống kê)
+        analysis_fields = None if fields is None else list(dict.fromkeys(fields + ['Trạng thái']))
+        df = await wework_client.get_project_analysis(project_id, analysis_fields)
+        logger.info(f"Analyzed {len(df)} tasks ({df.attrs.get('reused_rows', 0)} reused from cache)")
+        if df.empty and df.attrs.get('error'):
+            result = {'error': df.attrs['error'], 'success': False}
+            if export_csv:
+                result['export_job'] = {'error': f"Export not started: {df.attrs['error']}"}
+            return result
+        
+        offset = max(0, int(offset or 0))
+        if limit is not None:
+            limit = max(0, int(limit))
         
         if df.empty:
-            return {
+            result = {
                 'success': True,
                 'project_name': project_info['name'],
                 'project_id': project_id,
                 'tasks': [],
-                'summary': {
-                    'total_tasks': 0,
-                    'completed_tasks': 0,
-                    'in_progress_tasks': 0,
-                    'failed_tasks': 0
-                }
+                'offset': offset,
+                'limit': limit,
+                'next_offset': None,
+                'summary': TaskAnalyzer.summarize_counts(0, {})
             }
+            if export_csv:
+                result['export_job'] = {'error': 'Export not started: project has no tasks'}
+            return result
         
         # Tính thống kê
         status_counts = df['Trạng thái'].value_counts().to_dict() if 'Trạng thái' in df.columns else {}
         
-        # Chuyển DataFrame thành dictionary
-        tasks_data = df.to_dict(orient='records')
+        if fields is not None:
+            df = df[[column for column in df.columns if column in fields]]
+        
+        # Chuyển trang DataFrame được yêu cầu thành dictionary
+        end = len(df) if limit is None else min(len(df), offset + limit)
+        tasks_data = DataFrameRecords(df.iloc[offset:end])
         
-        # Xuất CSV nếu được yêu cầu
-        csv_filename = None
+        # Xuất CSV nếu được yêu cầu: ghi ở job nền từ DataFrame vừa phân tích, theo dõi bằng get_export_status
+        export_job = None
         if export_csv:
-            csv_filename = f"{project_info['name']}_tasks_analysis.csv"
-            try:
-                df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
-                logger.info(f"CSV exported to: {csv_filename}")
-            except Exception as csv_error:
-                logger.error(f"Failed to export CSV: {csv_error}")
+            job, _ = export_jobs.submit(project_id, project_info['name'], 'csv', fields, df)
+            export_job = job.to_dict()
         
         result = {
             'success': True,
@@ -182,17 +373,17 @@ def analyze_project_tasks(project_id: str, export_csv: bool = False) -> Dict[str
             'project_id': project_id,
             'tasks': tasks_data,
             'total_tasks': len(df),
-            'summary': {
-                'total_tasks': len(df),
-                'completed_tasks': status_counts.get('Hoàn thành', 0),
-                'in_progress_tasks': status_counts.get('Đang thực hiện', 0),
-                'failed_tasks': status_counts.get('Thất bại', 0),
-                'status_breakdown': status_counts
-            }
+            'offset': offset,
+            'limit': limit,
+            'next_offset': end if end < len(df) else None,
+            'summary': TaskAnalyzer.summarize_counts(len(df), status_counts)
         }
         
-        if csv_filename:
-            result['csv_file'] = csv_filename
+        if summary_only:
+            for key in ('tasks', 'offset', 'limit', 'next_offset'):
+                del result[key]
+        if export_job:
+            result['export_job'] = export_job
             
         return result
         
@@ -200,9 +391,180 @@ def analyze_project_tasks(project_id: str, export_csv: bool = False) -> Dict[str
         logger.error(f"Error in analyze_project_tasks: {e}")
         return {'error': str(e), 'success': False}
 
+# Tool to analyze project tasks
+@mcp.tool()
+@timed_tool
+async def analyze_project_tasks(
+    project_id: str,
+    export_csv: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    summary_only: bool = False
+) -> Dict[str, Any]:
+    """
+    Phân tích các tasks trong dự án
+    
+    Args:
+        project_id: ID của dự án
+        export_csv: Xuất file CSV ở background (default: False); theo dõi export_job.job_id bằng get_export_status
+        offset: Vị trí task đầu tiên trả về (default: 0)
+        limit: Số tasks tối đa trả về, None để lấy hết; dùng next_offset để lấy trang tiếp
+        fields: Chỉ trả về các cột này, vd ['Tên công việc', 'Người thực hiện', 'Trạng thái', 'Deadline']
+        summary_only: Chỉ trả về thống kê, không trả về danh sách tasks (default: False)
+    
+    Returns:
+        Phân tích tasks dưới dạng dictionary
+    """
+    result = await build_task_analysis(project_id, export_csv, offset, limit, fields, summary_only)
+    if isinstance(result.get('tasks'), DataFrameRecords):
+        result['tasks'] = result['tasks'].to_list()
+    return result
+
+def export_status(job) -> Dict[str, Any]:
+    """Trạng thái job export, kèm đường dẫn file khi đã xong"""
+    status = job.to_dict()
+    if job.state == JOB_COMPLETED:
+        status['file'] = os.path.abspath(job.path)
+    return status
+
+# Tool to export project tasks in the background
+@mcp.tool()
+@timed_tool
+async def export_project_tasks(
+    project_id: str,
+    format: str = 'csv',
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Xuất tasks của dự án ra file ở background (CSV, hoặc Parquet/Arrow nếu có pyarrow)
+    
+    Args:
+        project_id: ID của dự án
+        format: 'csv' (default), 'parquet' hoặc 'arrow'
+        fields: Chỉ xuất các cột này (mặc định tất cả)
+    
+    Returns:
+        Job export (job_id, state, progress); dùng get_export_status để theo dõi
+    """
+    try:
+        if not wework_client:
+            return {'error': 'WeWork client not initialized'}
+        
+        fields = TaskAnalyzer.resolve_fields(fields)
+        project_info = await wework_client.get_project_info(project_id)
+        if not project_info:
+            return {
+                'error': f'Không tìm thấy dự án với ID: {project_id}',
+                'success': False
+            }
+        
+        job, created = export_jobs.submit(project_id, project_info['name'], format, fields)
+        logger.info(f"Export job {job.id} for project {project_id} ({job.format}, new: {created})")
+        return {
+            'success': True,
+            'deduplicated': not created,
+            'job': export_status(job)
+        }
+    except ValueError as e:
+        return {'error': str(e), 'success': False}
+    except Exception as e:
+        logger.error(f"Error in export_project_tasks: {e}")
+        return {'error': str(e), 'success': False}
+
+# Tool to check an export job
+@mcp.tool()
+@timed_tool
+async def get_export_status(job_id: str) -> Dict[str, Any]:
+    """
+    Trạng thái và tiến độ của job export
+    
+    Args:
+        job_id: ID trả về từ export_project_tasks
+    
+    Returns:
+        state (queued/running/completed/failed), progress, file khi đã xong
+    """
+    job = export_jobs.get(job_id)
+    if job is None:
+        return {'error': f'Không tìm thấy job export: {job_id}', 'success': False}
+    return {'success': True, 'job': export_status(job)}
+
+# Tool to analyze many projects at once
+@mcp.tool()
+@timed_tool
+async def analyze_projects(
+    project_ids: Optional[List[str]] = None,
+    name_filter: Optional[str] = None,
+    max_concurrency: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Phân tích tasks của nhiều dự án cùng lúc (portfolio)
+    
+    Args:
+        project_ids: Danh sách ID dự án cần phân tích
+        name_filter: Chọn các dự án có tên chứa chuỗi này (khi không truyền project_ids)
+        max_concurrency: Số dự án được tải đồng thời (default: WEWORK_PORTFOLIO_CONCURRENCY)
+    
+    Returns:
+        Tóm tắt theo từng dự án và tổng hợp toàn portfolio
+    """
+    try:
+        if not wework_client:
+            return {'error': 'WeWork client not initialized'}
+        
+        projects = await wework_client.fetch_projects()
+        project_index = wework_client.project_cache.index_for(projects)
+        
+        # Chọn danh sách dự án cần phân tích
+        if project_ids:
+            selected_ids = [str(project_id) for project_id in project_ids]
+        elif name_filter:
+            name_filter_lower = name_filter.lower()
+            selected_ids = [
+                str(p.get('id')) for p in projects
+                if name_filter_lower in p.get('name', '').lower()
+            ]
+        else:
+            selected_ids = [str(p.get('id')) for p in projects]
+        
+        logger.info(f"Analyzing {len(selected_ids)} projects")
+        summaries = await wework_client.analyze_projects(
+            selected_ids, max_concurrency=max_concurrency or PORTFOLIO_CONCURRENCY
+        )
+        
+        results = []
+        errors = []
+        for project_id, summary in summaries.items():
+            project_info = project_index.get(project_id)
+            if summary is None:
+                errors.append({
+                    'project_id': project_id,
+                    'project_name': project_info.get('name') if project_info else None,
+                    'error': 'Không tải được dữ liệu dự án'
+                })
+                continue
+            results.append({
+                'project_id': project_id,
+                'project_name': project_info.get('name') if project_info else None,
+                'summary': summary
+            })
+        
+        return {
+            'success': True,
+            'projects': results,
+            'errors': errors,
+            'aggregate': aggregate_summaries([r['summary'] for r in results])
+        }
+        
+    except Exception as e:
+        logger.error(f"Error in analyze_projects: {e}")
+        return {'error': str(e), 'success': False}
+
 # Tool to find project by name
 @mcp.tool()
-def find_project_by_name(project_name: str, threshold: float = 0.3) -> Dict[str, Any]:
+@timed_tool
+async def find_project_by_name(project_name: str, threshold: float = 0.3) -> Dict[str, Any]:
     """
     Tìm dự án theo tên với độ tương đồng
     
@@ -218,7 +580,7 @@ def find_project_by_name(project_name: str, threshold: float = 0.3) -> Dict[str,
             return {'error': 'WeWork client not initialized'}
         
         logger.info(f"Finding project by name: {project_name}")
-        projects = wework_client.fetch_projects()
+        projects = await wework_client.fetch_projects()
         
         if not projects:
             return {
@@ -226,8 +588,8 @@ def find_project_by_name(project_name: str, threshold: float = 0.3) -> Dict[str,
                 'success': False
             }
         
-        best_project, similarity_score = wework_client.find_best_project_match(
-            project_name, projects, threshold
+        best_project, similarity_score = await asyncio.to_thread(
+            wework_client.find_best_project_match, project_name, projects, threshold
         )
         
         if best_project:
@@ -254,7 +616,8 @@ def find_project_by_name(project_name: str, threshold: float = 0.3) -> Dict[str,
 
 # Tool to get project statistics
 @mcp.tool()
-def get_project_statistics(project_id: str) -> Dict[str, Any]:
+@timed_tool
+async def get_project_statistics(project_id: str) -> Dict[str, Any]:
     """
     Lấy thống kê tổng quan về dự án
     
@@ -271,53 +634,31 @@ def get_project_statistics(project_id: str) -> Dict[str, Any]:
         logger.info(f"Getting statistics for project ID: {project_id}")
         
         # Lấy thông tin dự án
-        project_info = wework_client.get_project_info(project_id)
+        project_info = await wework_client.get_project_info(project_id)
         if not project_info:
             return {
                 'error': f'Không tìm thấy dự án với ID: {project_id}',
                 'success': False
             }
         
-        # Phân tích tasks
-        df = wework_client.get_project_analysis(project_id)
-        
-        if df.empty:
-            return {
-                'success': True,
-                'project_name': project_info['name'],
-                'project_id': project_id,
-                'statistics': {
-                    'total_tasks': 0,
-                    'task_breakdown': {},
-                    'assignee_breakdown': {},
-                    'completion_rate': 0
-                }
-            }
-        
-        # Tính các thống kê với kiểm tra column tồn tại
-        total_tasks = len(df)
-        status_counts = df['Trạng thái'].value_counts().to_dict() if 'Trạng thái' in df.columns else {}
-        assignee_counts = df['Người thực hiện'].value_counts().to_dict() if 'Người thực hiện' in df.columns else {}
-        task_type_counts = df['Loại công việc'].value_counts().to_dict() if 'Loại công việc' in df.columns else {}
-        
-        # Tính completion rate
-        completed = status_counts.get('Hoàn thành', 0)
-        completion_rate = (completed / total_tasks * 100) if total_tasks > 0 else 0
+        # Thống kê tasks trong một lượt duyệt dữ liệu gốc (không dựng DataFrame)
+        stats = await wework_client.get_project_statistics(project_id)
+        status_counts = stats['status_counts']
         
         return {
             'success': True,
             'project_name': project_info['name'],
             'project_id': project_id,
             'statistics': {
-                'total_tasks': total_tasks,
+                'total_tasks': stats['total_tasks'],
                 'task_breakdown': status_counts,
-                'assignee_breakdown': assignee_counts,
-                'task_type_breakdown': task_type_counts,
-                'completion_rate': round(completion_rate, 2),
+                'assignee_breakdown': stats['assignee_counts'],
+                'task_type_breakdown': stats['task_type_counts'],
+                'completion_rate': stats['completion_rate'],
                 'summary': {
-                    'completed': status_counts.get('Hoàn thành', 0),
-                    'in_progress': status_counts.get('Đang thực hiện', 0),
-                    'failed': status_counts.get('Thất bại', 0)
+                    'completed': status_counts.get(STATUS_COMPLETED, 0),
+                    'in_progress': status_counts.get(STATUS_IN_PROGRESS, 0),
+                    'failed': status_counts.get(STATUS_FAILED, 0)
                 }
             }
         }
@@ -328,7 +669,8 @@ def get_project_statistics(project_id: str) -> Dict[str, Any]:
 
 # Tool to test connection
 @mcp.tool()
-def test_connection() -> Dict[str, Any]:
+@timed_tool
+async def test_connection() -> Dict[str, Any]:
     """
     Test kết nối với WeWork API
     
@@ -344,7 +686,7 @@ def test_connection() -> Dict[str, Any]:
             }
         
         logger.info("Testing WeWork API connection")
-        projects = wework_client.fetch_projects()
+        projects = await wework_client.fetch_projects()
         
         return {
             'success': True,